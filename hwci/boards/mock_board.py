@@ -7,6 +7,7 @@ import threading
 import time
 from core.board_harness import BoardHarness
 from utils.serial_port import MockSerialPort
+from utils.tracing import traced
 
 
 class MockBoard(BoardHarness):
@@ -19,6 +20,7 @@ class MockBoard(BoardHarness):
         self.serial = self.get_serial_port()
         self.serial_output_thread = None
         self.running = False
+        self.installed_apps = []
 
     def get_uart_port(self):
         # Return a mock serial port identifier
@@ -30,17 +32,37 @@ class MockBoard(BoardHarness):
     def get_serial_port(self):
         return MockSerialPort()  # Initialize the mock serial port
 
+    def cleanup(self):
+        self.stop()
+
+    @traced()
     def erase_board(self):
         logging.info("Mock erase of the board")
+        self.installed_apps = []
+
+    @traced()
+    def erase_apps(self):
+        logging.info("Mock erase of all apps")
+        self.installed_apps = []
 
+    @traced()
     def reset(self):
         logging.info("Mock board reset")
+        # Installed apps restart on reset, replay their output:
+        for app in self.installed_apps:
+            self.simulate_app_output(app)
 
+    @traced()
     def flash_kernel(self):
         logging.info("Mock flashing of the Tock OS kernel")
 
+    @traced()
     def flash_app(self, app):
         logging.info(f"Mock flashing of app: {app}")
+        self.installed_apps.append(app)
+        self.simulate_app_output(app)
+
+    def simulate_app_output(self, app):
         # Depending on the app, set up simulated output
         if app == "c_hello":
             self.simulate_output("Hello World!\r\n")
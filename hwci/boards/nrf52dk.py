@@ -3,20 +3,29 @@
 # Copyright Tock Contributors 2024.
 
 import os
-import subprocess
 import logging
-from contextlib import contextmanager
 import serial.tools.list_ports
-from boards.tockloader_board import TockloaderBoard
+from boards.tockloader_board import TockloaderBoard, build_lock
 from utils.serial_port import SerialPort
+from utils.discovery import discovery
 from gpio.gpio import GPIO
+from programmers import get_programmer
+from utils.tracing import traced
+from utils import process
+from utils.artifact_store import cache_key, tree_state
 import yaml
-import os
+
+# Target spec of the board attached to this host, in the hwci directory:
+DEFAULT_TARGET_SPEC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "target_spec.yaml"
+)
 
 
 class Nrf52dk(TockloaderBoard):
-    def __init__(self):
+    def __init__(self, target_spec_path=DEFAULT_TARGET_SPEC):
         super().__init__()
+        self.target_spec_path = target_spec_path
+        self.target_spec = load_target_spec(target_spec_path)
         self.arch = "cortex-m4"
         self.kernel_path = os.path.join(
             self.base_dir, "repos/tock")
@@ -25,17 +34,34 @@ class Nrf52dk(TockloaderBoard):
         self.uart_port = self.get_uart_port()
         self.uart_baudrate = self.get_uart_baudrate()
         self.openocd_board = "nrf52dk"
+        self.kernel_target = "thumbv7em-none-eabi"
+        self.kernel_platform = "nrf52840dk"
+        self.kernel_address = 0x00000
         self.board = "nrf52dk"
         self.serial = self.get_serial_port()
         self.gpio = self.get_gpio_interface()
+        # Flash through the probe whose console we use, also if it was
+        # selected automatically:
+        self.programmer = get_programmer(
+            self.target_spec, serial_number=self.probe_serial_number
+        )
+        self.openocd_serial_number = self.programmer.config.get("serial_number")
 
     def get_uart_port(self):
-        logging.info("Getting list of serial ports")
-        ports = list(serial.tools.list_ports.comports())
-        for port in ports:
-            if "J-Link" in port.description:
-                logging.info(f"Found J-Link port: {port.device}")
-                return port.device
+        # Look up the console of the probe named in the target spec, through
+        # the cached discovery map
+        discovered = discovery.find_board(self.target_spec_path, self.target_spec)
+        if discovered:
+            logging.info(
+                f"Found J-Link {discovered.probe.serial_number} port: "
+                + f"{discovered.probe.port}"
+            )
+            self.probe_serial_number = discovered.probe.serial_number
+            return discovered.probe.port
+
+        self.probe_serial_number = None
+        logging.info("No J-Link found, getting list of serial ports")
+        ports = sorted(serial.tools.list_ports.comports(), key=lambda p: p.device)
         if ports:
             logging.info(f"Automatically selected port: {ports[0].device}")
             return ports[0].device
@@ -53,10 +79,8 @@ class Nrf52dk(TockloaderBoard):
         return SerialPort(self.uart_port, self.uart_baudrate)
 
     def get_gpio_interface(self):
-        # Load the target spec from a YAML file
-        target_spec = load_target_spec()
         # Initialize GPIO with the target spec
-        gpio = GPIO(target_spec)
+        gpio = GPIO(self.target_spec)
         return gpio
 
     def cleanup(self):
@@ -66,52 +90,78 @@ class Nrf52dk(TockloaderBoard):
         if self.serial:
             self.serial.close()
 
+    @traced()
     def flash_kernel(self):
         logging.info("Flashing the Tock OS kernel")
+        kernel_image = self.build_kernel()
+        self.programmer.write_image(kernel_image, self.kernel_address)
+
+    def flash_kernel_commands(self):
+        # Building the kernel may be served from the cache, which happens
+        # in-process
+        return None
+
+    @traced()
+    def build_kernel(self):
         if not os.path.exists(self.kernel_path):
             logging.error(f"Tock directory {self.kernel_path} not found")
             raise FileNotFoundError(f"Tock directory {self.kernel_path} not found")
 
-        # Run make flash-openocd from the board directory
-        subprocess.run(
-            ["make", "flash-openocd"], cwd=self.kernel_board_path, check=True
-        )
-
+        # Boards sharing a tock checkout build one at a time, such that only
+        # the first one builds and the others find the result in the store
+        with build_lock(self.kernel_path):
+            # Kernel binaries are cached by the tock commit, the board and any
+            # uncommitted changes, so an unchanged kernel doesn't even need a
+            # (no-op) cargo build. The board is identified by its path within
+            # the tock tree, such that hosts with different checkout
+            # locations share kernels:
+            commit, dirty_hash = tree_state(self.kernel_path)
+            key = cache_key(
+                commit,
+                os.path.relpath(self.kernel_board_path, self.kernel_path),
+                dirty_hash,
+            )
+            cached_image = self.artifact_store.fetch(key, ".bin")
+            if cached_image:
+                logging.info(f"Using cached kernel {cached_image} (tock {commit[:12]})")
+                return cached_image
+
+            logging.info(f"Building the Tock OS kernel (tock {commit[:12]})")
+            process.run_commands(
+                [process.Command("build_kernel", ["make"], self.kernel_board_path)]
+            )
+            kernel_image = os.path.join(
+                self.kernel_path,
+                "target",
+                self.kernel_target,
+                "release",
+                f"{self.kernel_platform}.bin",
+            )
+            if not os.path.exists(kernel_image):
+                logging.error(f"Kernel binary {kernel_image} not found")
+                raise FileNotFoundError(f"Kernel binary {kernel_image} not found")
+            return self.artifact_store.store(key, kernel_image, ".bin")
+
+    @traced()
     def erase_board(self):
         logging.info("Erasing the board")
-        command = [
-            "openocd",
-            "-c",
-            "adapter driver jlink; transport select swd; source [find target/nrf52.cfg]; init; nrf52_recover; exit",
-        ]
-        subprocess.run(command, check=True)
+        self.programmer.erase()
+
+    def erase_board_commands(self):
+        return self.programmer.erase_commands()
 
+    @traced()
     def reset(self):
-        logging.info("Performing a target reset via JTAG")
-        command = [
-            "openocd",
-            "-c",
-            "adapter driver jlink; transport select swd; source [find target/nrf52.cfg]; init; reset; exit",
-        ]
-        subprocess.run(command, check=True)
+        logging.info("Performing a target reset")
+        self.programmer.reset()
+
+    def reset_commands(self):
+        return self.programmer.reset_commands()
 
     # The flash_app method is inherited from TockloaderBoard
 
-    @contextmanager
-    def change_directory(self, new_dir):
-        previous_dir = os.getcwd()
-        os.chdir(new_dir)
-        logging.info(f"Changed directory to: {os.getcwd()}")
-        try:
-            yield
-        finally:
-            os.chdir(previous_dir)
-            logging.info(f"Reverted to directory: {os.getcwd()}")
-
-
-def load_target_spec():
-    # Assume the target spec file is in a fixed location
-    target_spec_path = os.path.join(os.getcwd(), "target_spec.yaml")
+
+def load_target_spec(target_spec_path=DEFAULT_TARGET_SPEC):
     with open(target_spec_path, "r") as f:
         target_spec = yaml.safe_load(f)
     return target_spec
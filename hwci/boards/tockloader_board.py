@@ -3,21 +3,108 @@
 # Copyright Tock Contributors 2024.
 
 from core.board_harness import BoardHarness
+from utils.tracing import traced
+from utils import process
+from utils.artifact_store import cache_key, get_artifact_store, tree_state
 import os
-import subprocess
 import logging
-from contextlib import contextmanager
+import threading
 
+# Apps built from the same libtock-c checkout share its libraries, which can't
+# be built concurrently. Boards running in separate threads of one process
+# serialize their app builds per checkout through these locks.
+_build_locks = {}
+_build_locks_lock = threading.Lock()
 
+
+def build_lock(path):
+    with _build_locks_lock:
+        return _build_locks.setdefault(os.path.realpath(path), threading.Lock())
+
+
+# Board which installs apps through tockloader.
+#
+# All state is kept per board, and all commands run with explicit working
+# directories and absolute paths (never changing the process' working
+# directory), such that several boards can build and flash from threads of a
+# single process.
 class TockloaderBoard(BoardHarness):
 
     def __init__(self):
         super().__init__()
         self.board = None  # Should be set in subclass
         self.arch = None  # Should be set in subclass
+        # Serial number of the debug probe used by tockloader's OpenOCD
+        # channel, needed when several boards are attached to one host:
+        self.openocd_serial_number = None
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.libtock_c_dir = os.path.join(self.base_dir, "repos", "libtock-c")
+        # Built kernels and apps, shared across runs and, if configured, hosts:
+        self.artifact_store = get_artifact_store()
 
+    @traced()
     def flash_app(self, app):
+        app_name, _app_dir, _tab_path = self.resolve_app(app)
+        logging.info(f"Flashing app: {app_name}")
+        tab_path = self.build_app(app)
+        logging.info(f"Installing app: {app_name}")
+        process.run_commands([self.install_app_command(tab_path)])
+
+    @traced()
+    def build_app(self, app):
+        app_name, app_dir, tab_path = self.resolve_app(app)
+
+        with build_lock(self.libtock_c_dir):
+            # Apps are cached by the state of the libtock-c tree, the app and
+            # the architecture they're built for:
+            commit, dirty_hash = tree_state(self.libtock_c_dir)
+            key = cache_key(
+                commit,
+                dirty_hash,
+                os.path.relpath(tab_path, self.libtock_c_dir),
+                self.arch,
+            )
+            cached_tab = self.artifact_store.fetch(key, ".tab")
+            if cached_tab:
+                logging.info(f"Using cached app {app_name}: {cached_tab}")
+                return cached_tab
+
+            # Build the app using absolute paths, from within the app's
+            # directory (and thus the libtock-c repository, which some apps,
+            # e.g. lua-hello, need to build their submodules)
+            logging.info(f"Building app: {app_name}")
+            process.run_commands([self.build_app_command(app_dir)])
+
+            if not os.path.exists(tab_path):
+                logging.error(f"Tab file {tab_path} not found")
+                raise FileNotFoundError(f"Tab file {tab_path} not found")
+            return self.artifact_store.store(key, tab_path, ".tab")
+
+    def flash_app_commands(self, app):
+        # The app is built (or fetched from the artifact store) in-process,
+        # only its installation is left to the caller
+        return [self.install_app_command(self.build_app(app))]
+
+    def build_app_command(self, app_dir):
+        return process.Command("make", ["make", f"TOCK_TARGETS={self.arch}"], app_dir)
+
+    def install_app_command(self, tab_path):
+        return process.Command(
+            "tockloader install",
+            ["tockloader", "install"] + self.tockloader_args() + [tab_path],
+            self.base_dir,
+        )
+
+    def tockloader_args(self):
+        args = ["--board", self.board, "--openocd"]
+        if self.openocd_serial_number is not None:
+            args += ["--openocd-serial-number", str(self.openocd_serial_number)]
+        return args
+
+    def resolve_app(self, app):
+        # Returns the name, build directory and path of the resulting .tab
+        # file of an app, given either as a path relative to the libtock-c
+        # examples directory, or as a dict with "name", "path" and "tab_file".
         if type(app) == str:
             app_path = app
             app_name = os.path.basename(app_path)
@@ -27,47 +114,32 @@ class TockloaderBoard(BoardHarness):
             app_name = app["name"]
             tab_file = app["tab_file"] # relative to "path"
 
-        logging.info(f"Flashing app: {app_name}")
-        libtock_c_dir = os.path.join(self.base_dir, "repos", "libtock-c")
-        if not os.path.exists(libtock_c_dir):
-            logging.error(f"libtock-c directory {libtock_c_dir} not found")
-            raise FileNotFoundError(f"libtock-c directory {libtock_c_dir} not found")
+        if not os.path.exists(self.libtock_c_dir):
+            logging.error(f"libtock-c directory {self.libtock_c_dir} not found")
+            raise FileNotFoundError(
+                f"libtock-c directory {self.libtock_c_dir} not found"
+            )
 
-        app_dir = os.path.join(libtock_c_dir, "examples", app_path)
+        app_dir = os.path.join(self.libtock_c_dir, "examples", app_path)
         if not os.path.exists(app_dir):
             logging.error(f"App directory {app_dir} not found")
             raise FileNotFoundError(f"App directory {app_dir} not found")
 
-        # Build the app using absolute paths
-        logging.info(f"Building app: {app_name}")
-        if app_name != "lua-hello":
-            subprocess.run(
-                ["make", f"TOCK_TARGETS={self.arch}"], cwd=app_dir, check=True
-            )
-        else:
-            # if the app is lua-hello, we need to build the libtock-c submodule first so we need to change directory
-            # into the libtock-c directory so it knows we are in a git repostiory
-            self.change_directory(libtock_c_dir)
-            subprocess.run(
-                ["make", f"TOCK_TARGETS={self.arch}"], cwd=app_dir, check=True
-            )
+        return app_name, app_dir, os.path.join(app_dir, tab_file)
 
-        tab_path = os.path.join(app_dir, tab_file)
-        if not os.path.exists(tab_path):
-            logging.error(f"Tab file {tab_path} not found")
-            raise FileNotFoundError(f"Tab file {tab_path} not found")
-        logging.info(f"Installing app: {app_name}")
-        subprocess.run(
-            [
-                "tockloader",
-                "install",
-                "--board",
-                self.board,
-                "--openocd",
-                tab_path,
-            ],
-            check=True,
-        )
+    @traced()
+    def erase_apps(self):
+        logging.info("Erasing all apps")
+        process.run_commands(self.erase_apps_commands())
+
+    def erase_apps_commands(self):
+        return [
+            process.Command(
+                "tockloader erase-apps",
+                ["tockloader", "erase-apps"] + self.tockloader_args(),
+                self.base_dir,
+            )
+        ]
 
     def get_uart_port(self):
         raise NotImplementedError
@@ -83,14 +155,3 @@ class TockloaderBoard(BoardHarness):
 
     def flash_kernel(self):
         raise NotImplementedError
-
-    @contextmanager
-    def change_directory(self, new_dir):
-        previous_dir = os.getcwd()
-        os.chdir(new_dir)
-        logging.info(f"Changed directory to: {os.getcwd()}")
-        try:
-            yield
-        finally:
-            os.chdir(previous_dir)
-            logging.info(f"Reverted to directory: {os.getcwd()}")
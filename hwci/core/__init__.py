@@ -4,4 +4,5 @@
 
 from .main import main
 from .board_harness import BoardHarness
-from .test_harness import TestHarness
+from .async_board_harness import AsyncBoardHarness
+from .test_harness import TestHarness, test_info
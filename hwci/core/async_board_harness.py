@@ -0,0 +1,81 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import asyncio
+import logging
+from gpio.async_gpio import AsyncGPIO
+from utils import process
+from utils.async_serial_port import AsyncSerialPort
+from utils.tracing import span
+
+
+# asyncio variant of a `BoardHarness`, wrapping a synchronous board.
+#
+# A single event loop can drive several of these harnesses, e.g., to watch the
+# consoles of multiple boards, or a console and GPIO edges at the same time.
+# External tools (OpenOCD, make, tockloader) are run through
+# `asyncio.create_subprocess_exec`. Operations which the board performs
+# in-process are run in a worker thread instead.
+#
+# Use as an async context manager, which attaches to the board's serial port:
+#
+#     async with AsyncBoardHarness(board) as harness:
+#         await harness.reset()
+#         await harness.serial.expect("Hello World!")
+class AsyncBoardHarness:
+    def __init__(self, board):
+        self.board = board
+        self.serial = AsyncSerialPort(board.serial) if board.serial else None
+        self.gpio = AsyncGPIO(board.gpio) if board.gpio else None
+
+    async def __aenter__(self):
+        if self.serial:
+            self.serial.attach()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.serial:
+            self.serial.detach()
+
+    async def _run(self, name, commands, fallback, *args):
+        with span(name, cat="async", board=type(self.board).__name__):
+            if commands is None:
+                await asyncio.to_thread(fallback, *args)
+            else:
+                await process.run_commands_async(commands)
+
+    async def erase_board(self):
+        logging.info("Erasing the board")
+        await self._run(
+            "erase_board", self.board.erase_board_commands(), self.board.erase_board
+        )
+
+    async def reset(self):
+        logging.info("Resetting the board")
+        await self._run("reset", self.board.reset_commands(), self.board.reset)
+
+    async def flash_kernel(self):
+        logging.info("Flashing the Tock OS kernel")
+        await self._run(
+            "flash_kernel",
+            self.board.flash_kernel_commands(),
+            self.board.flash_kernel,
+        )
+
+    async def flash_app(self, app):
+        logging.info(f"Flashing app: {app}")
+        # Getting the commands may build the app, which blocks:
+        commands = await asyncio.to_thread(self.board.flash_app_commands, app)
+        await self._run("flash_app", commands, self.board.flash_app, app)
+
+    async def erase_apps(self):
+        logging.info("Erasing all apps")
+        await self._run(
+            "erase_apps", self.board.erase_apps_commands(), self.board.erase_apps
+        )
+
+    async def recover(self):
+        await self.erase_board()
+        if self.serial:
+            self.serial.flush_buffer()
@@ -2,6 +2,21 @@
 # SPDX-License-Identifier: Apache-2.0 OR MIT
 # Copyright Tock Contributors 2024.
 
+import logging
+import time
+from utils.process_console import PROMPT
+from utils.serial_reader import TimestampedSerialReader
+from utils.tracing import span
+
+# Printed by the kernel once it has set up all capsules and processes:
+KERNEL_BANNER = rb"Initialization complete\. Entering main loop"
+
+# Time the reset line is held low, when resetting through a GPIO pin:
+RESET_PULSE_S = 0.01
+
+# Milestones of a boot, as returned by `measure_boot`:
+BOOT_MILESTONES = ["first_byte", "banner", "prompt"]
+
 
 class BoardHarness:
     arch = None
@@ -37,3 +52,92 @@ class BoardHarness:
 
     def flash_app(self, app):
         raise NotImplementedError
+
+    def erase_apps(self):
+        raise NotImplementedError
+
+    # Boards which build their kernel and apps from source can do so ahead of
+    # flashing, e.g., to build everything a test session needs up front.
+    # Returns the path of the build output, or None if the board has nothing
+    # to build.
+    def build_kernel(self):
+        return None
+
+    def build_app(self, app):
+        return None
+
+    # Boards which perform their operations through external tools describe
+    # them as lists of `utils.process.Command`s, such that they can also be
+    # run by the asyncio harness. None means that the board performs the
+    # operation in-process. `flash_app_commands` may build the app first.
+    def erase_board_commands(self):
+        return None
+
+    def reset_commands(self):
+        return None
+
+    def flash_kernel_commands(self):
+        return None
+
+    def flash_app_commands(self, app):
+        return None
+
+    def erase_apps_commands(self):
+        return None
+
+    def recover(self):
+        # Bring a board which may be wedged (e.g., after a timeout) back into
+        # a state where it can be flashed again. By default, this erases the
+        # board. Callers need to re-flash the board afterwards.
+        self.erase_board()
+        if self.serial:
+            self.serial.flush_buffer()
+
+    def reset_pin(self):
+        # The pin wired to the target's reset line, if the target spec maps
+        # one (with `target_pin_function: RESET`)
+        if self.gpio is None:
+            return None
+        for label, pin_mapping in self.gpio.target_spec.get("pin_mappings", {}).items():
+            if pin_mapping.get("target_pin_function") == "RESET":
+                return self.gpio.pin(label)
+        return None
+
+    def measure_boot(self, timeout=10):
+        # Reset the board and time its boot. Returns the arrival times of the
+        # first console byte, the kernel banner and the process console prompt
+        # (see `BOOT_MILESTONES`), in seconds after the reset, or None for
+        # milestones which weren't seen within `timeout`.
+        #
+        # The reset happens when a reset pin is released, if the board has
+        # one. Otherwise, it's taken to be when `reset()` returns (e.g., when
+        # OpenOCD exits). As the target may start running before the tool
+        # exits, early milestones can then be negative.
+        pin = self.reset_pin()
+        self.serial.flush_buffer()
+        milestones = dict.fromkeys(BOOT_MILESTONES)
+        with TimestampedSerialReader(self.serial) as reader:
+            with span("measure_boot"):
+                if pin is not None:
+                    pin.set_mode("output")
+                    pin.write(0)
+                    time.sleep(RESET_PULSE_S)
+                    pin.write(1)
+                else:
+                    self.reset()
+                reset_time = time.time()
+
+                deadline = reset_time + timeout
+                for milestone, pattern in [
+                    ("first_byte", rb"(?s)."),
+                    ("banner", KERNEL_BANNER),
+                    ("prompt", PROMPT),
+                ]:
+                    arrival_time = reader.wait_for(
+                        pattern, max(deadline - time.time(), 0)
+                    )
+                    if arrival_time is None:
+                        logging.warning(f"No {milestone} within {timeout}s of the reset")
+                        break
+                    milestones[milestone] = arrival_time - reset_time
+        return milestones
@@ -0,0 +1,127 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Command line interface selecting tests through the registry:
+#
+#     python3 hwci.py list [-k EXPR] [--tag TAG] [--pin PIN] [--json]
+#     python3 hwci.py run --board boards/nrf52dk.py -k "gpio and not blink"
+#
+# `run` accepts all options of `core/main.py` (except --test).
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.main import add_run_arguments, check_run_arguments, load_board
+from core.main import run_tests, setup_logging
+from core.registry import registry, select_tests
+
+
+def add_selection_arguments(parser):
+    parser.add_argument(
+        "-k",
+        dest="expression",
+        metavar="EXPR",
+        help="Only select tests matching this expression, e.g. "
+        + '"gpio and not blink". Words match a tag, or part of a test\'s name.',
+    )
+    parser.add_argument(
+        "--tag",
+        action="append",
+        default=[],
+        help="Only select tests with this tag. May be given multiple times.",
+    )
+    parser.add_argument(
+        "--pin",
+        action="append",
+        default=[],
+        help="Only select tests using this pin. May be given multiple times.",
+    )
+
+
+def selected_tests(args):
+    try:
+        return select_tests(
+            registry.discover(), args.expression, args.tag, args.pin
+        )
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(2)
+
+
+def format_duration(seconds):
+    return "?" if seconds is None else f"{seconds}s"
+
+
+def list_command(args):
+    tests = selected_tests(args)
+    if args.json:
+        print(json.dumps([info._asdict() for info in tests], indent=2))
+        return
+
+    for info in tests:
+        print(
+            f"{info.path:40} {format_duration(info.expected_duration):>6}  "
+            + f"tags: {','.join(info.tags) or '-'}  pins: {','.join(info.pins) or '-'}"
+        )
+    print(f"{len(tests)} tests")
+
+
+def run_command(args):
+    setup_logging()
+
+    board = load_board(args.board)
+    infos = selected_tests(args)
+
+    # Skip tests requiring pins which aren't wired up on this board:
+    target_spec = getattr(board, "target_spec", None)
+    if target_spec is not None:
+        available_pins = target_spec.get("pin_mappings", {}).keys()
+        runnable = select_tests(infos, available_pins=available_pins)
+        for info in infos:
+            if info not in runnable:
+                logging.warning(
+                    f"Skipping {info.path}: requires pins {', '.join(info.pins)}"
+                )
+        infos = runnable
+
+    if not infos:
+        logging.error("No tests selected")
+        board.cleanup()
+        sys.exit(1)
+
+    expected = [info.expected_duration for info in infos]
+    if None not in expected:
+        logging.info(f"Running {len(infos)} tests, expected to take {sum(expected)}s")
+    run_tests(args, board, [(info.path, registry.load(info.path)) for info in infos])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and run Tock OS tests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List the available tests")
+    add_selection_arguments(list_parser)
+    list_parser.add_argument(
+        "--json", action="store_true", help="Print the test metadata as JSON"
+    )
+    list_parser.set_defaults(func=list_command)
+
+    run_parser = subparsers.add_parser("run", help="Run the selected tests")
+    add_selection_arguments(run_parser)
+    add_run_arguments(run_parser)
+    run_parser.set_defaults(func=run_command)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        check_run_arguments(run_parser, args)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
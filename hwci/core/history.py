@@ -0,0 +1,495 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# History of test runs, kept in an SQLite database.
+#
+# Each run's results (as written to results.json by `ResultsWriter`) are
+# recorded with the refs of the tock, libtock-c and hwci trees they ran
+# against. The database is a single file, such that CI jobs can pass it on as
+# an artifact. Runs are identified by their `run_id`, so importing a results
+# file or merging a database twice doesn't duplicate them.
+#
+# Usage:
+#
+#     python3 core/history.py import results/results.json
+#     python3 core/history.py merge other-history.sqlite
+#     python3 core/history.py runs
+#     python3 core/history.py slowest --days 30
+#     python3 core/history.py flaky
+#     python3 core/history.py trend tests/c_hello.py [--phase phase:flash_app]
+#     python3 core/history.py trend tests/gpio_original.py --metric mean_interval_s
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+HWCI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default database, can be overridden through the HWCI_HISTORY_DB environment
+# variable or the --db option:
+DEFAULT_DB = os.path.join(HWCI_DIR, "history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    board TEXT,
+    host TEXT,
+    started_at REAL,
+    finished_at REAL,
+    tock_ref TEXT,
+    libtock_c_ref TEXT,
+    hwci_ref TEXT,
+    flashes INTEGER,
+    flashes_avoided INTEGER
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    flaky INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    reused_image INTEGER,
+    started_at REAL,
+    duration_s REAL,
+    bytes_read INTEGER,
+    bytes_written INTEGER,
+    exception_type TEXT,
+    exception_message TEXT
+);
+CREATE TABLE IF NOT EXISTS phases (
+    test INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    phase TEXT NOT NULL,
+    count INTEGER,
+    total_s REAL,
+    max_s REAL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    test INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS tests_name_started_at ON tests(name, started_at);
+CREATE INDEX IF NOT EXISTS tests_run ON tests(run);
+CREATE INDEX IF NOT EXISTS phases_test ON phases(test, phase);
+CREATE INDEX IF NOT EXISTS metrics_test ON metrics(test, name);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics(name);
+"""
+
+
+def git_ref(repo_path):
+    try:
+        return subprocess.run(
+            ["git", "-C", repo_path, "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def source_refs(board=None):
+    # Commits of the trees a run tests, taken from the board if it knows
+    # where they are checked out
+    repos_dir = os.path.join(HWCI_DIR, "repos")
+    return {
+        "tock": git_ref(getattr(board, "kernel_path", os.path.join(repos_dir, "tock"))),
+        "libtock-c": git_ref(
+            getattr(board, "libtock_c_dir", os.path.join(repos_dir, "libtock-c"))
+        ),
+        "hwci": git_ref(HWCI_DIR),
+    }
+
+
+class HistoryDB:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("HWCI_HISTORY_DB", DEFAULT_DB)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record_run(self, report):
+        # Record a results report (see `ResultsWriter`). Returns False if the
+        # run was recorded before.
+        refs = report.get("refs") or {}
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO runs (run_id, board, host, started_at, "
+                + "finished_at, tock_ref, libtock_c_ref, hwci_ref, flashes, "
+                + "flashes_avoided) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    report.get("run_id") or f"{report.get('host')}:{report['started_at']}",
+                    report.get("board"),
+                    report.get("host"),
+                    report.get("started_at"),
+                    report.get("finished_at"),
+                    refs.get("tock"),
+                    refs.get("libtock-c"),
+                    refs.get("hwci"),
+                    report.get("flash", {}).get("flashes"),
+                    report.get("flash", {}).get("flashes_avoided"),
+                ),
+            )
+            if cursor.rowcount == 0:
+                return False
+            run = cursor.lastrowid
+
+            for test in report.get("tests", []):
+                if test["status"] == "pending":
+                    continue
+                exception = test.get("exception") or {}
+                serial = test.get("serial", {})
+                test_id = self.db.execute(
+                    "INSERT INTO tests (run, name, status, flaky, attempts, "
+                    + "reused_image, started_at, duration_s, bytes_read, "
+                    + "bytes_written, exception_type, exception_message) "
+                    + "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run,
+                        test["name"],
+                        test["status"],
+                        int(test.get("flaky", False)),
+                        len(test.get("attempts", [])),
+                        test.get("flash", {}).get("reused_image"),
+                        test.get("started_at"),
+                        test.get("duration_s"),
+                        serial.get("bytes_read"),
+                        serial.get("bytes_written"),
+                        exception.get("type"),
+                        exception.get("message"),
+                    ),
+                ).lastrowid
+                self.db.executemany(
+                    "INSERT INTO phases (test, phase, count, total_s, max_s) "
+                    + "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (test_id, phase, t["count"], t["total_s"], t["max_s"])
+                        for phase, t in test.get("phases", {}).items()
+                    ],
+                )
+                self.db.executemany(
+                    "INSERT INTO metrics (test, name, value, unit) VALUES (?, ?, ?, ?)",
+                    [
+                        (test_id, name, metric.get("value"), metric.get("unit"))
+                        for name, metric in test.get("metrics", {}).items()
+                    ],
+                )
+        return True
+
+    def merge(self, other_path):
+        # Import all runs of another history database which aren't known yet
+        other = HistoryDB(other_path)
+        try:
+            rows = other.db.execute("SELECT * FROM runs ORDER BY started_at").fetchall()
+            merged = 0
+            for row in rows:
+                if self.record_run(other.report(row)):
+                    merged += 1
+            return merged
+        finally:
+            other.close()
+
+    def report(self, run_row):
+        # Reconstruct the (recorded parts of the) results report of a run
+        tests = []
+        for test in self.db.execute(
+            "SELECT * FROM tests WHERE run = ? ORDER BY id", (run_row["id"],)
+        ):
+            tests.append(
+                {
+                    "name": test["name"],
+                    "status": test["status"],
+                    "flaky": bool(test["flaky"]),
+                    "attempts": [{}] * test["attempts"],
+                    "flash": {"reused_image": test["reused_image"]},
+                    "started_at": test["started_at"],
+                    "duration_s": test["duration_s"],
+                    "serial": {
+                        "bytes_read": test["bytes_read"],
+                        "bytes_written": test["bytes_written"],
+                    },
+                    "exception": {
+                        "type": test["exception_type"],
+                        "message": test["exception_message"],
+                    }
+                    if test["exception_type"]
+                    else None,
+                    "phases": {
+                        phase["phase"]: {
+                            "count": phase["count"],
+                            "total_s": phase["total_s"],
+                            "max_s": phase["max_s"],
+                        }
+                        for phase in self.db.execute(
+                            "SELECT * FROM phases WHERE test = ?", (test["id"],)
+                        )
+                    },
+                    "metrics": {
+                        metric["name"]: {"value": metric["value"], "unit": metric["unit"]}
+                        for metric in self.db.execute(
+                            "SELECT * FROM metrics WHERE test = ?", (test["id"],)
+                        )
+                    },
+                }
+            )
+        return {
+            "run_id": run_row["run_id"],
+            "board": run_row["board"],
+            "host": run_row["host"],
+            "started_at": run_row["started_at"],
+            "finished_at": run_row["finished_at"],
+            "refs": {
+                "tock": run_row["tock_ref"],
+                "libtock-c": run_row["libtock_c_ref"],
+                "hwci": run_row["hwci_ref"],
+            },
+            "flash": {
+                "flashes": run_row["flashes"],
+                "flashes_avoided": run_row["flashes_avoided"],
+            },
+            "tests": tests,
+        }
+
+    def runs(self, limit=20):
+        return self.db.execute(
+            "SELECT runs.*, COUNT(tests.id) AS tests, "
+            + "SUM(tests.status = 'failed') AS failed, "
+            + "SUM(tests.flaky) AS flaky "
+            + "FROM runs LEFT JOIN tests ON tests.run = runs.id "
+            + "GROUP BY runs.id ORDER BY runs.started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def slowest(self, since=None, board=None, limit=20):
+        # Tests by mean duration (of their passing runs, as failures are cut
+        # short or hit deadlines)
+        return self.db.execute(
+            "SELECT tests.name, COUNT(*) AS runs, AVG(tests.duration_s) AS mean_s, "
+            + "MAX(tests.duration_s) AS max_s, SUM(tests.duration_s) AS total_s "
+            + "FROM tests JOIN runs ON tests.run = runs.id "
+            + "WHERE tests.status = 'passed' AND tests.started_at >= ? "
+            + "AND (? IS NULL OR runs.board = ?) "
+            + "GROUP BY tests.name ORDER BY mean_s DESC LIMIT ?",
+            (since or 0, board, board, limit),
+        ).fetchall()
+
+    def flaky(self, since=None, board=None, limit=20):
+        # Tests by the share of their runs which only passed after retries,
+        # or failed
+        return self.db.execute(
+            "SELECT tests.name, COUNT(*) AS runs, SUM(tests.flaky) AS flaky, "
+            + "SUM(tests.status = 'failed') AS failed, "
+            + "AVG(tests.flaky) AS flake_rate, "
+            + "AVG(tests.status = 'failed') AS failure_rate "
+            + "FROM tests JOIN runs ON tests.run = runs.id "
+            + "WHERE tests.started_at >= ? AND (? IS NULL OR runs.board = ?) "
+            + "GROUP BY tests.name HAVING flaky > 0 OR failed > 0 "
+            + "ORDER BY flake_rate + failure_rate DESC, runs DESC LIMIT ?",
+            (since or 0, board, board, limit),
+        ).fetchall()
+
+    def metric_values(self, name, metric, board=None, exclude_run_id=None, limit=20):
+        # Values of a test's metric in its most recent passing runs, newest
+        # first
+        return [
+            row["value"]
+            for row in self.db.execute(
+                "SELECT metrics.value FROM metrics "
+                + "JOIN tests ON metrics.test = tests.id "
+                + "JOIN runs ON tests.run = runs.id "
+                + "WHERE tests.name = ? AND metrics.name = ? "
+                + "AND tests.status = 'passed' AND metrics.value IS NOT NULL "
+                + "AND (? IS NULL OR runs.board = ?) "
+                + "AND (? IS NULL OR runs.run_id != ?) "
+                + "ORDER BY tests.started_at DESC LIMIT ?",
+                (name, metric, board, board, exclude_run_id, exclude_run_id, limit),
+            )
+        ]
+
+    def trend(
+        self, name, phase=None, metric=None, since=None, board=None, limit=50
+    ):
+        # Duration of a test (or of one of its phases), or the value of one of
+        # its metrics, per run, newest first
+        if metric is not None:
+            duration = "metrics.value"
+            join = "JOIN metrics ON metrics.test = tests.id AND metrics.name = ? "
+            params = [metric]
+        elif phase is not None:
+            duration = "phases.total_s"
+            join = "JOIN phases ON phases.test = tests.id AND phases.phase = ? "
+            params = [phase]
+        else:
+            duration = "tests.duration_s"
+            join = ""
+            params = []
+        return self.db.execute(
+            f"SELECT tests.started_at, tests.status, {duration} AS duration_s, "
+            + "runs.board, runs.tock_ref, runs.libtock_c_ref "
+            + f"FROM tests JOIN runs ON tests.run = runs.id {join}"
+            + "WHERE tests.name = ? AND tests.started_at >= ? "
+            + "AND (? IS NULL OR runs.board = ?) "
+            + "ORDER BY tests.started_at DESC LIMIT ?",
+            params + [name, since or 0, board, board, limit],
+        ).fetchall()
+
+
+def format_time(timestamp):
+    if timestamp is None:
+        return "-"
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def short_ref(ref):
+    return ref[:12] if ref else "-"
+
+
+def print_rows(header, rows):
+    widths = [
+        max(len(str(value)) for value in column)
+        for column in zip(header, *rows)
+    ]
+    for row in [header] + rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and query test run history")
+    parser.add_argument("--db", help=f"History database (default: {DEFAULT_DB})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Record results.json files")
+    import_parser.add_argument("results", nargs="+")
+
+    merge_parser = subparsers.add_parser(
+        "merge", help="Import the runs of other history databases"
+    )
+    merge_parser.add_argument("databases", nargs="+")
+
+    runs_parser = subparsers.add_parser("runs", help="List recent runs")
+    runs_parser.add_argument("--limit", type=int, default=20)
+
+    for command, description in [
+        ("slowest", "List tests by mean duration"),
+        ("flaky", "List tests by flake and failure rate"),
+        ("trend", "Show a test's duration over time"),
+    ]:
+        query_parser = subparsers.add_parser(command, help=description)
+        if command == "trend":
+            query_parser.add_argument("test", help="Test name, e.g. tests/c_hello.py")
+            query_parser.add_argument(
+                "--phase", help="Show a phase's duration, e.g. phase:flash_app"
+            )
+            query_parser.add_argument(
+                "--metric", help="Show a metric, e.g. LED1.mean_interval_s"
+            )
+        query_parser.add_argument(
+            "--days", type=float, help="Only consider runs of the last N days"
+        )
+        query_parser.add_argument("--board", help="Only consider runs on this board")
+        query_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    history = HistoryDB(args.db)
+    since = time.time() - args.days * 86400 if getattr(args, "days", None) else None
+
+    if args.command == "import":
+        for path in args.results:
+            with open(path) as f:
+                recorded = history.record_run(json.load(f))
+            print(f"{path}: {'recorded' if recorded else 'already recorded'}")
+    elif args.command == "merge":
+        for path in args.databases:
+            print(f"{path}: merged {history.merge(path)} runs")
+    elif args.command == "runs":
+        print_rows(
+            ["started", "board", "host", "tests", "failed", "flaky", "tock", "libtock-c"],
+            [
+                [
+                    format_time(row["started_at"]),
+                    row["board"],
+                    row["host"],
+                    row["tests"],
+                    row["failed"] or 0,
+                    row["flaky"] or 0,
+                    short_ref(row["tock_ref"]),
+                    short_ref(row["libtock_c_ref"]),
+                ]
+                for row in history.runs(args.limit)
+            ],
+        )
+    elif args.command == "slowest":
+        print_rows(
+            ["test", "runs", "mean", "max", "total"],
+            [
+                [
+                    row["name"],
+                    row["runs"],
+                    f"{row['mean_s']:.1f}s",
+                    f"{row['max_s']:.1f}s",
+                    f"{row['total_s']:.0f}s",
+                ]
+                for row in history.slowest(since, args.board, args.limit)
+            ],
+        )
+    elif args.command == "flaky":
+        print_rows(
+            ["test", "runs", "flaky", "failed", "flake rate", "failure rate"],
+            [
+                [
+                    row["name"],
+                    row["runs"],
+                    row["flaky"],
+                    row["failed"],
+                    f"{row['flake_rate']:.1%}",
+                    f"{row['failure_rate']:.1%}",
+                ]
+                for row in history.flaky(since, args.board, args.limit)
+            ],
+        )
+    elif args.command == "trend":
+        rows = history.trend(
+            args.test, args.phase, args.metric, since, args.board, args.limit
+        )
+        if not rows:
+            print(f"No runs of {args.test} recorded")
+            sys.exit(1)
+        print_rows(
+            [
+                "started",
+                "status",
+                args.metric or "duration",
+                "board",
+                "tock",
+                "libtock-c",
+            ],
+            [
+                [
+                    format_time(row["started_at"]),
+                    row["status"],
+                    f"{row['duration_s']:.6g}" if args.metric else f"{row['duration_s']:.2f}s",
+                    row["board"],
+                    short_ref(row["tock_ref"]),
+                    short_ref(row["libtock_c_ref"]),
+                ]
+                for row in rows
+            ],
+        )
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
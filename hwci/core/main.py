@@ -8,52 +8,184 @@ import importlib.util
 import sys
 from pathlib import Path
 
-def main():
-    parser = argparse.ArgumentParser(description="Run tests on Tock OS")
+# Ensure that imported modules can find the top-level hwci modules
+# (appends the hwci root to the PYTHONPATH):
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.history import HistoryDB, source_refs
+from core.regressions import check_report
+from core.results import ResultsWriter
+from core.retry import RetryPolicy, ESCALATION
+from core.session import TestSession
+from utils.log_buffer import configure_log_buffer, DEFAULT_BUFFERED_LOGGERS
+from utils.log_buffer import DEFAULT_CAPACITY, TestLogBuffer
+from utils.process import configure_deadlines, DEFAULT_DEADLINES
+from utils.tracing import tracer
+
+
+def load_module(module_name, path):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def add_run_arguments(parser):
+    # Options of the test runner, shared with `hwci run` (see `core/cli.py`)
     parser.add_argument("--board", required=True, help="Path to the board module")
-    parser.add_argument("--test", required=True, help="Path to the test module")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--trace-file",
+        help="Write per-phase timings to this file, in the Chrome trace-event "
+        + "format (viewable in chrome://tracing or Perfetto)",
+    )
+    parser.add_argument(
+        "--results-dir",
+        help="Write machine-readable results (results.json, junit.xml) to "
+        + "this directory. Results are updated after every test.",
+    )
+    parser.add_argument(
+        "--history-db",
+        help="Record the run in this SQLite history database (see "
+        + "core/history.py), and compare its metrics against earlier runs. "
+        + "Requires --results-dir.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        choices=range(len(ESCALATION) + 1),
+        help="Retry failed tests up to this many times. Retries escalate "
+        + "from resetting the board, to reinstalling apps, to a full re-flash.",
+    )
+    parser.add_argument(
+        "--test-timeout",
+        type=float,
+        help="Default deadline for each test (including flashing) in seconds. "
+        + "Tests exceeding it fail, and the board is recovered.",
+    )
+    parser.add_argument(
+        "--deadline",
+        action="append",
+        default=[],
+        metavar="PHASE=SECONDS",
+        help="Override the deadline of an external command phase "
+        + f"({', '.join(DEFAULT_DEADLINES)}). May be given multiple times.",
+    )
+    parser.add_argument(
+        "--log-buffer",
+        action="append",
+        default=[],
+        metavar="LOGGER=LEVEL",
+        help="Buffer the log records of this logger at the given level, only "
+        + "printing them if a test fails, or 'off' to always print them "
+        + f"(buffered by default: {', '.join(DEFAULT_BUFFERED_LOGGERS)}). "
+        + "May be given multiple times.",
+    )
+    parser.add_argument(
+        "--log-buffer-size",
+        type=int,
+        default=DEFAULT_CAPACITY,
+        help="Number of log records buffered per test attempt",
+    )
 
-    # Set up logging
+
+def check_run_arguments(parser, args):
+    if args.history_db and not args.results_dir:
+        parser.error("--history-db requires --results-dir")
+    try:
+        configure_deadlines(args.deadline)
+        configure_log_buffer(args.log_buffer)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def setup_logging():
     logging.basicConfig(
         level=logging.DEBUG,
         format="%(asctime)s - %(levelname)s - %(message)s",
     )
 
-    # Ensure that imported modules can find the top-level hwci modules
-    # (appends the hwci root to the PYTHONPATH):
-    sys.path.append(str(Path(__file__).parent.parent))
 
-    # 1. Load board module
-    board_spec = importlib.util.spec_from_file_location("board_module", args.board)
-    board_module = importlib.util.module_from_spec(board_spec)
-    board_spec.loader.exec_module(board_module)
+def load_board(board_path):
+    board_module = load_module("board_module", board_path)
     if hasattr(board_module, "board"):
-        board = board_module.board
+        return board_module.board
     else:
         logging.error("No board class found in the specified board module")
         sys.exit(1)
 
-    # 5. Load test module, run test function
-    test_spec = importlib.util.spec_from_file_location("test_module", args.test)
-    test_module = importlib.util.module_from_spec(test_spec)
-    test_spec.loader.exec_module(test_module)
-    if hasattr(test_module, "test"):
-        test = test_module.test
-    else:
-        logging.error("No test variable found in the specified test module")
-        sys.exit(1)
 
-    # Run the test
+def run_tests(args, board, tests):
+    # Run a list of (test path, test) tuples on a board, exits on failure
+    results = None
+    if args.results_dir:
+        results = ResultsWriter(
+            args.results_dir, board_name=Path(args.board).stem, refs=source_refs(board)
+        )
+
     try:
-        test.test(board)
-        logging.info("Test completed successfully")
-    except Exception as e:
-        logging.exception("An error occurred during test execution")
-        sys.exit(1)
+        passed = TestSession(
+            board,
+            tests,
+            results=results,
+            retry_policy=RetryPolicy(args.retries),
+            test_timeout=args.test_timeout,
+            log_buffer=TestLogBuffer(args.log_buffer_size),
+        ).run()
     finally:
         board.cleanup()
 
+        logging.info("Phase timings:\n" + tracer.format_summary())
+        if args.trace_file:
+            tracer.write_chrome_trace(args.trace_file)
+            logging.info(f"Wrote Chrome trace to {args.trace_file}")
+
+        if args.history_db and results:
+            # Compare the run's metrics against earlier runs, then add it to
+            # the baseline of later ones
+            history = HistoryDB(args.history_db)
+            check_report(history, results.report)
+            results.write()
+            history.record_run(results.report)
+            history.close()
+            logging.info(f"Recorded run in {history.path}")
+
+    if not passed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run tests on Tock OS")
+    parser.add_argument(
+        "--test",
+        required=True,
+        nargs="+",
+        help="Path to the test module. When multiple tests are given, tests "
+        + "which flash identical images are run back to back on a single flash.",
+    )
+    add_run_arguments(parser)
+    args = parser.parse_args()
+    check_run_arguments(parser, args)
+
+    # Set up logging
+    setup_logging()
+
+    # 1. Load board module
+    board = load_board(args.board)
+
+    # 2. Load test modules
+    tests = []
+    for test_path in args.test:
+        test_module = load_module("test_module", test_path)
+        if hasattr(test_module, "test"):
+            tests.append((test_path, test_module.test))
+        else:
+            logging.error(f"No test variable found in test module {test_path}")
+            sys.exit(1)
+
+    # 3. Run the tests
+    run_tests(args, board, tests)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure that imported modules can find the top-level hwci modules
+# (appends the hwci root to the PYTHONPATH):
+sys.path.append(str(Path(__file__).parent.parent))
+
+import yaml
+from programmers import load_programmer_class
+
+OPERATIONS = ["erase", "write_image", "read_back", "reset"]
+
+
+# Times each operation of a programmer `repeats` times. Returns a dict mapping
+# operation names to a list of durations, or None if the programmer doesn't
+# support the operation.
+def benchmark_programmer(programmer, image_path, address, repeats):
+    with open(image_path, "rb") as f:
+        image = f.read()
+
+    operations = {
+        "erase": lambda: programmer.erase(),
+        "write_image": lambda: programmer.write_image(image_path, address),
+        "read_back": lambda: programmer.read_back(address, len(image)),
+        "reset": lambda: programmer.reset(),
+    }
+
+    timings = {}
+    for name in OPERATIONS:
+        timings[name] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            try:
+                result = operations[name]()
+            except NotImplementedError:
+                timings[name] = None
+                break
+            timings[name].append(time.perf_counter() - start)
+
+            if name == "read_back" and result != image:
+                raise Exception(
+                    f"{programmer.name}: read back data doesn't match the written image"
+                )
+    return timings
+
+
+def format_results(results):
+    lines = [
+        f"{'programmer':<12} {'operation':<12} {'min':>9} {'median':>9} {'max':>9}"
+    ]
+    for programmer_name, timings in results.items():
+        if timings is None:
+            lines.append(f"{programmer_name:<12} {'failed':<12}")
+            continue
+        for operation in OPERATIONS:
+            durations = timings[operation]
+            if durations is None:
+                lines.append(
+                    f"{programmer_name:<12} {operation:<12} {'unsupported':>29}"
+                )
+                continue
+            lines.append(
+                f"{programmer_name:<12} {operation:<12} "
+                + f"{min(durations):>8.3f}s {statistics.median(durations):>8.3f}s "
+                + f"{max(durations):>8.3f}s"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the operations of each programmer backend. This "
+        + "erases and overwrites the target's flash, the board has to be "
+        + "flashed again afterwards."
+    )
+    parser.add_argument(
+        "--target-spec",
+        default=os.path.join(Path(__file__).parent.parent, "target_spec.yaml"),
+        help="Target spec whose programmer options are used for all backends",
+    )
+    parser.add_argument(
+        "--programmer",
+        nargs="+",
+        default=["openocd", "tockloader", "nrfjprog"],
+        help="Programmer backends to benchmark",
+    )
+    parser.add_argument(
+        "--image",
+        help="Image to write. Defaults to a generated image of --image-size bytes.",
+    )
+    parser.add_argument(
+        "--image-size",
+        type=int,
+        default=64 * 1024,
+        help="Size of the generated image, in bytes",
+    )
+    parser.add_argument(
+        "--address",
+        type=lambda value: int(value, 0),
+        default=0x0,
+        help="Address to write the image to",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3, help="Number of runs of each operation"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    with open(args.target_spec, "r") as f:
+        target_spec = yaml.safe_load(f)
+    config = target_spec.get("programmer", {})
+    if isinstance(config, str):
+        config = {"interface": config}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path = args.image
+        if image_path is None:
+            image_path = os.path.join(tmp_dir, "image.bin")
+            with open(image_path, "wb") as f:
+                f.write(os.urandom(args.image_size))
+
+        results = {}
+        for programmer_name in args.programmer:
+            programmer_class = load_programmer_class(programmer_name)
+            programmer = programmer_class(dict(config, interface=programmer_name))
+            logging.info(f"Benchmarking programmer: {programmer_name}")
+            try:
+                results[programmer_name] = benchmark_programmer(
+                    programmer, image_path, args.address, args.repeats
+                )
+            except Exception as e:
+                # E.g., the programmer's tool isn't installed on this host
+                logging.error(f"Programmer {programmer_name} failed: {e}")
+                results[programmer_name] = None
+
+    logging.info("Programmer benchmark results:\n" + format_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+
+HWCI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(HWCI_DIR, "tests")
+CACHE_FILE = os.path.join(HWCI_DIR, ".test-registry-cache.json")
+
+# Modules shared by the tests, which can change their metadata (e.g., the
+# defaults of `test_info`, or the attributes a test helper class sets).
+# Changing any of these invalidates the metadata of all tests.
+SHARED_SOURCES = [
+    "core/test_harness.py",
+    "core/registry.py",
+    "utils/test_helpers",
+]
+
+# Metadata of a test, as recorded by `core.test_harness.test_info`. `path` is
+# relative to the hwci directory, `name` is the test file's stem.
+TestInfo = namedtuple(
+    "TestInfo", ["name", "path", "apps", "pins", "tags", "expected_duration"]
+)
+
+
+def load_module(module_name, path):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def shared_digest():
+    # Hash over the shared test sources
+    digest = hashlib.sha256()
+    for source in SHARED_SOURCES:
+        source_path = os.path.join(HWCI_DIR, source)
+        if os.path.isdir(source_path):
+            paths = sorted(
+                os.path.join(source, file)
+                for file in os.listdir(source_path)
+                if file.endswith(".py")
+            )
+        else:
+            paths = [source]
+        for path in paths:
+            digest.update(path.encode() + b"\0")
+            with open(os.path.join(HWCI_DIR, path), "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def describe(path, test):
+    apps = getattr(test, "apps", [])
+    return TestInfo(
+        name=os.path.splitext(os.path.basename(path))[0],
+        path=path,
+        apps=[app if isinstance(app, str) else app["name"] for app in apps],
+        pins=list(test.pins),
+        tags=list(test.tags),
+        expected_duration=test.expected_duration,
+    )
+
+
+# Registry of the tests in the tests directory.
+#
+# Discovering a test requires importing its module, which is slow with
+# hundreds of tests. The metadata of each test is therefore cached, keyed by a
+# hash of its file and of the shared test sources (`SHARED_SOURCES`), such
+# that only new or modified tests are imported.
+class TestRegistry:
+    def __init__(self, tests_dir=TESTS_DIR, cache_file=CACHE_FILE):
+        self.tests_dir = tests_dir
+        self.cache_file = cache_file
+        # Test objects of the modules imported by this process, by path:
+        self.loaded = {}
+
+    def test_paths(self):
+        paths = []
+        for root, dirs, files in os.walk(self.tests_dir):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for file in sorted(files):
+                if file.endswith(".py") and file != "__init__.py":
+                    paths.append(
+                        os.path.relpath(os.path.join(root, file), HWCI_DIR)
+                    )
+        return paths
+
+    def discover(self):
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+        tests = []
+        updated_cache = {}
+        shared = shared_digest()
+        for path in self.test_paths():
+            with open(os.path.join(HWCI_DIR, path), "rb") as f:
+                digest = hashlib.sha256(shared.encode() + f.read()).hexdigest()
+            cached = cache.get(path)
+            if cached and cached["digest"] == digest:
+                info = TestInfo(**cached["info"])
+            else:
+                try:
+                    info = describe(path, self.load(path))
+                except Exception as e:
+                    logging.warning(f"Failed to load test {path}: {e}")
+                    continue
+            tests.append(info)
+            updated_cache[path] = {"digest": digest, "info": info._asdict()}
+
+        if updated_cache != cache:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(updated_cache, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        return tests
+
+    def load(self, path):
+        # Returns the `test` object of a test module, importing it at most
+        # once per process
+        if path not in self.loaded:
+            module = load_module("test_module", os.path.join(HWCI_DIR, path))
+            if not hasattr(module, "test"):
+                raise ValueError(f"No test variable found in test module {path}")
+            self.loaded[path] = module.test
+        return self.loaded[path]
+
+
+# Matches the tokens of a -k expression: parentheses, or words (keywords and
+# test name / tag patterns)
+EXPRESSION_TOKEN = re.compile(r"\s*(\(|\)|[^\s()]+)")
+
+
+def compile_expression(expression):
+    # Compile a pytest-style -k expression, e.g. "gpio and not blink", into a
+    # predicate on `TestInfo`s. Words match a tag exactly or any part of a
+    # test's name or path.
+    tokens = []
+    words = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = EXPRESSION_TOKEN.match(expression, position)
+        if not match:
+            raise ValueError(f"Invalid test expression: {expression}")
+        token = match.group(1)
+        position = match.end()
+        if token in ("and", "or", "not", "(", ")"):
+            tokens.append(token)
+        else:
+            tokens.append(f"matches({len(words)})")
+            words.append(token)
+
+    source = " ".join(tokens) or "True"
+    try:
+        code = compile(source, "<expression>", "eval")
+    except SyntaxError:
+        raise ValueError(f"Invalid test expression: {expression}")
+
+    def predicate(info):
+        def matches(index):
+            word = words[index]
+            return word in info.tags or word in info.name or word in info.path
+
+        return eval(code, {"__builtins__": {}}, {"matches": matches})
+
+    return predicate
+
+
+def select_tests(tests, expression=None, tags=(), pins=(), available_pins=None):
+    # Filter tests by a -k expression, by tags and by pins (all of which a
+    # test must have / use), and by the pins available on a board (tests
+    # requiring any other pin are excluded)
+    predicate = compile_expression(expression) if expression else None
+    selected = []
+    for info in tests:
+        if predicate and not predicate(info):
+            continue
+        if not set(tags) <= set(info.tags):
+            continue
+        if not set(pins) <= set(info.pins):
+            continue
+        if available_pins is not None and not set(info.pins) <= set(available_pins):
+            continue
+        selected.append(info)
+    return selected
+
+
+# Registry of this process, shared by the command line interface and runner:
+registry = TestRegistry()
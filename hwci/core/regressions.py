@@ -0,0 +1,178 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Detection of metric regressions, e.g. drifting timers or a slower scheduler,
+# against a rolling baseline of earlier runs in the history database.
+#
+# Tests pass as long as their measurements stay within generous tolerances,
+# which would hide gradual kernel regressions. Instead, each metric a test
+# publishes (see `TestHarness.publish_metric`) is compared against the same
+# metric in the most recent passing runs of the test on the same board. The
+# comparison uses the median and the median absolute deviation (MAD) of those
+# runs, which are insensitive to the occasional outlier in the baseline.
+# Metrics published with a direction (e.g., lower is better for a boot time)
+# are only flagged when they change for the worse.
+#
+# Usage:
+#
+#     python3 core/regressions.py results/results.json [--db history.sqlite]
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.history import HistoryDB
+from core.test_harness import HIGHER_IS_BETTER, LOWER_IS_BETTER
+
+# Number of earlier runs forming the baseline:
+DEFAULT_WINDOW = 20
+
+# Fewer earlier runs are not considered a baseline:
+MIN_BASELINE_RUNS = 5
+
+# Robust z-score (deviation from the median, in scaled MADs) beyond which a
+# metric is flagged:
+DEFAULT_THRESHOLD = 4.0
+
+# Scales the MAD into an estimate of the standard deviation, for normally
+# distributed values:
+MAD_SCALE = 1.4826
+
+# Minimum spread assumed for a baseline, relative to its median. Without it,
+# metrics with (nearly) identical values in all earlier runs, such as toggle
+# counts, would be flagged for any change at all.
+MIN_RELATIVE_SPREAD = 0.01
+
+# `change` is the deviation from the baseline median. `score` is None for a
+# baseline without any spread (see `robust_score`).
+Regression = namedtuple(
+    "Regression",
+    ["test", "metric", "value", "unit", "median", "mad", "score", "change"],
+)
+
+
+def robust_score(value, baseline):
+    # Deviation of `value` from the median of `baseline`, in scaled MADs.
+    # Returns the score, median and MAD. The score is None if the baseline
+    # has no spread at all (e.g., a count of dropped bytes that was 0 in all
+    # earlier runs), such that any change is significant.
+    median = statistics.median(baseline)
+    mad = statistics.median(abs(v - median) for v in baseline)
+    spread = max(MAD_SCALE * mad, MIN_RELATIVE_SPREAD * abs(median))
+    if spread == 0:
+        return (0.0 if value == median else None), median, mad
+    return (value - median) / spread, median, mad
+
+
+def is_worse(change, better):
+    # Whether a change of a metric is for the worse, given its direction
+    if better == LOWER_IS_BETTER:
+        return change > 0
+    if better == HIGHER_IS_BETTER:
+        return change < 0
+    return change != 0
+
+
+def find_regressions(
+    history, report, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD
+):
+    # Compare the metrics of all passed tests of a results report against
+    # their baselines
+    regressions = []
+    for test in report.get("tests", []):
+        if test["status"] != "passed":
+            continue
+        for metric, published in test.get("metrics", {}).items():
+            baseline = history.metric_values(
+                test["name"],
+                metric,
+                board=report.get("board"),
+                exclude_run_id=report.get("run_id"),
+                limit=window,
+            )
+            if len(baseline) < MIN_BASELINE_RUNS:
+                continue
+            value = published["value"]
+            score, median, mad = robust_score(value, baseline)
+            if not is_worse(value - median, published.get("better")):
+                continue
+            if score is None or abs(score) > threshold:
+                regressions.append(
+                    Regression(
+                        test["name"],
+                        metric,
+                        value,
+                        published.get("unit"),
+                        median,
+                        mad,
+                        score,
+                        value - median,
+                    )
+                )
+    return regressions
+
+
+def format_regression(regression):
+    unit = f" {regression.unit}" if regression.unit else ""
+    if regression.score is None:
+        deviation = f"constant baseline, change {regression.change:+.6g}{unit}"
+    else:
+        deviation = f"MAD {regression.mad:.3g}, score {regression.score:+.1f}"
+    return (
+        f"{regression.test}: {regression.metric} = {regression.value:.6g}{unit}, "
+        + f"baseline median {regression.median:.6g}{unit} ({deviation})"
+    )
+
+
+def check_report(history, report, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    # Log all regressions of a results report, and add them to the report
+    regressions = find_regressions(history, report, window, threshold)
+    for regression in regressions:
+        logging.warning(f"Metric regression: {format_regression(regression)}")
+    report["regressions"] = [regression._asdict() for regression in regressions]
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the metrics of a run against earlier runs"
+    )
+    parser.add_argument("results", help="results.json of the run to check")
+    parser.add_argument("--db", help="History database")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help="Number of earlier runs forming the baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Flag metrics deviating from the baseline median by more than "
+        + "this many (scaled) median absolute deviations",
+    )
+    args = parser.parse_args()
+
+    with open(args.results) as f:
+        report = json.load(f)
+    history = HistoryDB(args.db)
+    regressions = find_regressions(history, report, args.window, args.threshold)
+    history.close()
+
+    for regression in regressions:
+        print(format_regression(regression))
+    if regressions:
+        sys.exit(1)
+    print("No metric regressions")
+
+
+if __name__ == "__main__":
+    main()
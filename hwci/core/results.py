@@ -0,0 +1,157 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import collections
+import json
+import os
+import re
+import socket
+import time
+import uuid
+import xml.etree.ElementTree as ET
+
+from utils.tracing import summarize
+
+RESULTS_JSON = "results.json"
+RESULTS_JUNIT = "junit.xml"
+# Directory of the per-test serial transcripts, see `utils/transcript.py`
+TRANSCRIPTS_DIR = "transcripts"
+
+
+def phase_timings(spans):
+    # Convert a list of spans into a {"cat:name": {...}} dict of aggregated
+    # timings for the results file:
+    return {
+        f"{cat}:{name}": {
+            "count": count,
+            "total_s": round(total, 6),
+            "max_s": round(maximum, 6),
+        }
+        for cat, name, count, total, maximum in summarize(spans)
+    }
+
+
+# Writes structured test results (JSON and JUnit XML) to a results directory.
+#
+# Both files are rewritten after every test, such that a partial run (e.g.,
+# one which is killed by a job-level timeout) still produces a report. Tests
+# which have not run yet are reported with status "pending".
+class ResultsWriter:
+    def __init__(self, results_dir, board_name=None, refs=None):
+        self.results_dir = results_dir
+        self.json_path = os.path.join(results_dir, RESULTS_JSON)
+        self.junit_path = os.path.join(results_dir, RESULTS_JUNIT)
+        os.makedirs(results_dir, exist_ok=True)
+        # Transcripts written per test name, see `transcript_path`:
+        self.transcripts = collections.Counter()
+
+        self.report = {
+            # Identifies the run, e.g. when recording it in the history
+            # database (see `core/history.py`):
+            "run_id": uuid.uuid4().hex,
+            "board": board_name,
+            "host": socket.gethostname(),
+            # Commits of the tock, libtock-c and hwci trees under test:
+            "refs": refs or {},
+            "started_at": time.time(),
+            "finished_at": None,
+            "flash": {"flashes": 0, "flashes_avoided": 0},
+            "tests": [],
+        }
+
+    def transcript_path(self, name):
+        # Path of a test's serial transcript, e.g.
+        # transcripts/tests_c_hello.serial.gz for tests/c_hello.py. A test
+        # scheduled several times gets a transcript per run, numbered from
+        # its second run on (tests_c_hello.2.serial.gz, ...).
+        stem = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.splitext(name)[0])
+        self.transcripts[stem] += 1
+        if self.transcripts[stem] > 1:
+            stem += f".{self.transcripts[stem]}"
+        directory = os.path.join(self.results_dir, TRANSCRIPTS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{stem}.serial.gz")
+
+    def start(self, test_names):
+        self.report["tests"] = [
+            {"name": name, "status": "pending"} for name in test_names
+        ]
+        self.write()
+
+    def record(self, result):
+        for idx, entry in enumerate(self.report["tests"]):
+            if entry["name"] == result["name"] and entry["status"] == "pending":
+                self.report["tests"][idx] = result
+                break
+        else:
+            self.report["tests"].append(result)
+        self.write()
+
+    def finish(self, flashes, flashes_avoided):
+        self.report["finished_at"] = time.time()
+        self.report["flash"] = {
+            "flashes": flashes,
+            "flashes_avoided": flashes_avoided,
+        }
+        self.write()
+
+    def write(self):
+        write_atomically(self.json_path, json.dumps(self.report, indent=2))
+        write_atomically(
+            self.junit_path,
+            ET.tostring(self.junit_tree(), encoding="unicode", xml_declaration=True),
+        )
+
+    def junit_tree(self):
+        tests = self.report["tests"]
+        suite = ET.Element(
+            "testsuite",
+            name="hwci",
+            tests=str(len(tests)),
+            failures=str(sum(1 for t in tests if t["status"] == "failed")),
+            errors="0",
+            skipped=str(sum(1 for t in tests if t["status"] == "pending")),
+            time=f"{sum(t.get('duration_s', 0) for t in tests):.3f}",
+        )
+        for test in tests:
+            case = ET.SubElement(
+                suite,
+                "testcase",
+                classname=f"hwci.{self.report['board']}",
+                name=test["name"],
+                time=f"{test.get('duration_s', 0):.3f}",
+            )
+            if len(test.get("attempts", [])) > 1:
+                properties = ET.SubElement(case, "properties")
+                ET.SubElement(
+                    properties,
+                    "property",
+                    name="attempts",
+                    value=str(len(test["attempts"])),
+                )
+                ET.SubElement(
+                    properties, "property", name="flaky", value=str(test["flaky"])
+                )
+            if test["status"] == "failed":
+                exception = test.get("exception") or {}
+                failure = ET.SubElement(
+                    case,
+                    "failure",
+                    message=exception.get("message", ""),
+                    type=exception.get("type", ""),
+                )
+                failure.text = exception.get("traceback", "")
+            elif test["status"] == "pending":
+                ET.SubElement(case, "skipped", message="Test did not run")
+
+        suites = ET.Element("testsuites")
+        suites.append(suite)
+        return suites
+
+
+def write_atomically(path, contents):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(contents)
+    os.replace(tmp_path, path)
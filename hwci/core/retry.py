@@ -0,0 +1,36 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+from core.test_harness import (
+    PREPARE_FLASH,
+    PREPARE_LEVELS,
+    PREPARE_REINSTALL_APPS,
+    PREPARE_RESET,
+)
+
+# Retries escalate from the cheapest to the most expensive way of bringing the
+# board back into a known state:
+ESCALATION = [PREPARE_RESET, PREPARE_REINSTALL_APPS, PREPARE_FLASH]
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=0):
+        if not 0 <= max_retries <= len(ESCALATION):
+            raise ValueError(
+                f"Number of retries must be between 0 and {len(ESCALATION)}"
+            )
+        self.max_retries = max_retries
+
+    def next_prepare(self, retry, failed_prepare=None):
+        # Returns how the board should be prepared for the given (zero-based)
+        # retry. When the previous attempt already failed to prepare the
+        # board, retrying with an equally cheap preparation is pointless, so
+        # we escalate past it.
+        prepare = ESCALATION[retry]
+        if failed_prepare is not None:
+            failed_level = PREPARE_LEVELS.index(failed_prepare)
+            minimum = PREPARE_LEVELS[min(failed_level + 1, len(PREPARE_LEVELS) - 1)]
+            if PREPARE_LEVELS.index(prepare) < PREPARE_LEVELS.index(minimum):
+                prepare = minimum
+        return prepare
@@ -0,0 +1,293 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from core.results import phase_timings
+from core.retry import RetryPolicy
+from core.test_harness import PrepareError, PREPARE_FLASH, PREPARE_RESET
+from utils.process import PhaseTimeout, TestTimeout, test_deadline
+from utils.tracing import tracer
+from utils.transcript import TranscriptWriter
+
+
+# Runs a sequence of tests against a single board.
+#
+# Tests which flash an identical image (same kernel and app set, as reported by
+# their `flash_fingerprint`) are grouped and run back to back. Only the first
+# test of each group flashes the board, subsequent tests merely reset it, unless
+# they request a pristine flash.
+class TestSession:
+    def __init__(
+        self,
+        board,
+        tests,
+        results=None,
+        retry_policy=None,
+        test_timeout=None,
+        log_buffer=None,
+    ):
+        # List of (name, test) tuples, in the order they were requested:
+        self.board = board
+        self.tests = tests
+        # Optional `ResultsWriter` to report results to:
+        self.results = results
+        # Failed tests are retried with increasingly expensive ways of
+        # restoring the board state, according to this policy:
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Default deadline for each test, unless overridden by the test:
+        self.test_timeout = test_timeout
+        # Optional `TestLogBuffer`, which holds back hot-path log records
+        # unless a test attempt fails:
+        self.log_buffer = log_buffer
+
+        # Fingerprint of the image currently on the board, if known:
+        self.flashed_fingerprint = None
+
+        self.flashes = 0
+        self.flashes_avoided = 0
+        self.passed = []
+        self.failed = []
+        self.flaky = []
+
+    def schedule(self):
+        # Group tests by their flash fingerprint, retaining the order in which
+        # each group was first requested. Tests without a fingerprint are
+        # placed in a group of their own.
+        groups = {}
+        for name, test in self.tests:
+            fingerprint = test.flash_fingerprint(self.board)
+            key = fingerprint if fingerprint is not None else ("unshared", name)
+            groups.setdefault(key, []).append((name, test))
+
+        return [entry for group in groups.values() for entry in group]
+
+    def prebuild(self, schedule):
+        # Build the kernel and all apps of this session up front, such that
+        # flashing only writes already built images. The kernel is built in
+        # parallel with the apps. Apps are built one after the other, as they
+        # share the libtock-c libraries. Failures are only logged here, the
+        # affected tests will report them when they build again.
+        apps = []
+        for _name, test in schedule:
+            for app in getattr(test, "apps", []):
+                if app not in apps:
+                    apps.append(app)
+
+        def build_apps():
+            for app in apps:
+                self.board.build_app(app)
+
+        with tracer.span("prebuild"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(self.board.build_kernel),
+                    executor.submit(build_apps),
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception:
+                        logging.exception("Failed to build ahead of the tests")
+
+    def run(self):
+        schedule = self.schedule()
+        if self.results:
+            self.results.start([name for name, _ in schedule])
+        self.prebuild(schedule)
+
+        if self.log_buffer:
+            self.log_buffer.install()
+        try:
+            for name, test in schedule:
+                result = self.run_test(name, test)
+                if self.results:
+                    self.results.record(result)
+        finally:
+            if self.log_buffer:
+                self.log_buffer.uninstall()
+
+        if self.results:
+            self.results.finish(self.flashes, self.flashes_avoided)
+
+        logging.info(
+            f"Ran {len(self.passed) + len(self.failed)} tests: "
+            + f"{len(self.passed)} passed ({len(self.flaky)} flaky), "
+            + f"{len(self.failed)} failed"
+        )
+        logging.info(
+            f"Flashed the board {self.flashes} times, "
+            + f"avoided {self.flashes_avoided} flashes by reusing images"
+        )
+        for name in self.flaky:
+            logging.warning(f"Test passed after retries: {name}")
+        for name in self.failed:
+            logging.error(f"Test failed: {name}")
+
+        return len(self.failed) == 0
+
+    def run_test(self, name, test):
+        fingerprint = test.flash_fingerprint(self.board)
+        if (
+            fingerprint is not None
+            and fingerprint == self.flashed_fingerprint
+            and not test.pristine_flash
+        ):
+            prepare = PREPARE_RESET
+        else:
+            prepare = PREPARE_FLASH
+
+        result = {
+            "name": name,
+            "status": "passed",
+            "exception": None,
+            "flaky": False,
+            "flash": {
+                "fingerprint": fingerprint,
+                "reused_image": prepare == PREPARE_RESET,
+            },
+            "attempts": [],
+        }
+        serial = self.board.serial
+        bytes_read = getattr(serial, "bytes_read", 0)
+        bytes_written = getattr(serial, "bytes_written", 0)
+        span_mark = tracer.mark()
+        start_time = time.time()
+
+        # Record everything read from the console while the test runs:
+        transcript = None
+        read_monitor = getattr(serial, "read_monitor", None)
+        if self.results and read_monitor is not None:
+            transcript = TranscriptWriter(self.results.transcript_path(name))
+            read_monitor.transcript = transcript
+
+        try:
+            logging.info(f"===== Running test {name} =====")
+            attempt = self.run_attempt(name, test, prepare, transcript)
+            result["attempts"].append(attempt)
+
+            for retry in range(self.retry_policy.max_retries):
+                if attempt["status"] == "passed":
+                    break
+
+                failed_prepare = attempt["exception"].get("prepare")
+                prepare = self.retry_policy.next_prepare(retry, failed_prepare)
+                if attempt["recovered"]:
+                    # Recovering the board erased it:
+                    prepare = PREPARE_FLASH
+                logging.warning(
+                    f"Retrying test {name} ({retry + 1}/"
+                    + f"{self.retry_policy.max_retries}), preparing board: {prepare}"
+                )
+                attempt = self.run_attempt(name, test, prepare, transcript)
+                result["attempts"].append(attempt)
+        finally:
+            if transcript is not None:
+                read_monitor.transcript = None
+                transcript.close()
+
+        if attempt["status"] == "passed":
+            logging.info(f"Test {name} completed successfully")
+            self.flashed_fingerprint = fingerprint
+            self.passed.append(name)
+            if len(result["attempts"]) > 1:
+                logging.warning(
+                    f"Test {name} is flaky, passed after "
+                    + f"{len(result['attempts']) - 1} retries"
+                )
+                result["flaky"] = True
+                self.flaky.append(name)
+        else:
+            # The board may be left in an arbitrary state, don't reuse its
+            # image for any subsequent test:
+            self.flashed_fingerprint = None
+            self.failed.append(name)
+            result["status"] = "failed"
+            result["exception"] = attempt["exception"]
+
+        # Metrics published by the final attempt:
+        result["metrics"] = dict(test.metrics)
+        result["started_at"] = start_time
+        result["duration_s"] = time.time() - start_time
+        result["phases"] = phase_timings(
+            [s for s in tracer.spans_since(span_mark) if s.cat != "test"]
+        )
+        result["serial"] = {
+            "bytes_read": getattr(serial, "bytes_read", 0) - bytes_read,
+            "bytes_written": getattr(serial, "bytes_written", 0) - bytes_written,
+        }
+        if transcript is not None:
+            result["serial"]["transcript"] = os.path.relpath(
+                transcript.path, self.results.results_dir
+            )
+        return result
+
+    def run_attempt(self, name, test, prepare, transcript=None):
+        if prepare == PREPARE_FLASH:
+            self.flashes += 1
+        else:
+            self.flashes_avoided += 1
+
+        if prepare != PREPARE_RESET:
+            # Until the test has flashed the board successfully, we don't
+            # know what image it holds:
+            self.flashed_fingerprint = None
+
+        attempt = {
+            "prepare": prepare,
+            "status": "passed",
+            "exception": None,
+            "recovered": False,
+        }
+        if transcript is not None:
+            # Where this attempt's console output starts in the transcript:
+            attempt["transcript_line"] = transcript.line_count
+        timeout = test.timeout if test.timeout is not None else self.test_timeout
+        if self.log_buffer:
+            self.log_buffer.start()
+        test.reset_metrics()
+        start_time = time.time()
+        try:
+            with test_deadline(timeout):
+                with tracer.span(name, cat="test", prepare=prepare):
+                    test.test(self.board, prepare=prepare)
+        except (Exception, TestTimeout) as e:
+            logging.exception(f"An error occurred during execution of {name}")
+            attempt["status"] = "failed"
+            attempt["exception"] = {
+                "type": type(e).__name__,
+                "message": str(e),
+                "traceback": traceback.format_exc(),
+                # Set if the test failed while preparing the board:
+                "prepare": e.prepare if isinstance(e, PrepareError) else None,
+            }
+            if is_timeout(e):
+                # A hung tool or test may have left the board wedged. Recover
+                # it now, such that a single hang doesn't fail all subsequent
+                # tests:
+                attempt["recovered"] = self.recover_board()
+        attempt["duration_s"] = time.time() - start_time
+        if self.log_buffer:
+            self.log_buffer.finish(name, attempt["status"] == "passed")
+        return attempt
+
+    def recover_board(self):
+        logging.warning("Recovering the board after a timeout")
+        self.flashed_fingerprint = None
+        try:
+            with tracer.span("recover"):
+                self.board.recover()
+        except Exception:
+            logging.exception("Failed to recover the board")
+            return False
+        return True
+
+
+def is_timeout(e):
+    if isinstance(e, PrepareError):
+        e = e.__cause__
+    return isinstance(e, (PhaseTimeout, TestTimeout))
@@ -2,7 +2,88 @@
 # SPDX-License-Identifier: Apache-2.0 OR MIT
 # Copyright Tock Contributors 2024.
 
+# How a test brings the board into its initial state, from cheapest to most
+# expensive:
+PREPARE_RESET = "reset"  # The board holds the test's image, only reset it
+PREPARE_REINSTALL_APPS = "reinstall_apps"  # Keep the kernel, reinstall apps
+PREPARE_FLASH = "flash"  # Erase the board, flash the kernel and all apps
+
+PREPARE_LEVELS = [PREPARE_RESET, PREPARE_REINSTALL_APPS, PREPARE_FLASH]
+
+# Which direction of change is an improvement of a published metric, see
+# `TestHarness.publish_metric`:
+LOWER_IS_BETTER = "lower"
+HIGHER_IS_BETTER = "higher"
+
+
+# Raised when a test fails to bring the board into its initial state, as
+# opposed to a failure of the test itself.
+class PrepareError(Exception):
+    def __init__(self, message, prepare):
+        super().__init__(message)
+        self.prepare = prepare
+
 
 class TestHarness:
-    def test(self, board):
+    # Tests with the same flash fingerprint can run back to back on a single
+    # flash of the board. Tests which rely on a freshly erased and flashed
+    # board (e.g., because an earlier test may have modified flash contents)
+    # should set this to True.
+    pristine_flash = False
+
+    # Deadline for the entire test (including flashing) in seconds. If None,
+    # the session's default test deadline applies.
+    timeout = None
+
+    # Metadata used to list and select tests, see `test_info`
+    pins = []
+    tags = []
+    expected_duration = None
+
+    def flash_fingerprint(self, board):
+        # Returning None means that this test's flash image can't be shared
+        # with any other test.
+        return None
+
+    def test(self, board, prepare=PREPARE_FLASH):
         pass
+
+    def reset_metrics(self):
+        # Called by the session before each attempt of the test
+        self.metrics = {}
+
+    def publish_metric(self, name, value, unit=None, better=None):
+        # Publish a named numeric measurement of this test run, such as a
+        # mean blink interval. Metrics are reported in the results, recorded
+        # in the history and compared against earlier runs (see
+        # `core/regressions.py`), such that a drifting timer is noticed
+        # before the test starts failing. `better` is LOWER_IS_BETTER or
+        # HIGHER_IS_BETTER, such that only changes for the worse are flagged,
+        # or None if any change is suspicious (e.g., a timer's interval).
+        if better not in (None, LOWER_IS_BETTER, HIGHER_IS_BETTER):
+            raise ValueError(f"Invalid direction for metric {name}: {better}")
+        if getattr(self, "metrics", None) is None:
+            self.reset_metrics()
+        self.metrics[name] = {"value": float(value), "unit": unit, "better": better}
+
+
+def test_info(tags=(), pins=(), expected_duration=None):
+    # Decorator recording the metadata of a test, for listing and selecting
+    # tests through the registry (see `core/registry.py`). Applies to test
+    # classes as well as instances:
+    #
+    #     @test_info(tags=["gpio"], pins=["P0.13"], expected_duration=10)
+    #     class BlinkTest(OneshotTest):
+    #         ...
+    #
+    #     test = test_info(tags=["console"])(WaitForConsoleMessageTest(...))
+    #
+    # `pins` are the target spec pin labels the test requires, and
+    # `expected_duration` its typical run time in seconds, excluding flashing.
+    def decorate(test):
+        test.tags = list(tags)
+        test.pins = list(pins)
+        test.expected_duration = expected_duration
+        return test
+
+    return decorate
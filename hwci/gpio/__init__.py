@@ -3,3 +3,4 @@
 # Copyright Tock Contributors 2024.
 
 from .gpio import GPIO
+from .async_gpio import AsyncGPIO, AsyncGPIOPin
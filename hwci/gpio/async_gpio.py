@@ -0,0 +1,57 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import asyncio
+from utils.tracing import span
+
+EDGE_RISING = "rising"
+EDGE_FALLING = "falling"
+EDGE_BOTH = "both"
+
+
+# asyncio wrapper around the pins of a `GPIO` instance.
+class AsyncGPIO:
+    def __init__(self, gpio):
+        self.gpio = gpio
+
+    def pin(self, pin_label):
+        return AsyncGPIOPin(self.gpio.pin(pin_label))
+
+
+class AsyncGPIOPin:
+    def __init__(self, pin, poll_interval=0.001):
+        self.pin = pin
+        # The GPIO interfaces don't provide edge notifications we could await,
+        # so edges are detected by polling the pin from the event loop:
+        self.poll_interval = poll_interval
+
+    def set_mode(self, mode):
+        self.pin.set_mode(mode)
+
+    def read(self):
+        return self.pin.read()
+
+    def write(self, value):
+        self.pin.write(value)
+
+    async def wait_edge(self, edge=EDGE_BOTH, timeout=10):
+        # Wait for the pin to change its value. Returns the new value and the
+        # event loop time at which the change was observed, or None on a
+        # timeout.
+        with span("wait_edge", cat="gpio", edge=edge):
+            loop = asyncio.get_running_loop()
+            end_time = loop.time() + timeout
+            previous = self.pin.read()
+            while loop.time() < end_time:
+                await asyncio.sleep(self.poll_interval)
+                value = self.pin.read()
+                if value != previous:
+                    if (
+                        edge == EDGE_BOTH
+                        or (edge == EDGE_RISING and value)
+                        or (edge == EDGE_FALLING and not value)
+                    ):
+                        return value, loop.time()
+                    previous = value
+            return None
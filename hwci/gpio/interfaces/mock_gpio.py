@@ -3,6 +3,7 @@
 # Copyright Tock Contributors 2024.
 
 import logging
+from utils.log_buffer import samples_log
 
 
 class MockGPIO:
@@ -32,9 +33,9 @@ class MockGPIOPin:
         logging.info(f"Pin {self.pin_label} set to mode {mode}")
 
     def read(self):
-        logging.info(f"Pin {self.pin_label} read value {self.value}")
+        samples_log.debug("Pin %s read value %s", self.pin_label, self.value)
         return self.value
 
     def write(self, value):
         self.value = value
-        logging.info(f"Pin {self.pin_label} write value {value}")
+        samples_log.debug("Pin %s write value %s", self.pin_label, value)
@@ -2,8 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0 OR MIT
 # Copyright Tock Contributors 2024.
 
-import logging
 from gpiozero import LED, Button, DigitalOutputDevice, DigitalInputDevice
+from utils.log_buffer import samples_log
 
 
 class RaspberryPi5GPIO:
@@ -49,14 +49,14 @@ class RaspberryPiGPIOPin:
         if self.mode != "input":
             raise RuntimeError("Pin is not set to input mode")
         value = self.device.value
-        logging.debug(f"Read value {value} from pin {self.gpio_pin_number}")
+        samples_log.debug("Read value %s from pin %s", value, self.gpio_pin_number)
         return value
 
     def write(self, value):
         if self.mode != "output":
             raise RuntimeError("Pin is not set to output mode")
         self.device.value = value
-        logging.debug(f"Wrote value {value} to pin {self.gpio_pin_number}")
+        samples_log.debug("Wrote value %s to pin %s", value, self.gpio_pin_number)
 
     def close(self):
         if self.device:
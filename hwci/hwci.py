@@ -2,6 +2,12 @@
 # SPDX-License-Identifier: Apache-2.0 OR MIT
 # Copyright Tock Contributors 2024.
 
+import sys
+
 if __name__ == "__main__":
-    import core
-    core.main()
+    if len(sys.argv) > 1 and sys.argv[1] in ("list", "run"):
+        from core import cli
+        cli.main()
+    else:
+        import core
+        core.main()
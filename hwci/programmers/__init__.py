@@ -0,0 +1,9 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+from .programmer import Programmer, load_programmer_class, get_programmer
+from .openocd import OpenOCDProgrammer
+from .tockloader import TockloaderProgrammer
+from .nrfjprog import NrfjprogProgrammer
+from .fake import FakeProgrammer
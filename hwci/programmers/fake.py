@@ -0,0 +1,51 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import logging
+from programmers.programmer import Programmer
+
+# Flash size of the nRF52840
+DEFAULT_FLASH_SIZE = 0x100000
+
+
+# In-memory programmer, for running boards and the programmer benchmark
+# without any hardware attached.
+class FakeProgrammer(Programmer):
+    name = "fake"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.flash = bytearray(b"\xff" * config.get("flash_size", DEFAULT_FLASH_SIZE))
+        self.resets = 0
+
+    def erase(self):
+        logging.info("Fake erase of the flash")
+        self.flash[:] = b"\xff" * len(self.flash)
+
+    def reset(self):
+        logging.info("Fake target reset")
+        self.resets += 1
+
+    def write_image(self, image_path, address):
+        with open(image_path, "rb") as f:
+            image = f.read()
+        if address + len(image) > len(self.flash):
+            raise ValueError(
+                f"Image {image_path} of {len(image)} bytes doesn't fit at {address:#x}"
+            )
+        logging.info(f"Fake write of {image_path} to {address:#x}")
+        self.flash[address : address + len(image)] = image
+
+    def read_back(self, address, length):
+        return bytes(self.flash[address : address + length])
+
+    # The fake programmer operates in-process
+    def erase_commands(self):
+        return None
+
+    def reset_commands(self):
+        return None
+
+    def write_image_commands(self, image_path, address):
+        return None
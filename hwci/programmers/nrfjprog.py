@@ -0,0 +1,104 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import os
+import re
+import subprocess
+import tempfile
+from programmers.programmer import Programmer
+from utils import process
+from utils.tracing import span
+
+# Matches a line of `nrfjprog --memrd` output, e.g.
+# "0x00000000: 20040000 000001D5 0000B31D 000001D9   |. ..............|"
+MEMRD_LINE = re.compile(r"^0x[0-9a-fA-F]+:((?:\s+[0-9a-fA-F]{8})+)")
+
+
+# Programmer based on Nordic's nrfjprog command line tool. nrfjprog only
+# programs Intel HEX files, raw images are converted before programming.
+class NrfjprogProgrammer(Programmer):
+    name = "nrfjprog"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.family = config.get("family", "nrf52")
+        self.serial_number = config.get("serial_number")
+
+    def nrfjprog(self, phase, args):
+        command = ["nrfjprog", "-f", self.family]
+        if self.serial_number is not None:
+            command += ["--snr", str(self.serial_number)]
+        return process.Command(phase, command + args)
+
+    def erase_commands(self):
+        return [self.nrfjprog("erase_board", ["--recover"])]
+
+    def reset_commands(self):
+        return [self.nrfjprog("reset", ["--reset"])]
+
+    def write_image(self, image_path, address):
+        if image_path.endswith(".hex"):
+            self.run(self.write_image_commands(image_path, address))
+            return
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hex_path = os.path.join(tmp_dir, "image.hex")
+            with open(image_path, "rb") as f:
+                write_intel_hex(hex_path, f.read(), address)
+            self.run(self.write_image_commands(hex_path, address))
+
+    def write_image_commands(self, image_path, address):
+        # `address` is only used for raw images, HEX files carry their own
+        # addresses.
+        return [
+            self.nrfjprog(
+                "write_image",
+                ["--program", image_path, "--sectorerase", "--verify", "--reset"],
+            )
+        ]
+
+    def read_back(self, address, length):
+        # --memrd reads whole words, round the length up
+        words = (length + 3) // 4
+        command = self.nrfjprog(
+            "read_back", ["--memrd", f"{address:#x}", "--w", "32", "--n", str(words * 4)]
+        )
+        with span(command.phase, cat="process"):
+            output = subprocess.run(
+                command.args,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=process.deadlines.get(command.phase),
+            ).stdout
+
+        data = bytearray()
+        for line in output.splitlines():
+            match = MEMRD_LINE.match(line.strip())
+            if match:
+                for word in match.group(1).split():
+                    data += int(word, 16).to_bytes(4, "little")
+        return bytes(data[:length])
+
+
+def write_intel_hex(path, data, address):
+    # Write `data`, to be placed at `address`, as an Intel HEX file
+    def record(record_type, offset, payload):
+        fields = bytes([len(payload), offset >> 8, offset & 0xFF, record_type]) + payload
+        checksum = (-sum(fields)) & 0xFF
+        return ":" + (fields + bytes([checksum])).hex().upper() + "\n"
+
+    with open(path, "w") as f:
+        upper = None
+        start = 0
+        while start < len(data):
+            current = address + start
+            if current >> 16 != upper:
+                # Extended linear address record for the upper 16 bits
+                upper = current >> 16
+                f.write(record(0x04, 0, upper.to_bytes(2, "big")))
+            # Data records must not cross a 64 KiB boundary
+            length = min(16, 0x10000 - (current & 0xFFFF))
+            f.write(record(0x00, current & 0xFFFF, data[start : start + length]))
+            start += length
+        f.write(record(0x01, 0, b""))
@@ -0,0 +1,56 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import os
+import tempfile
+from programmers.programmer import Programmer
+from utils import process
+
+
+class OpenOCDProgrammer(Programmer):
+    name = "openocd"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.adapter = config.get("adapter", "jlink")
+        self.target_cfg = config.get("target_cfg", "target/nrf52.cfg")
+        # Command used to recover (mass erase) the target
+        self.erase_command = config.get("erase_command", "nrf52_recover")
+        self.serial_number = config.get("serial_number")
+
+    def openocd(self, phase, commands):
+        setup = [f"adapter driver {self.adapter}"]
+        if self.serial_number is not None:
+            setup.append(f"adapter serial {self.serial_number}")
+        setup += ["transport select swd", f"source [find {self.target_cfg}]", "init"]
+        return process.Command(
+            phase, ["openocd", "-c", "; ".join(setup + commands + ["exit"])]
+        )
+
+    def erase_commands(self):
+        return [self.openocd("erase_board", [self.erase_command])]
+
+    def reset_commands(self):
+        return [self.openocd("reset", ["reset"])]
+
+    def write_image_commands(self, image_path, address):
+        return [
+            self.openocd(
+                "write_image",
+                [f"program {image_path} {address:#x} verify", "reset"],
+            )
+        ]
+
+    def read_back(self, address, length):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dump_path = os.path.join(tmp_dir, "dump.bin")
+            self.run(
+                [
+                    self.openocd(
+                        "read_back", [f"dump_image {dump_path} {address:#x} {length}"]
+                    )
+                ]
+            )
+            with open(dump_path, "rb") as f:
+                return f.read()
@@ -0,0 +1,93 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+from utils import process
+
+
+# Interface to a debug probe / flashing tool, used by boards to erase, reset
+# and program their target, and to read its flash back.
+#
+# Programmers which drive an external tool describe their operations as lists
+# of `utils.process.Command`s (like `BoardHarness`), such that they can also
+# be run by the asyncio harness. Operations a tool doesn't support raise
+# NotImplementedError.
+class Programmer:
+    # Name under which the programmer is selected in the target spec:
+    name = None
+    # Whether the programmer can erase and reset the target, as required to
+    # be a board's programmer (see `get_programmer`):
+    controls_target = True
+
+    def __init__(self, config):
+        # `config` is the `programmer` section of the board's target spec
+        self.config = config
+
+    def erase(self):
+        self.run(self.erase_commands())
+
+    def reset(self):
+        self.run(self.reset_commands())
+
+    def write_image(self, image_path, address):
+        self.run(self.write_image_commands(image_path, address))
+
+    def read_back(self, address, length):
+        # Returns `length` bytes of flash starting at `address`
+        raise NotImplementedError
+
+    def erase_commands(self):
+        raise NotImplementedError
+
+    def reset_commands(self):
+        raise NotImplementedError
+
+    def write_image_commands(self, image_path, address):
+        raise NotImplementedError
+
+    def run(self, commands):
+        process.run_commands(commands)
+
+
+def load_programmer_class(programmer_name):
+    # Imported here, as the implementations depend on this module
+    from programmers.openocd import OpenOCDProgrammer
+    from programmers.tockloader import TockloaderProgrammer
+    from programmers.nrfjprog import NrfjprogProgrammer
+    from programmers.fake import FakeProgrammer
+
+    # Map programmer names to classes
+    programmer_classes = {
+        "openocd": OpenOCDProgrammer,
+        "tockloader": TockloaderProgrammer,
+        "nrfjprog": NrfjprogProgrammer,
+        "fake": FakeProgrammer,
+    }
+    if programmer_name in programmer_classes:
+        return programmer_classes[programmer_name]
+    else:
+        raise ValueError(f"Unknown programmer: {programmer_name}")
+
+
+def get_programmer(target_spec, default="openocd", serial_number=None):
+    # The target spec selects the programmer either by name, or as a dict
+    # with an `interface` key and programmer-specific options, e.g.:
+    #
+    #   programmer:
+    #     interface: openocd
+    #     adapter: jlink
+    #
+    # `serial_number` is the probe the board was found on, used unless the
+    # programmer options name one.
+    config = target_spec.get("programmer", default)
+    if isinstance(config, str):
+        config = {"interface": config}
+    if serial_number is not None:
+        config = {"serial_number": serial_number, **config}
+    programmer_class = load_programmer_class(config["interface"])
+    if not programmer_class.controls_target:
+        raise ValueError(
+            f"Programmer {config['interface']} can't erase or reset the target, "
+            + "and can't be used as a board's programmer"
+        )
+    return programmer_class(config)
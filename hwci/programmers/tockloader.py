@@ -0,0 +1,38 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+from programmers.programmer import Programmer
+from utils import process
+
+
+# Tockloader can only write images. It has no mass erase or reset operation,
+# and its `read` command only pretty-prints the flash contents. It is thus only
+# available to the programmer benchmark, not as a board's programmer.
+class TockloaderProgrammer(Programmer):
+    name = "tockloader"
+    controls_target = False
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.board = config.get("board", "nrf52dk")
+        # Channel used by tockloader to talk to the board, e.g. "openocd" or
+        # "jlink"
+        self.channel = config.get("channel", "openocd")
+        self.serial_number = config.get("serial_number")
+
+    def tockloader_args(self):
+        args = ["--board", self.board, f"--{self.channel}"]
+        if self.channel == "jlink" and self.serial_number is not None:
+            args += ["--jlink-serial-number", str(self.serial_number)]
+        return args
+
+    def write_image_commands(self, image_path, address):
+        return [
+            process.Command(
+                "write_image",
+                ["tockloader", "flash", "--address", f"{address:#x}"]
+                + self.tockloader_args()
+                + [image_path],
+            )
+        ]
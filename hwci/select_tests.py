@@ -7,10 +7,15 @@
 import os
 import argparse
 import json
+import sys
+
+# Tests tagged `benchmark` are slow and only meaningful when their metrics are
+# recorded (see core/history.py), so they aren't selected by default:
+DEFAULT_EXPRESSION = "not benchmark"
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Select all HWCI tests.")
+    parser = argparse.ArgumentParser(description="Select HWCI tests.")
     parser.add_argument(
         "--repo-path",
         type=str,
@@ -23,6 +28,14 @@ def main():
         required=True,
         help="Path to the tock-hardware-ci repository",
     )
+    parser.add_argument(
+        "-k",
+        dest="expression",
+        default=DEFAULT_EXPRESSION,
+        metavar="EXPR",
+        help="Only select tests matching this expression (see `hwci.py list`), "
+        + f'default: "{DEFAULT_EXPRESSION}"',
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -34,17 +47,17 @@ def main():
     # For now, we ignore the repo-path (tock/tock repository) since we are not analyzing changes yet
     # In the future, we will use repo-path to analyze the changes and select tests accordingly
 
-    # Path to the tests directory within the tock-hardware-ci repository
-    tests_dir = os.path.join(args.hwci_path, "tests")
-
-    # Find all .py files in the tests directory
-    test_files = []
-    for root, dirs, files in os.walk(tests_dir):
-        for file in files:
-            if file.endswith(".py"):
-                # Get the relative path to the test file
-                test_path = os.path.relpath(os.path.join(root, file), args.hwci_path)
-                test_files.append(test_path)
+    # Select tests through the registry of the tock-hardware-ci repository,
+    # which filters them by their tags:
+    sys.path.insert(0, os.path.abspath(args.hwci_path))
+    from core.registry import registry, select_tests
+
+    tests = registry.discover()
+    if len(tests) != len(registry.test_paths()):
+        # Don't silently drop tests which failed to load, e.g. for a missing
+        # dependency:
+        sys.exit("Failed to load all tests, see the warnings above")
+    test_files = [info.path for info in select_tests(tests, args.expression)]
 
     # Output the list of test files as a JSON array
     with open(args.output, "w") as f:
@@ -6,8 +6,12 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.log_buffer import samples_log
+from utils.tracing import span
 
 
+@test_info(tags=["gpio", "led"], pins=["P0.13", "P0.14"], expected_duration=5)
 class BlinkTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["blink"])
@@ -28,24 +32,25 @@ class BlinkTest(OneshotTest):
         # Since the LEDs are active low, when the pin is low, the LED is on
         logging.info("Starting blink test")
         previous_states = {}
-        for _ in range(10):  # Read the LED states multiple times
-            current_states = {}
-            for name, pin in led_pins.items():
-                value = pin.read()
-                led_on = value == 0  # Active low
-                current_states[name] = led_on
-                logging.info(f"{name} is {'ON' if led_on else 'OFF'}")
-
-            # Compare with previous states to check for changes
-            if previous_states:
-                for name in led_pins.keys():
-                    if current_states[name] != previous_states[name]:
-                        logging.info(
-                            f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
-                        )
-            previous_states = current_states
-
-            time.sleep(0.5)  # Wait before next read
+        with span("led poll", cat="gpio"):
+            for _ in range(10):  # Read the LED states multiple times
+                current_states = {}
+                for name, pin in led_pins.items():
+                    value = pin.read()
+                    led_on = value == 0  # Active low
+                    current_states[name] = led_on
+                    samples_log.debug("%s is %s", name, "ON" if led_on else "OFF")
+
+                # Compare with previous states to check for changes
+                if previous_states:
+                    for name in led_pins.keys():
+                        if current_states[name] != previous_states[name]:
+                            logging.info(
+                                f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
+                            )
+                previous_states = current_states
+
+                time.sleep(0.5)  # Wait before next read
 
         logging.info("Blink test completed successfully")
 
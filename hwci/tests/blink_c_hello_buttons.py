@@ -5,7 +5,12 @@ import logging
 import time
 import re
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.log_buffer import samples_log
+from utils.tracing import span
 
+
+@test_info(tags=["gpio", "led", "button", "console"], pins=["P0.11", "P0.12", "P0.13", "P0.14"], expected_duration=15)
 class BlinkCHelloButtonsTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["blink", "c_hello", "buttons"])
@@ -47,31 +52,32 @@ class BlinkCHelloButtonsTest(OneshotTest):
             }
             previous_states = {}
             button_state = 0
-            for _ in range(50):  # Read the LED states multiple times
-                # Optionally toggle the button:
-                if toggle_button is not None:
-                    button_pins[toggle_button].write(button_state)
-                    button_state = (button_state + 1) % 2
-
-                # Read LED values:
-                current_states = {}
-                for name, pin in led_pins.items():
-                    value = pin.read()
-                    led_on = value == 0  # Active low
-                    current_states[name] = led_on
-                    logging.info(f"{name} is {'ON' if led_on else 'OFF'}")
-
-                # Compare with previous states to check for changes
-                if previous_states:
-                    for name in led_pins.keys():
-                        if current_states[name] != previous_states[name]:
-                            logging.info(
-                                f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
-                            )
-                            toggle_counts[name] += 1
-                previous_states = current_states
-
-                time.sleep(0.05)  # Wait before next read
+            with span("led poll", cat="gpio"):
+                for _ in range(50):  # Read the LED states multiple times
+                    # Optionally toggle the button:
+                    if toggle_button is not None:
+                        button_pins[toggle_button].write(button_state)
+                        button_state = (button_state + 1) % 2
+
+                    # Read LED values:
+                    current_states = {}
+                    for name, pin in led_pins.items():
+                        value = pin.read()
+                        led_on = value == 0  # Active low
+                        current_states[name] = led_on
+                        samples_log.debug("%s is %s", name, "ON" if led_on else "OFF")
+
+                    # Compare with previous states to check for changes
+                    if previous_states:
+                        for name in led_pins.keys():
+                            if current_states[name] != previous_states[name]:
+                                logging.info(
+                                    f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
+                                )
+                                toggle_counts[name] += 1
+                    previous_states = current_states
+
+                    time.sleep(0.05)  # Wait before next read
 
             return toggle_counts
 
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import logging
+import statistics
+from core.board_harness import BOOT_MILESTONES
+from core.test_harness import LOWER_IS_BETTER, test_info
+from utils.test_helpers import OneshotTest
+
+# Number of boots measured:
+BOOTS = 20
+
+
+# Benchmark of the kernel's boot time, from a reset to the process console
+# prompt. Publishes the distribution of each boot milestone over a number of
+# resets as metrics, such that boot time is tracked per kernel commit in the
+# history database.
+@test_info(tags=["benchmark", "boot", "process_console"], expected_duration=60)
+class BootTimeTest(OneshotTest):
+    def __init__(self):
+        super().__init__(apps=["c_hello"])
+
+    def oneshot_test(self, board):
+        samples = {milestone: [] for milestone in BOOT_MILESTONES}
+        incomplete = 0
+        for boot in range(BOOTS):
+            milestones = board.measure_boot()
+            logging.info(
+                f"Boot {boot + 1}/{BOOTS}: "
+                + ", ".join(
+                    f"{milestone} {'-' if t is None else f'{t * 1000:.1f}ms'}"
+                    for milestone, t in milestones.items()
+                )
+            )
+            if milestones["prompt"] is None:
+                incomplete += 1
+            for milestone, t in milestones.items():
+                if t is not None:
+                    samples[milestone].append(t)
+
+        self.publish_metric("incomplete_boots", incomplete, better=LOWER_IS_BETTER)
+        for milestone, values in samples.items():
+            if not values:
+                continue
+            summary = {
+                "median_s": statistics.median(values),
+                "min_s": min(values),
+                "max_s": max(values),
+            }
+            if len(values) > 1:
+                summary["p90_s"] = statistics.quantiles(values, n=10)[-1]
+            for name, value in summary.items():
+                self.publish_metric(f"{milestone}.{name}", value, "s", LOWER_IS_BETTER)
+            logging.info(
+                f"{milestone}: median {statistics.median(values) * 1000:.1f}ms, "
+                + f"min {min(values) * 1000:.1f}ms, max {max(values) * 1000:.1f}ms "
+                + f"over {len(values)} boots"
+            )
+
+        if not samples["prompt"]:
+            raise Exception("The process console prompt never appeared after a reset")
+        if incomplete > BOOTS // 10:
+            raise Exception(f"{incomplete} of {BOOTS} boots didn't reach the prompt")
+
+
+test = BootTimeTest()
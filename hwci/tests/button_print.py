@@ -7,8 +7,10 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
 
 
+@test_info(tags=["gpio", "button", "console"], pins=["P0.11"], expected_duration=5)
 class ButtonPressTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/button_print"])
@@ -6,8 +6,10 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
 
 
+@test_info(tags=["gpio", "button", "led"], pins=["P0.11", "P0.12", "P0.13", "P0.14"], expected_duration=3)
 class ButtonsTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["buttons"])
@@ -3,5 +3,8 @@
 # Copyright Tock Contributors 2024.
 
 from utils.test_helpers import WaitForConsoleMessageTest
+from core.test_harness import test_info
 
-test = WaitForConsoleMessageTest(["c_hello"], "Hello World!")
+test = test_info(tags=["console"], expected_duration=2)(
+    WaitForConsoleMessageTest(["c_hello"], "Hello World!")
+)
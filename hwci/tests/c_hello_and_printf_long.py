@@ -5,7 +5,9 @@ import logging
 import time
 import re
 from utils.test_helpers import AnalyzeConsoleTest
+from core.test_harness import test_info
 
+@test_info(tags=["console"], expected_duration=5)
 class CHelloAndPrintfLong(AnalyzeConsoleTest):
     def __init__(self):
         super().__init__(apps=[
@@ -0,0 +1,127 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import difflib
+import logging
+import re
+import statistics
+import time
+from core.test_harness import LOWER_IS_BETTER, test_info
+from utils.serial_reader import TimestampedSerialReader
+from utils.test_helpers import OneshotTest
+
+# Lines printed by tests/printf_long on every boot:
+PAYLOAD_LINES = [
+    b"Hi welcome to Tock. This test makes sure that a greater than 64 byte message can be printed.\n",
+    b"And a short message.\n",
+]
+PAYLOAD = b"".join(PAYLOAD_LINES)
+
+# Number of boots captured:
+BOOTS = 20
+
+# Time to keep capturing after the end of the payload, or after a boot
+# without it, to catch late or garbled output:
+QUIET_PERIOD_S = 0.5
+BOOT_TIMEOUT_S = 5
+
+
+# Counts the payload bytes which weren't received (dropped), and the bytes
+# received in place of or in between payload bytes (garbled). Output before
+# and after the payload (e.g., the kernel banner) is ignored. Returns the
+# number of dropped and garbled bytes.
+def compare_payload(expected, received):
+    matcher = difflib.SequenceMatcher(None, expected, received, autojunk=False)
+    opcodes = matcher.get_opcodes()
+    equal = [i for i, opcode in enumerate(opcodes) if opcode[0] == "equal"]
+    if not equal:
+        return len(expected), 0
+
+    dropped = 0
+    garbled = 0
+    for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag == "equal":
+            continue
+        if index < equal[0] or index > equal[-1]:
+            # Before or after the received payload: only count what's
+            # missing from the payload
+            dropped += i2 - i1
+        elif tag == "delete":
+            dropped += i2 - i1
+        elif tag == "insert":
+            garbled += j2 - j1
+        else:  # replace
+            garbled += j2 - j1
+            dropped += max(i2 - i1 - (j2 - j1), 0)
+    return dropped, garbled
+
+
+# Benchmark of the console's output path, from the output of the printf_long
+# app over a number of boots. Each boot's output is captured with arrival
+# timestamps and compared against the known payload, to count dropped and
+# garbled bytes and to measure the gaps between the payload's lines. Times are
+# measured on the host, and thus include the latency of the debug probe's USB
+# serial port.
+#
+# The payload is only ~110 bytes, which the probe's USB CDC bridge delivers in
+# a few chunks, each held back by its latency timer. Byte rates and burst
+# sizes derived from their arrival would measure that timer rather than the
+# console, so none are published.
+@test_info(tags=["benchmark", "console"], expected_duration=60)
+class ConsoleThroughputTest(OneshotTest):
+    def __init__(self):
+        super().__init__(apps=["tests/printf_long"])
+
+    def oneshot_test(self, board):
+        line_gaps = []
+        dropped = 0
+        garbled = 0
+        incomplete = 0
+
+        for boot in range(BOOTS):
+            board.serial.flush_buffer()
+            with TimestampedSerialReader(board.serial) as reader:
+                board.reset()
+                if reader.wait_for(re.escape(PAYLOAD_LINES[-1]), BOOT_TIMEOUT_S) is None:
+                    incomplete += 1
+                time.sleep(QUIET_PERIOD_S)
+            data = bytes(reader.data)
+
+            boot_dropped, boot_garbled = compare_payload(PAYLOAD, data)
+            dropped += boot_dropped
+            garbled += boot_garbled
+            if boot_dropped or boot_garbled:
+                logging.warning(
+                    f"Boot {boot + 1}: {boot_dropped} dropped, {boot_garbled} "
+                    + f"garbled bytes in {data!r}"
+                )
+
+            line_ends = []
+            for line in PAYLOAD_LINES:
+                position = data.find(line)
+                if position >= 0:
+                    line_ends.append(reader.arrival_time(position + len(line) - 1))
+            if len(line_ends) == len(PAYLOAD_LINES):
+                line_gaps += [t2 - t1 for t1, t2 in zip(line_ends, line_ends[1:])]
+
+        self.publish_metric("dropped_bytes", dropped, better=LOWER_IS_BETTER)
+        self.publish_metric("garbled_bytes", garbled, better=LOWER_IS_BETTER)
+        self.publish_metric("incomplete_boots", incomplete, better=LOWER_IS_BETTER)
+        if line_gaps:
+            self.publish_metric(
+                "line_gap_s.median", statistics.median(line_gaps), "s", LOWER_IS_BETTER
+            )
+            self.publish_metric("line_gap_s.max", max(line_gaps), "s", LOWER_IS_BETTER)
+
+        logging.info(
+            f"Console output over {BOOTS} boots: "
+            + f"{dropped} dropped, {garbled} garbled bytes, "
+            + f"{incomplete} boots without the full payload"
+        )
+
+        if incomplete == BOOTS:
+            raise Exception("printf_long's output was never received")
+
+
+test = ConsoleThroughputTest()
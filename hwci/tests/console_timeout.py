@@ -5,8 +5,10 @@ import logging
 import time
 import re
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
 
 
+@test_info(tags=["console"], expected_duration=10)
 class ConsoleTimeoutTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/console/console_timeout"])
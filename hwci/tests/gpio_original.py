@@ -4,8 +4,12 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.log_buffer import samples_log
+from utils.tracing import span
 
 
+@test_info(tags=["gpio"], pins=["P1.01"], expected_duration=10)
 class GpioOriginalTest(OneshotTest):
     def __init__(self):
         # Specify the path to the app relative to the libtock-c examples directory
@@ -34,33 +38,41 @@ class GpioOriginalTest(OneshotTest):
 
         last_toggle_time = None
         toggle_intervals = []
-
-        while time.time() < end_time:
-            value = gpio_pin.read()
-            # GPIO is active high in this context
-            gpio_on = value == 1
-            logging.debug(f"GPIO pin value: {value}")
-
-            if previous_state is not None and gpio_on != previous_state:
-                current_time = time.time()
-                elapsed_time = current_time - start_time
-                logging.info(
-                    f"GPIO pin toggled to {gpio_on} at {elapsed_time:.2f} seconds"
-                )
-                if last_toggle_time is not None:
-                    interval = current_time - last_toggle_time
-                    toggle_intervals.append(interval)
-                    logging.info(f"Time since last toggle: {interval:.2f} seconds")
-                last_toggle_time = current_time
-            previous_state = gpio_on
-
-            time.sleep(0.1)  # Sample every 0.1 seconds
+        toggles = 0
+
+        with span("gpio poll", cat="gpio"):
+            while time.time() < end_time:
+                value = gpio_pin.read()
+                # GPIO is active high in this context
+                gpio_on = value == 1
+                samples_log.debug("GPIO pin value: %s", value)
+
+                if previous_state is not None and gpio_on != previous_state:
+                    current_time = time.time()
+                    elapsed_time = current_time - start_time
+                    toggles += 1
+                    logging.info(
+                        f"GPIO pin toggled to {gpio_on} at {elapsed_time:.2f} seconds"
+                    )
+                    if last_toggle_time is not None:
+                        interval = current_time - last_toggle_time
+                        toggle_intervals.append(interval)
+                        logging.info(f"Time since last toggle: {interval:.2f} seconds")
+                    last_toggle_time = current_time
+                previous_state = gpio_on
+
+                time.sleep(0.1)  # Sample every 0.1 seconds
+
+        self.publish_metric("toggles", toggles)
 
         # Analyze toggle intervals
         if len(toggle_intervals) == 0:
             raise Exception("No toggles detected on GPIO pin during test duration")
         else:
             average_interval = sum(toggle_intervals) / len(toggle_intervals)
+            # The pin is only sampled every 0.1s, too coarse to measure the
+            # intervals' jitter, so only their mean is published:
+            self.publish_metric("mean_interval_s", average_interval, "s")
             expected_interval = 1.0  # seconds, as per app's behavior
             tolerance = 0.5  # seconds
             if abs(average_interval - expected_interval) > tolerance:
@@ -3,17 +3,20 @@
 # Copyright Tock Contributors 2024.
 
 from utils.test_helpers import WaitForConsoleMessageTest
+from core.test_harness import test_info
 
-test = WaitForConsoleMessageTest(
-    # Apps:
-    [
-        "rot13_client",
-        {
-            "name": "rot13_service",
-            "path": "rot13_service",
-            "tab_file": "build/org.tockos.examples.rot13.tab",
-        },
-    ],
-    # Expected console output:
-    "12: Hello World!\n12: Uryyb Jbeyq!\n12: Hello World!\n12: Uryyb Jbeyq!\n12: Hello World!",
+test = test_info(tags=["console", "ipc"], expected_duration=2)(
+    WaitForConsoleMessageTest(
+        # Apps:
+        [
+            "rot13_client",
+            {
+                "name": "rot13_service",
+                "path": "rot13_service",
+                "tab_file": "build/org.tockos.examples.rot13.tab",
+            },
+        ],
+        # Expected console output:
+        "12: Hello World!\n12: Uryyb Jbeyq!\n12: Hello World!\n12: Uryyb Jbeyq!\n12: Hello World!",
+    )
 )
@@ -3,5 +3,8 @@
 # Copyright Tock Contributors 2024.
 
 from utils.test_helpers import WaitForConsoleMessageTest
+from core.test_harness import test_info
 
-test = WaitForConsoleMessageTest(["lua-hello"], "Hello from Lua!")
+test = test_info(tags=["console"], expected_duration=2)(
+    WaitForConsoleMessageTest(["lua-hello"], "Hello from Lua!")
+)
@@ -2,6 +2,9 @@
 # SPDX-License-Identifier: Apache-2.0 OR MIT
 
 from utils.test_helpers import WaitForConsoleMessageTest
+from core.test_harness import test_info
 
 # This test checks that malloc_test02 runs successfully and outputs the expected message.
-test = WaitForConsoleMessageTest(["tests/malloc_test02"], "malloc02: success")
+test = test_info(tags=["console", "memory"], expected_duration=2)(
+    WaitForConsoleMessageTest(["tests/malloc_test02"], "malloc02: success")
+)
@@ -4,8 +4,10 @@
 import logging
 from utils.test_helpers import OneshotTest
 import time
+from core.test_harness import test_info
 
 
+@test_info(tags=["mpu", "button", "console"], pins=["P0.11"], expected_duration=30)
 class MpuWalkRegionTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/mpu/mpu_walk_region"])
@@ -4,8 +4,11 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.tracing import span
 
 
+@test_info(tags=["gpio", "led", "alarm"], pins=["P0.13", "P0.14"], expected_duration=7)
 class MultiAlarmTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/alarms/multi_alarm_test"])
@@ -51,27 +54,28 @@ class MultiAlarmTest(OneshotTest):
 
         first_event_time = None
 
-        while time.time() < end_time:
-            current_time = time.time()
-            for led_name, pin in led_pins.items():
-                value = pin.read()
-                led_on = value == 0  # Active low
-                if led_states[led_name] is None:
-                    led_states[led_name] = led_on
-                elif led_on != led_states[led_name]:
-                    led_states[led_name] = led_on
-                    event_time = current_time
-                    logging.info(
-                        f"{led_name} changed state to {'ON' if led_on else 'OFF'} at {event_time - start_time:.2f}s"
-                    )
-                    observed_events[led_name].append(
-                        (event_time - start_time, "on" if led_on else "off")
-                    )
-                    if first_event_time is None:
-                        first_event_time = (
-                            event_time - start_time
-                        )  # Record the time of the first event
-            time.sleep(0.05)  # Sleep briefly to reduce CPU usage
+        with span("led poll", cat="gpio"):
+            while time.time() < end_time:
+                current_time = time.time()
+                for led_name, pin in led_pins.items():
+                    value = pin.read()
+                    led_on = value == 0  # Active low
+                    if led_states[led_name] is None:
+                        led_states[led_name] = led_on
+                    elif led_on != led_states[led_name]:
+                        led_states[led_name] = led_on
+                        event_time = current_time
+                        logging.info(
+                            f"{led_name} changed state to {'ON' if led_on else 'OFF'} at {event_time - start_time:.2f}s"
+                        )
+                        observed_events[led_name].append(
+                            (event_time - start_time, "on" if led_on else "off")
+                        )
+                        if first_event_time is None:
+                            first_event_time = (
+                                event_time - start_time
+                            )  # Record the time of the first event
+                time.sleep(0.05)  # Sleep briefly to reduce CPU usage
 
         # If no events were observed, fail the test
         if all(len(events) == 0 for events in observed_events.values()):
@@ -93,6 +97,12 @@ class MultiAlarmTest(OneshotTest):
             average_interval = sum(intervals) / len(intervals)
             expected_interval = interval
 
+            # Published before checking the tolerance, such that the results
+            # show how far off a failing run was. The LEDs are only sampled
+            # every 50ms, too coarse to measure the intervals' jitter.
+            self.publish_metric(f"{led_name}.mean_interval_s", average_interval, "s")
+            self.publish_metric(f"{led_name}.toggles", len(events))
+
             # Allow for a tolerance in the interval calculation
             tolerance = 0.5  # seconds
             if abs(average_interval - expected_interval) > tolerance:
@@ -5,7 +5,9 @@ import logging
 import time
 import re
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
 
+@test_info(tags=["scheduler", "process_console"], expected_duration=5)
 class SchedulerStopStartWhileoneTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/whileone"])
@@ -0,0 +1,102 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import logging
+import time
+from core.test_harness import LOWER_IS_BETTER, test_info
+from utils.process_console import LIST_HEADER, PROMPT, parse_process_list
+from utils.serial_reader import TimestampedSerialReader
+from utils.test_helpers import OneshotTest
+
+# Number of `list` samples, and the time between the start of two samples:
+SAMPLES = 10
+SAMPLE_INTERVAL_S = 2.0
+
+
+# Benchmark of the scheduler's throughput, from the counters of the process
+# console's `list` command. `whileone` never yields, such that it uses up
+# every timeslice it's given (counted in `Quanta`), while `blink` mostly
+# sleeps in syscalls.
+#
+# Each sample is timestamped by the arrival of the `list` header, which the
+# console prints as soon as it processes the command. Per-process rates of
+# quanta, syscalls and restarts are published as metrics, as are the total
+# syscall rate and the context switch rate. Each syscall and each expired
+# quantum is one switch from a process to the kernel, so the context switch
+# rate is their sum.
+@test_info(tags=["benchmark", "scheduler", "process_console"], expected_duration=30)
+class SchedulerThroughputTest(OneshotTest):
+    def __init__(self):
+        super().__init__(apps=["tests/whileone", "blink"])
+
+    def oneshot_test(self, board):
+        serial = board.serial
+
+        # Wait for the process console to be up:
+        assert serial.expect("tock") is not None
+
+        samples = []
+        with TimestampedSerialReader(serial) as reader:
+            for sample in range(SAMPLES):
+                start_time = time.time()
+                serial.write(b"list\r\n")
+                timestamp, _header = reader.expect(LIST_HEADER)
+                _prompt_time, rows = reader.expect(rb"(?s)(.*?)" + PROMPT)
+                if timestamp is None or rows is None:
+                    raise Exception(f"No process list in sample {sample + 1}")
+                processes = {
+                    process.name: process
+                    for process in parse_process_list(rows.group(1).decode("utf-8"))
+                }
+                logging.info(
+                    f"Sample {sample + 1}/{SAMPLES}: "
+                    + ", ".join(
+                        f"{p.name} {p.quanta} quanta {p.syscalls} syscalls ({p.state})"
+                        for p in processes.values()
+                    )
+                )
+                samples.append((timestamp, processes))
+                time.sleep(max(SAMPLE_INTERVAL_S - (time.time() - start_time), 0))
+
+        (first_time, first), (last_time, last) = samples[0], samples[-1]
+        elapsed = last_time - first_time
+        for name in ["whileone", "blink"]:
+            assert name in first and name in last, f"{name} is not running"
+
+        total_quanta = 0
+        total_syscalls = 0
+        for name, process in last.items():
+            if name not in first:
+                continue
+            quanta = process.quanta - first[name].quanta
+            syscalls = process.syscalls - first[name].syscalls
+            restarts = process.restarts - first[name].restarts
+            total_quanta += quanta
+            total_syscalls += syscalls
+            self.publish_metric(f"{name}.quanta_per_s", quanta / elapsed, "1/s")
+            self.publish_metric(f"{name}.syscalls_per_s", syscalls / elapsed, "1/s")
+            self.publish_metric(
+                f"{name}.restarts_per_s", restarts / elapsed, "1/s", LOWER_IS_BETTER
+            )
+            logging.info(
+                f"{name}: {quanta / elapsed:.1f} quanta/s, "
+                + f"{syscalls / elapsed:.1f} syscalls/s, {restarts} restarts"
+            )
+
+        self.publish_metric("syscalls_per_s", total_syscalls / elapsed, "1/s")
+        self.publish_metric(
+            "context_switches_per_s", (total_quanta + total_syscalls) / elapsed, "1/s"
+        )
+        logging.info(
+            f"{total_syscalls / elapsed:.1f} syscalls/s, "
+            + f"{(total_quanta + total_syscalls) / elapsed:.1f} context switches/s "
+            + f"over {elapsed:.1f}s"
+        )
+
+        # whileone never yields, so it must have been preempted:
+        assert last["whileone"].quanta > first["whileone"].quanta, \
+            "whileone was not preempted during the benchmark"
+
+
+test = SchedulerThroughputTest()
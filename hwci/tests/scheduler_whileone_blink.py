@@ -5,7 +5,12 @@ import logging
 import time
 import re
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.log_buffer import samples_log
+from utils.tracing import span
 
+
+@test_info(tags=["scheduler", "process_console", "gpio", "led"], pins=["P0.13", "P0.14"], expected_duration=10)
 class SchedulerWhileoneBlinkTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/whileone", "blink"])
@@ -31,25 +36,26 @@ class SchedulerWhileoneBlinkTest(OneshotTest):
             for led in led_pins.keys()
         }
         previous_states = {}
-        for _ in range(50):  # Read the LED states multiple times
-            current_states = {}
-            for name, pin in led_pins.items():
-                value = pin.read()
-                led_on = value == 0  # Active low
-                current_states[name] = led_on
-                logging.info(f"{name} is {'ON' if led_on else 'OFF'}")
+        with span("led poll", cat="gpio"):
+            for _ in range(50):  # Read the LED states multiple times
+                current_states = {}
+                for name, pin in led_pins.items():
+                    value = pin.read()
+                    led_on = value == 0  # Active low
+                    current_states[name] = led_on
+                    samples_log.debug("%s is %s", name, "ON" if led_on else "OFF")
 
-            # Compare with previous states to check for changes
-            if previous_states:
-                for name in led_pins.keys():
-                    if current_states[name] != previous_states[name]:
-                        logging.info(
-                            f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
-                        )
-                        toggle_counts[name] += 1
-            previous_states = current_states
+                # Compare with previous states to check for changes
+                if previous_states:
+                    for name in led_pins.keys():
+                        if current_states[name] != previous_states[name]:
+                            logging.info(
+                                f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
+                            )
+                            toggle_counts[name] += 1
+                previous_states = current_states
 
-            time.sleep(0.1)  # Wait before next read
+                time.sleep(0.1)  # Wait before next read
 
         # Make sure that each LED toggled at least twice, and the frequency of
         # toggles decreases with the LED index:
@@ -4,8 +4,10 @@
 import logging
 import time
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
 
 
+@test_info(tags=["sensors", "console"], expected_duration=30)
 class SensorsTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=["sensors"])
@@ -4,8 +4,10 @@
 import logging
 from utils.test_helpers import OneshotTest
 import re
+from core.test_harness import test_info
 
 
+@test_info(tags=["console", "memory"], expected_duration=2)
 class StackSizeTest02(OneshotTest):
     def __init__(self):
         super().__init__(apps=["tests/stack_size_test02"])
@@ -5,7 +5,12 @@ import logging
 import time
 import re
 from utils.test_helpers import OneshotTest
+from core.test_harness import test_info
+from utils.log_buffer import samples_log
+from utils.tracing import span
 
+
+@test_info(tags=["ipc", "gpio", "led"], pins=["P0.13", "P0.14"], expected_duration=120)
 class TutorialIpcLedRngTest(OneshotTest):
     def __init__(self):
         super().__init__(apps=[
@@ -47,36 +52,37 @@ class TutorialIpcLedRngTest(OneshotTest):
             for led in led_pins.keys()
         }
         previous_states = {}
-        for _ in range(120):
-            current_states = {}
-            for name, pin in led_pins.items():
-                value = pin.read()
-                led_on = value == 0  # Active low
-                current_states[name] = led_on
-                logging.info(f"{name} is {'ON' if led_on else 'OFF'}")
+        with span("led poll", cat="gpio"):
+            for _ in range(120):
+                current_states = {}
+                for name, pin in led_pins.items():
+                    value = pin.read()
+                    led_on = value == 0  # Active low
+                    current_states[name] = led_on
+                    samples_log.debug("%s is %s", name, "ON" if led_on else "OFF")
 
-            # Compare with previous states to check for changes
-            if previous_states:
-                for name in led_pins.keys():
-                    if current_states[name] != previous_states[name]:
-                        logging.info(
-                            f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
-                        )
-                        toggle_counts[name] += 1
-            previous_states = current_states
+                # Compare with previous states to check for changes
+                if previous_states:
+                    for name in led_pins.keys():
+                        if current_states[name] != previous_states[name]:
+                            logging.info(
+                                f"{name} changed state to {'ON' if current_states[name] else 'OFF'}"
+                            )
+                            toggle_counts[name] += 1
+                previous_states = current_states
 
-            # If all LEDs have toggled at least once, the test passed:
-            all_toggled = True
-            for led, toggle_count in toggle_counts.items():
-                if toggle_count == 0:
-                    time.sleep(1)  # Wait before next read
-                    all_toggled = False
-                    break
+                # If all LEDs have toggled at least once, the test passed:
+                all_toggled = True
+                for led, toggle_count in toggle_counts.items():
+                    if toggle_count == 0:
+                        time.sleep(1)  # Wait before next read
+                        all_toggled = False
+                        break
 
-            if all_toggled:
-                # Test passed!
-                logging.info("All LEDs toggled at least once, success!")
-                return None
+                if all_toggled:
+                    # Test passed!
+                    logging.info("All LEDs toggled at least once, success!")
+                    return None
 
         raise AssertionError(f"Timed out waiting for all LEDs to toggle at least once!")
 
@@ -3,3 +3,4 @@
 # Copyright Tock Contributors 2024.
 
 from .serial_port import SerialPort, MockSerialPort
+from .tracing import tracer, span, traced
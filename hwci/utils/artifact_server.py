@@ -0,0 +1,165 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Minimal HTTP server for the artifact store (see `utils/artifact_store.py`),
+# serving artifacts from a directory. Hosts use it by setting
+# HWCI_ARTIFACT_STORE=http://<host>:<port>. Run as:
+#
+#     python3 utils/artifact_server.py --directory /srv/hwci-artifacts
+#
+# Stored kernels and apps are flashed onto boards as they are, so uploads
+# must be authorized by a shared token, set through HWCI_ARTIFACT_TOKEN on the
+# server and all hosts uploading to it. Without a token, the server only
+# serves existing artifacts. Uploads never replace an existing artifact. The
+# server only listens on localhost, unless given another --host.
+
+import argparse
+import hmac
+import logging
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Ensure that imported modules can find the top-level hwci modules
+# (appends the hwci root to the PYTHONPATH):
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.artifact_store import ARTIFACT_NAME, TOKEN_ENV, write_atomically
+
+# Largest accepted upload, kernels and apps are far smaller:
+MAX_ARTIFACT_SIZE = 64 * 1024 * 1024
+
+
+class ArtifactRequestHandler(BaseHTTPRequestHandler):
+    # Set by `serve`:
+    directory = None
+    token = None
+
+    def artifact_path(self):
+        name = self.path.lstrip("/")
+        if not ARTIFACT_NAME.match(name):
+            self.send_error(400, "Invalid artifact name")
+            return None
+        return os.path.join(self.directory, name)
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        path = self.artifact_path()
+        if path is None:
+            return
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.send_error(404, "Artifact not found")
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(f.read())
+
+    def upload_error(self):
+        # Returns the HTTP error to reject an upload with, if any
+        if self.token is None:
+            return 403, "Uploads are disabled"
+        authorization = self.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(authorization, f"Bearer {self.token}".encode()):
+            return 401, "Invalid upload token"
+        if not ARTIFACT_NAME.match(self.path.lstrip("/")):
+            return 400, "Invalid artifact name"
+        return None
+
+    def do_PUT(self):
+        try:
+            length = int(self.headers["Content-Length"])
+        except (KeyError, ValueError):
+            self.send_error(411, "Content-Length required")
+            return
+        if not 0 < length <= MAX_ARTIFACT_SIZE:
+            self.send_error(413, "Invalid artifact size")
+            return
+        body = LimitedReader(self.rfile, length)
+
+        # Rejected uploads are still read, such that the client receives the
+        # error rather than a reset connection:
+        error = self.upload_error()
+        if error is not None:
+            body.read()
+            self.send_error(*error)
+            return
+
+        # Keys are derived from the sources an artifact is built from, not its
+        # contents, so an existing artifact is never replaced:
+        path = os.path.join(self.directory, self.path.lstrip("/"))
+        try:
+            write_atomically(path, body, overwrite=False)
+        except FileExistsError:
+            self.send_error(409, "Artifact exists")
+            return
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+# Reads at most `length` bytes from a stream, as the request body isn't
+# terminated otherwise
+class LimitedReader:
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def serve(directory, host, port, token=None):
+    os.makedirs(directory, exist_ok=True)
+    ArtifactRequestHandler.directory = directory
+    ArtifactRequestHandler.token = token or None
+    server = ThreadingHTTPServer((host, port), ArtifactRequestHandler)
+    host, port = server.server_address[:2]
+    logging.info(
+        f"Serving artifacts from {directory} on http://{host}:{port}"
+        + ("" if token else " (read-only, no upload token set)")
+    )
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the hwci artifact store")
+    parser.add_argument(
+        "--directory", required=True, help="Directory to store artifacts in"
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on, e.g. 0.0.0.0 to serve other hosts",
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    server = serve(args.directory, args.host, args.port, os.environ.get(TOKEN_ENV))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import urllib.error
+import urllib.request
+
+# Default location of the local artifact store, can be overridden through the
+# HWCI_BUILD_CACHE environment variable:
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".build-cache"
+)
+
+# Remote store shared by all CI hosts (an HTTP URL, or a directory such as a
+# network mount), if any:
+REMOTE_STORE_ENV = "HWCI_ARTIFACT_STORE"
+
+# Token authorizing uploads to an HTTP store, see `utils/artifact_server.py`:
+TOKEN_ENV = "HWCI_ARTIFACT_TOKEN"
+
+HTTP_TIMEOUT = 60
+
+# Artifact names: a cache key, plus an optional file suffix
+ARTIFACT_NAME = re.compile(r"^[0-9a-f]{64}(\.[A-Za-z0-9]+)?$")
+
+
+def git(repo_path, *args):
+    return subprocess.run(
+        ["git", "-C", repo_path, *args], capture_output=True, check=True
+    ).stdout
+
+
+def tree_state(repo_path):
+    # Identify the state of a git checkout: its HEAD commit, plus a hash over
+    # all uncommitted changes (including untracked files and changes within
+    # submodules), such that a modified tree never hits the cache entry of a
+    # clean one.
+    commit = git(repo_path, "rev-parse", "HEAD").decode().strip()
+
+    dirty = hashlib.sha256()
+    dirty.update(git(repo_path, "diff", "HEAD", "--binary", "--submodule=diff"))
+    untracked = git(repo_path, "ls-files", "--others", "--exclude-standard", "-z")
+    for path in sorted(filter(None, untracked.split(b"\0"))):
+        dirty.update(path + b"\0")
+        try:
+            with open(os.path.join(repo_path, os.fsdecode(path)), "rb") as f:
+                dirty.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            # E.g., removed while we were hashing
+            pass
+    return commit, dirty.hexdigest()
+
+
+def cache_key(*parts):
+    # Content hash of everything an artifact is built from
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def write_atomically(path, source, overwrite=True):
+    # Copy the file object `source` to `path`, such that an interrupted write
+    # never leaves a truncated artifact behind. Without `overwrite`, raises
+    # FileExistsError if `path` exists, even if it's created concurrently.
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(source, f)
+        if overwrite:
+            os.replace(tmp_path, path)
+        else:
+            os.link(tmp_path, path)
+            os.unlink(tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Artifact store backed by a local directory (or network mount).
+class LocalArtifactStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, name, dest_path):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return False
+        if os.path.abspath(path) != os.path.abspath(dest_path):
+            with open(path, "rb") as source:
+                write_atomically(dest_path, source)
+        return True
+
+    def put(self, name, source_path):
+        with open(source_path, "rb") as source:
+            write_atomically(self.path(name), source)
+
+    def __str__(self):
+        return self.directory
+
+
+# Artifact store served over HTTP, see `utils/artifact_server.py`. Artifacts
+# are fetched with GET and uploaded with PUT requests to `<base_url>/<name>`,
+# the latter authorized by `token`.
+class HttpArtifactStore:
+    def __init__(self, base_url, token=None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+
+    def url(self, name):
+        return f"{self.base_url}/{name}"
+
+    def get(self, name, dest_path):
+        try:
+            with urllib.request.urlopen(self.url(name), timeout=HTTP_TIMEOUT) as response:
+                write_atomically(dest_path, response)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+        return True
+
+    def put(self, name, source_path):
+        headers = {"Content-Type": "application/octet-stream"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        with open(source_path, "rb") as f:
+            request = urllib.request.Request(
+                self.url(name), data=f.read(), method="PUT", headers=headers
+            )
+        try:
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT):
+                pass
+        except urllib.error.HTTPError as e:
+            # The server never overwrites an artifact, another host already
+            # uploaded this one:
+            if e.code != 409:
+                raise
+
+    def __str__(self):
+        return self.base_url
+
+
+# Content-addressed store for build outputs (kernel binaries, .tab files),
+# keyed by a hash of everything they were built from (see `tree_state` and
+# `cache_key`).
+#
+# Artifacts are always kept in a local directory, from which they are used
+# directly. If a remote store is configured, artifacts missing locally are
+# fetched from it, and newly built ones are uploaded to it, such that a fleet
+# of hosts builds each artifact only once. The remote store is best-effort:
+# if it's unreachable, we simply build locally.
+class ArtifactStore:
+    def __init__(self, local, remote=None):
+        self.local = local
+        self.remote = remote
+
+    def fetch(self, key, suffix=""):
+        # Returns the local path of an artifact, or None if it isn't in any
+        # store and needs to be built
+        name = key + suffix
+        path = self.local.path(name)
+        if os.path.exists(path):
+            return path
+        if self.remote is not None:
+            try:
+                if self.remote.get(name, path):
+                    logging.info(f"Fetched artifact {name} from {self.remote}")
+                    return path
+            except (OSError, urllib.error.URLError) as e:
+                logging.warning(f"Failed to fetch artifact {name} from {self.remote}: {e}")
+        return None
+
+    def store(self, key, source_path, suffix=""):
+        # Add a newly built artifact, returns its local path
+        name = key + suffix
+        self.local.put(name, source_path)
+        logging.info(f"Stored {source_path} as artifact {name}")
+        if self.remote is not None:
+            try:
+                self.remote.put(name, source_path)
+                logging.info(f"Uploaded artifact {name} to {self.remote}")
+            except (OSError, urllib.error.URLError) as e:
+                logging.warning(f"Failed to upload artifact {name} to {self.remote}: {e}")
+        return self.local.path(name)
+
+
+def get_artifact_store():
+    local = LocalArtifactStore(os.environ.get("HWCI_BUILD_CACHE", DEFAULT_CACHE_DIR))
+    remote = os.environ.get(REMOTE_STORE_ENV)
+    if not remote:
+        return ArtifactStore(local)
+    if remote.startswith(("http://", "https://")):
+        return ArtifactStore(
+            local, HttpArtifactStore(remote, os.environ.get(TOKEN_ENV))
+        )
+    return ArtifactStore(local, LocalArtifactStore(remote))
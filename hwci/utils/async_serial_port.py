@@ -0,0 +1,114 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import asyncio
+import logging
+import queue
+import re
+from utils.serial_port import MockSerialPort
+from utils.log_buffer import serial_log
+from utils.tracing import span
+
+
+# asyncio variant of `SerialPort`, allowing a single event loop to wait on
+# several consoles (and other streams) at once.
+#
+# This doesn't open the port itself, but takes over reading from an existing
+# `SerialPort` or `MockSerialPort`, such that it shares the board's
+# connection. The synchronous port must not be used while attached.
+class AsyncSerialPort:
+    def __init__(self, port):
+        self.port = port
+        self.buffer = bytearray()
+        self.match = None
+        self._data_available = asyncio.Event()
+        self._pump_task = None
+
+    def attach(self):
+        if isinstance(self.port, MockSerialPort):
+            # The mock port is backed by a queue, poll it for data:
+            self._pump_task = asyncio.get_running_loop().create_task(
+                self._pump_mock()
+            )
+        else:
+            asyncio.get_running_loop().add_reader(
+                self.port.ser.fileno(), self._on_readable
+            )
+        return self
+
+    def detach(self):
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+        else:
+            asyncio.get_running_loop().remove_reader(self.port.ser.fileno())
+
+    def _on_readable(self):
+        ser = self.port.ser
+        self._feed(ser.read(ser.in_waiting or 1))
+
+    async def _pump_mock(self):
+        while True:
+            try:
+                self._feed(self.port.buffer.get_nowait())
+            except queue.Empty:
+                await asyncio.sleep(0.01)
+
+    def _feed(self, data):
+        if data:
+            # Account all I/O on the underlying port:
+            self.port.read_monitor.write(data)
+            self.buffer += data
+            self._data_available.set()
+
+    async def expect(self, pattern, timeout=10, timeout_error=True):
+        with span("expect", cat="serial", pattern=pattern):
+            return await self._expect(pattern, timeout, timeout_error)
+
+    async def _expect(self, pattern, timeout, timeout_error):
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        compiled_pattern = re.compile(pattern)
+
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + timeout
+        while True:
+            # Match against a copy: a match on the buffer itself would read
+            # the consumed bytes' replacements once they're deleted
+            self.match = compiled_pattern.search(bytes(self.buffer))
+            if self.match:
+                data = self.match.group(0)
+                # Consume all data up to and including the match, like pexpect:
+                del self.buffer[: self.match.end()]
+                return data
+
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                break
+            self._data_available.clear()
+            try:
+                await asyncio.wait_for(self._data_available.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        if timeout_error:
+            received_data = self.buffer.decode("utf-8", errors="replace")
+            logging.error(f"Timeout waiting for pattern '{pattern}'")
+            logging.error(f"Received so far:\n{received_data}")
+        return None
+
+    async def write(self, data):
+        serial_log.debug("Writing data: %r", data)
+        if isinstance(self.port, MockSerialPort):
+            self.port.write(data)
+        else:
+            # Write byte by byte, with the same pacing as `SerialPort.write`:
+            for byte in data:
+                self.port.ser.write(bytes([byte]))
+                await asyncio.sleep(0.1)
+            self.port.bytes_written += len(data)
+
+    def flush_buffer(self):
+        self.buffer.clear()
+        self.port.flush_buffer()
@@ -0,0 +1,217 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Discovery of the boards (DUTs) attached to a host, by debug probe serial
+# number.
+#
+# Enumerating all serial ports through `serial.tools.list_ports` reads sysfs
+# attributes of every tty on the host, which is slow on hosts with many USB
+# devices, and matching port descriptions is ambiguous with several boards
+# attached. Instead, we map each J-Link serial number to its stable
+# /dev/serial/by-id path once, and cache the map keyed by the host's USB
+# topology. The cache is invalidated whenever a device appears or disappears.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+
+SERIAL_BY_ID_DIR = "/dev/serial/by-id"
+USB_DEVICES_DIR = "/sys/bus/usb/devices"
+
+CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".discovery-cache.json",
+)
+
+# e.g. usb-SEGGER_J-Link_001050012345-if00
+JLINK_BY_ID = re.compile(r"^usb-SEGGER_J-Link_(?P<serial>\d+)-if(?P<interface>\d+)$")
+
+# A debug probe and the console port of the board attached to it. `port` is
+# the stable /dev/serial/by-id path, `device` the tty it currently points to.
+# Probes with several virtual COM ports report the lowest interface.
+Probe = namedtuple("Probe", ["serial_number", "port", "device", "interface"])
+
+# A discovered probe, together with the target spec describing the board
+# attached to it (if any), and the GPIO interfaces that spec uses.
+DiscoveredBoard = namedtuple(
+    "DiscoveredBoard", ["probe", "target_spec_path", "target_spec", "gpio_interfaces"]
+)
+
+
+def normalize_serial(serial_number):
+    # J-Link serial numbers are zero-padded in device names, but not when
+    # printed by most tools or written into target specs
+    return str(serial_number).strip().lstrip("0")
+
+
+def serial_sort_key(serial_number):
+    # Numeric order of (normalized, digit-only) serial numbers
+    return (len(serial_number), serial_number)
+
+
+def usb_topology():
+    # Fingerprint of the attached USB devices and serial ports. This only
+    # lists two directories, which is cheap compared to a full enumeration.
+    entries = []
+    for directory in [SERIAL_BY_ID_DIR, USB_DEVICES_DIR]:
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            continue
+        for name in names:
+            try:
+                target = os.readlink(os.path.join(directory, name))
+            except OSError:
+                target = ""
+            entries.append(f"{directory}/{name}->{target}")
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+
+def scan_probes():
+    probes = {}
+    try:
+        names = os.listdir(SERIAL_BY_ID_DIR)
+    except FileNotFoundError:
+        names = []
+
+    for name in names:
+        match = JLINK_BY_ID.match(name)
+        if not match:
+            continue
+        serial_number = normalize_serial(match.group("serial"))
+        interface = int(match.group("interface"))
+        known = probes.get(serial_number)
+        if known is not None and known.interface < interface:
+            continue
+        port = os.path.join(SERIAL_BY_ID_DIR, name)
+        probes[serial_number] = Probe(
+            serial_number, port, os.path.realpath(port), interface
+        )
+
+    if not names:
+        # Hosts without udev's by-id links: fall back to a full enumeration
+        probes = scan_probes_pyserial()
+    return probes
+
+
+def scan_probes_pyserial():
+    import serial.tools.list_ports
+
+    probes = {}
+    for port in serial.tools.list_ports.comports():
+        if not port.serial_number or "J-Link" not in (port.description or ""):
+            continue
+        serial_number = normalize_serial(port.serial_number)
+        known = probes.get(serial_number)
+        if known is not None and known.device < port.device:
+            continue
+        probes[serial_number] = Probe(serial_number, port.device, port.device, 0)
+    return probes
+
+
+# Map of the probes attached to this host, cached in memory and on disk. Each
+# lookup only compares the current USB topology against the cached one.
+class Discovery:
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        self.topology = None
+        self.probes = None
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+            return cache["topology"], {
+                serial_number: Probe(*probe)
+                for serial_number, probe in cache["probes"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def save_cache(self):
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({"topology": self.topology, "probes": self.probes}, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logging.warning(f"Failed to write discovery cache {self.cache_file}: {e}")
+
+    def refresh(self, force=False):
+        topology = usb_topology()
+        if not force and self.probes is not None and topology == self.topology:
+            return self.probes
+
+        cached_topology, cached_probes = self.load_cache()
+        if not force and cached_topology == topology:
+            self.topology, self.probes = topology, cached_probes
+            return self.probes
+
+        logging.info("USB topology changed, rescanning debug probes")
+        self.topology, self.probes = topology, scan_probes()
+        self.save_cache()
+        return self.probes
+
+    def probe(self, serial_number):
+        return self.refresh().get(normalize_serial(serial_number))
+
+    def find_board(self, target_spec_path, target_spec):
+        # Find the probe of the board described by a target spec, by its
+        # `serial_number`. If the spec doesn't name a (known) probe, a single
+        # attached probe is used. With several probes attached, the one with
+        # the lowest serial number is used, such that the selection is at
+        # least reproducible.
+        probes = self.refresh()
+        serial_number = target_spec.get("serial_number")
+        probe = None
+        if serial_number is not None:
+            probe = probes.get(normalize_serial(serial_number))
+            if probe is None:
+                logging.warning(
+                    f"Probe {serial_number} of {target_spec_path} is not attached"
+                )
+        if probe is None and probes:
+            if len(probes) > 1:
+                logging.warning(
+                    f"{len(probes)} probes attached, set serial_number in "
+                    + f"{target_spec_path} to select one"
+                )
+            probe = probes[min(probes, key=serial_sort_key)]
+        if probe is None:
+            return None
+
+        gpio_interfaces = sorted(
+            {
+                pin_mapping["io_interface"]
+                for pin_mapping in target_spec.get("pin_mappings", {}).values()
+            }
+        )
+        return DiscoveredBoard(probe, target_spec_path, target_spec, gpio_interfaces)
+
+
+# Discovery shared by all boards of this process:
+discovery = Discovery()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the attached debug probes")
+    parser.add_argument(
+        "--refresh", action="store_true", help="Ignore the cached discovery map"
+    )
+    args = parser.parse_args()
+
+    probes = discovery.refresh(force=args.refresh)
+    if not probes:
+        print("No debug probes found")
+    for serial_number in sorted(probes, key=serial_sort_key):
+        probe = probes[serial_number]
+        print(f"{serial_number}: {probe.port} -> {probe.device}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# In-memory log buffer for hot paths, such as GPIO sampling loops and serial
+# I/O.
+#
+# Formatting and printing a log line for every sample slows down the loops
+# (reducing their sampling rate) and floods the CI output. Loggers listed in
+# `buffered_loggers` therefore don't print their records. Instead, records are
+# kept, unformatted, in a ring buffer. After each test attempt, the buffer is
+# reduced to a one-line summary if the attempt passed, or dumped in full if it
+# failed. Hot paths log through the loggers below, with %-style arguments,
+# such that messages are only ever formatted when dumped:
+#
+#     from utils.log_buffer import samples_log
+#     samples_log.debug("%s is %s", name, "ON" if led_on else "OFF")
+
+import collections
+import logging
+
+# Individual GPIO pin reads and writes, and samples of polling loops:
+samples_log = logging.getLogger("hwci.samples")
+# Data written to and read from the serial console:
+serial_log = logging.getLogger("hwci.serial")
+
+# Loggers whose records are buffered, with the level they are captured at:
+DEFAULT_BUFFERED_LOGGERS = {
+    samples_log.name: logging.DEBUG,
+    serial_log.name: logging.DEBUG,
+}
+
+# Records kept per test attempt. Older records are dropped, with the most
+# recent ones (those leading up to a failure) kept.
+DEFAULT_CAPACITY = 10000
+
+buffered_loggers = dict(DEFAULT_BUFFERED_LOGGERS)
+
+
+def configure_log_buffer(overrides):
+    # Accepts a list of "logger=level" strings, as passed on the command line.
+    # A level of "off" prints the logger's records directly again.
+    for override in overrides:
+        name, _, level = override.rpartition("=")
+        if not name:
+            raise ValueError(f"Invalid log buffer '{override}', expected logger=level")
+        if level.lower() == "off":
+            buffered_loggers.pop(name, None)
+        else:
+            buffered_loggers[name] = logging.getLevelName(level.upper())
+            if not isinstance(buffered_loggers[name], int):
+                raise ValueError(f"Invalid log level '{level}' for logger {name}")
+
+
+# Handler keeping the most recent records in memory. `emit` only appends the
+# record, its message is formatted when (and if) it is dumped.
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+        self.counts = collections.Counter()
+        self.dropped = 0
+
+    def emit(self, record):
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(record)
+        self.counts[record.name] += 1
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.counts.clear()
+            self.dropped = 0
+
+    def summary(self):
+        counts = ", ".join(f"{count} {name}" for name, count in sorted(self.counts.items()))
+        return f"{sum(self.counts.values())} buffered log records ({counts})"
+
+    def dump(self, logger):
+        # Replay the buffered records through the handlers of `logger`
+        # (normally the root logger), which format them as usual
+        with self.lock:
+            records = list(self.records)
+            dropped = self.dropped
+        if dropped:
+            logger.warning(f"{dropped} older buffered log records were dropped")
+        for record in records:
+            logger.handle(record)
+
+
+# Captures the buffered loggers for the duration of each test attempt.
+class TestLogBuffer:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.handler = RingBufferHandler(capacity)
+        self.loggers = []
+
+    def install(self):
+        for name, level in buffered_loggers.items():
+            logger = logging.getLogger(name)
+            logger.setLevel(level)
+            logger.propagate = False
+            logger.addHandler(self.handler)
+            self.loggers.append(logger)
+
+    def uninstall(self):
+        for logger in self.loggers:
+            logger.removeHandler(self.handler)
+            logger.propagate = True
+            logger.setLevel(logging.NOTSET)
+        self.loggers = []
+
+    def start(self):
+        self.handler.clear()
+
+    def finish(self, name, passed):
+        if not self.loggers or not self.handler.counts:
+            return
+        if passed:
+            logging.info(f"Test {name}: {self.handler.summary()}")
+        else:
+            logging.error(
+                f"Test {name} failed, dumping {self.handler.summary()}:"
+            )
+            self.handler.dump(logging.getLogger())
+            logging.error(f"End of buffered log records of {name}")
+        self.handler.clear()
@@ -0,0 +1,185 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from utils.tracing import span
+
+# Default deadlines (in seconds) for external commands, by phase. A wedged
+# debug probe or hung OpenOCD instance would otherwise block the CI host until
+# the job-level timeout. Kernel builds get a generous deadline, as a cold cargo
+# build on a Raspberry Pi can take several minutes.
+DEFAULT_DEADLINES = {
+    "erase_board": 60,
+    "reset": 30,
+    "flash_kernel": 900,
+    "build_kernel": 900,
+    "make": 600,
+    "tockloader install": 180,
+    "tockloader erase-apps": 120,
+    "write_image": 300,
+    "read_back": 120,
+}
+
+deadlines = dict(DEFAULT_DEADLINES)
+
+# Time given to a process group to exit after SIGTERM, before sending SIGKILL:
+KILL_GRACE_PERIOD = 5
+
+
+# An external command run as part of a board operation. Boards describe their
+# operations as lists of commands, such that they can be executed both
+# synchronously and from the asyncio harness.
+Command = namedtuple("Command", ["phase", "args", "cwd"], defaults=[None])
+
+
+class PhaseTimeout(Exception):
+    def __init__(self, phase, timeout, command):
+        super().__init__(
+            f"Phase '{phase}' exceeded its deadline of {timeout}s: "
+            + " ".join(command)
+        )
+        self.phase = phase
+        self.timeout = timeout
+        self.command = command
+
+
+# Raised when a test exceeds its overall deadline. This derives from
+# BaseException, such that it isn't swallowed by tests which catch and ignore
+# generic exceptions.
+class TestTimeout(BaseException):
+    def __init__(self, timeout):
+        super().__init__(f"Test exceeded its deadline of {timeout}s")
+        self.timeout = timeout
+
+
+def configure_deadlines(overrides):
+    # Accepts a list of "phase=seconds" strings, as passed on the command line:
+    for override in overrides:
+        phase, _, seconds = override.rpartition("=")
+        if not phase:
+            raise ValueError(f"Invalid deadline '{override}', expected phase=seconds")
+        if phase not in DEFAULT_DEADLINES:
+            raise ValueError(
+                f"Unknown phase '{phase}' in deadline '{override}', expected one "
+                + f"of: {', '.join(DEFAULT_DEADLINES)}"
+            )
+        try:
+            timeout = float(seconds)
+        except ValueError:
+            timeout = None
+        if timeout is None or timeout <= 0:
+            raise ValueError(
+                f"Invalid deadline '{override}', expected a positive number of seconds"
+            )
+        deadlines[phase] = timeout
+
+
+def run(command, phase, cwd=None):
+    # Run a command in its own process group, such that on a timeout we can
+    # kill it along with all of its children (e.g., cargo invoked by make).
+    timeout = deadlines.get(phase)
+    with span(phase, cat="process"):
+        process = subprocess.Popen(command, cwd=cwd, start_new_session=True)
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logging.error(
+                f"Phase '{phase}' timed out after {timeout}s, killing {command[0]}"
+            )
+            kill_process_group(process)
+            raise PhaseTimeout(phase, timeout, command)
+        except BaseException:
+            # Interrupted, e.g., by a test deadline. Don't leave the process
+            # running in the background:
+            kill_process_group(process)
+            raise
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+def run_commands(commands):
+    for command in commands:
+        run(command.args, phase=command.phase, cwd=command.cwd)
+
+
+async def run_async(command, phase, cwd=None):
+    # Asynchronous variant of `run`, for use with the asyncio board harness.
+    timeout = deadlines.get(phase)
+    with span(phase, cat="process"):
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=cwd, start_new_session=True
+        )
+        try:
+            returncode = await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            logging.error(
+                f"Phase '{phase}' timed out after {timeout}s, killing {command[0]}"
+            )
+            await kill_process_group_async(process)
+            raise PhaseTimeout(phase, timeout, command)
+        except BaseException:
+            await kill_process_group_async(process)
+            raise
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+async def run_commands_async(commands):
+    for command in commands:
+        await run_async(command.args, phase=command.phase, cwd=command.cwd)
+
+
+def kill_process_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=KILL_GRACE_PERIOD)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def kill_process_group_async(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        await asyncio.wait_for(process.wait(), KILL_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        os.killpg(process.pid, signal.SIGKILL)
+        await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+@contextmanager
+def test_deadline(timeout):
+    # Enforce an overall deadline on a test using SIGALRM. Signals can only be
+    # handled in the main thread, elsewhere the deadline is not enforced.
+    if timeout is None:
+        yield
+        return
+    if threading.current_thread() is not threading.main_thread():
+        logging.warning("Test deadlines are only enforced in the main thread")
+        yield
+        return
+
+    def handler(signum, frame):
+        raise TestTimeout(timeout)
+
+    previous_handler = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Parsing of the output of Tock's process console.
+
+import re
+from collections import namedtuple
+
+# Header of the output of the `list` command:
+LIST_HEADER = (
+    rb"PID[ \t]+ShortID[ \t]+Name[ \t]+Quanta[ \t]+Syscalls[ \t]+Restarts"
+    + rb"[ \t]+Grants[ \t]+State\r?\n"
+)
+
+# A process of the `list` output, e.g.
+#  0      Unique     whileone             7432         4         0   1/16   Running
+LIST_ROW = re.compile(
+    r"^\s*(?P<pid>\d+)\s+(?P<short_id>\S+)\s+(?P<name>\S+)\s+(?P<quanta>\d+)"
+    + r"\s+(?P<syscalls>\d+)\s+(?P<restarts>\d+)\s+(?P<grants>\d+/\d+)"
+    + r"\s+(?P<state>\S+)\s*$"
+)
+
+# Prompt printed once the console accepts the next command:
+PROMPT = rb"tock\$ "
+
+ProcessInfo = namedtuple(
+    "ProcessInfo",
+    ["pid", "short_id", "name", "quanta", "syscalls", "restarts", "grants", "state"],
+)
+
+
+def parse_process_list(text):
+    # Parse the rows of `list` output (following its header) into
+    # `ProcessInfo`s, ignoring any other lines
+    processes = []
+    for line in text.splitlines():
+        match = LIST_ROW.match(line)
+        if match:
+            processes.append(
+                ProcessInfo(
+                    pid=int(match["pid"]),
+                    short_id=match["short_id"],
+                    name=match["name"],
+                    quanta=int(match["quanta"]),
+                    syscalls=int(match["syscalls"]),
+                    restarts=int(match["restarts"]),
+                    grants=match["grants"],
+                    state=match["state"],
+                )
+            )
+    return processes
@@ -9,15 +9,38 @@ import queue
 import re
 import time
 import logging
+from utils.log_buffer import serial_log
+from utils.tracing import span
+
+
+# File-like sink for pexpect's `logfile_read`, which receives all data read
+# from the serial port. Data is also forwarded to the test's transcript (a
+# `TranscriptWriter`), if one is attached.
+class SerialReadMonitor:
+    def __init__(self):
+        self.bytes_read = 0
+        self.transcript = None
+
+    def write(self, data):
+        self.bytes_read += len(data)
+        transcript = self.transcript
+        if transcript is not None:
+            transcript.write(data)
+
+    def flush(self):
+        pass
 
 
 class SerialPort:
     def __init__(self, port, baudrate=115200):
         self.port = port
         self.baudrate = baudrate
+        self.read_monitor = SerialReadMonitor()
+        self.bytes_written = 0
         try:
             self.ser = serial.Serial(port, baudrate=baudrate, timeout=1)
             self.child = fdpexpect.fdspawn(self.ser.fileno())
+            self.child.logfile_read = self.read_monitor
             logging.info(f"Opened serial port {port} at baudrate {baudrate}")
         except serial.SerialException as e:
             logging.error(f"Failed to open serial port {port}: {e}")
@@ -29,6 +52,10 @@ class SerialPort:
         logging.info("Flushed serial buffers")
 
     def expect(self, pattern, timeout=10, timeout_error=True):
+        with span("expect", cat="serial", pattern=pattern):
+            return self._expect(pattern, timeout, timeout_error)
+
+    def _expect(self, pattern, timeout, timeout_error):
         try:
             index = self.child.expect(pattern, timeout=timeout)
             return self.child.after
@@ -44,11 +71,16 @@ class SerialPort:
             logging.error(f"Received so far:\n{received_data}")
             return None
 
+    @property
+    def bytes_read(self):
+        return self.read_monitor.bytes_read
+
     def write(self, data):
-        logging.debug(f"Writing data: {data}")
+        serial_log.debug("Writing data: %r", data)
         for byte in data:
             self.ser.write(bytes([byte]))
             time.sleep(0.1)
+        self.bytes_written += len(data)
 
     def close(self):
         self.ser.close()
@@ -59,18 +91,31 @@ class MockSerialPort:
     def __init__(self):
         self.buffer = queue.Queue()
         self.accumulated_data = b""
+        self.read_monitor = SerialReadMonitor()
+        # Writes to the mock port simulate board output, so nothing is ever
+        # written to the board:
+        self.bytes_written = 0
+
+    @property
+    def bytes_read(self):
+        return self.read_monitor.bytes_read
 
     def write(self, data):
-        logging.debug(f"Writing data: {data}")
+        serial_log.debug("Writing data: %r", data)
         self.buffer.put(data)
 
     def expect(self, pattern, timeout=10, timeout_error=True):
+        with span("expect", cat="serial", pattern=pattern):
+            return self._expect(pattern, timeout, timeout_error)
+
+    def _expect(self, pattern, timeout, timeout_error):
         end_time = time.time() + timeout
         compiled_pattern = re.compile(pattern.encode())
         while time.time() < end_time:
             try:
                 data = self.buffer.get(timeout=0.1)
-                logging.debug(f"Received data chunk: {data}")
+                serial_log.debug("Received data chunk: %r", data)
+                self.read_monitor.write(data)
                 self.accumulated_data += data
                 if compiled_pattern.search(self.accumulated_data):
                     logging.debug(f"Matched pattern '{pattern}'")
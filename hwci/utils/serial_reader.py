@@ -0,0 +1,94 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import bisect
+import queue
+import re
+import threading
+import time
+from utils.serial_port import MockSerialPort
+
+
+# Reads a serial port from a background thread, recording the arrival time of
+# each chunk of data.
+#
+# `SerialPort.expect` only reads while it is called, such that data arriving
+# in between (e.g., while a reset command runs) would be timestamped late.
+# Like `AsyncSerialPort`, this takes over reading from an existing port: the
+# port must not be read otherwise while the reader runs, and data read by it
+# is not seen by later `expect` calls. All data is still accounted through the
+# port's read monitor (and thus recorded in transcripts).
+class TimestampedSerialReader:
+    def __init__(self, port):
+        self.port = port
+        self.data = bytearray()
+        # Offset in `data` and arrival time of each chunk:
+        self.offsets = []
+        self.timestamps = []
+        # Matches start after the end of the previous match:
+        self.position = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def __enter__(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.read_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.running = False
+        self.thread.join()
+
+    def read_loop(self):
+        while self.running:
+            if isinstance(self.port, MockSerialPort):
+                try:
+                    data = self.port.buffer.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            else:
+                # Returns after the port's read timeout if there is no data:
+                ser = self.port.ser
+                data = ser.read(ser.in_waiting or 1)
+            if not data:
+                continue
+            timestamp = time.time()
+            self.port.read_monitor.write(data)
+            with self.condition:
+                self.offsets.append(len(self.data))
+                self.timestamps.append(timestamp)
+                self.data += data
+                self.condition.notify_all()
+
+    def arrival_time(self, offset):
+        # Arrival time of the chunk holding the byte at `offset`
+        return self.timestamps[bisect.bisect_right(self.offsets, offset) - 1]
+
+    def wait_for(self, pattern, timeout=10):
+        # Wait for a bytes regex to match the data read after the previous
+        # match. Returns the arrival time of the data completing the match, or
+        # None on a timeout.
+        arrival_time, _match = self.expect(pattern, timeout)
+        return arrival_time
+
+    def expect(self, pattern, timeout=10):
+        # Like `wait_for`, but returns both the arrival time and the match
+        # object, or (None, None) on a timeout
+        compiled_pattern = re.compile(pattern)
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                match = compiled_pattern.search(self.data, self.position)
+                if match:
+                    self.position = match.end()
+                    return (
+                        self.arrival_time(max(match.end() - 1, match.start())),
+                        match,
+                    )
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None, None
+                self.condition.wait(remaining)
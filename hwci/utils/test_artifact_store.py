@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Round-trip tests of the artifact store, with `utils/artifact_server.py`
+# standing in for the remote store shared by CI hosts. These run on the host
+# only, without any board attached:
+#
+#     python3 -m unittest utils/test_artifact_store.py
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+from pathlib import Path
+
+# Ensure that imported modules can find the top-level hwci modules
+# (appends the hwci root to the PYTHONPATH):
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.artifact_server import serve
+from utils.artifact_store import (
+    ArtifactStore,
+    HttpArtifactStore,
+    LocalArtifactStore,
+    cache_key,
+)
+
+TOKEN = "test-token"
+
+
+class ArtifactStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.key = cache_key("0123abcd", "boards/nordic/nrf52840dk", "dirty")
+        self.artifact = self.write_file("build/kernel.bin", b"\x00kernel\xff" * 100)
+
+    def write_file(self, name, data):
+        path = os.path.join(self.tmp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def read_file(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def host_store(self, host, remote):
+        # The store of a CI host, with its own local directory
+        return ArtifactStore(
+            LocalArtifactStore(os.path.join(self.tmp_dir.name, host)), remote
+        )
+
+    def start_server(self, token):
+        server = serve(os.path.join(self.tmp_dir.name, "server"), "127.0.0.1", 0, token)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def assert_round_trip(self, remote):
+        stored = self.host_store("host-a", remote).store(self.key, self.artifact, ".bin")
+        self.assertEqual(self.read_file(stored), self.read_file(self.artifact))
+
+        fetched = self.host_store("host-b", remote).fetch(self.key, ".bin")
+        self.assertIsNotNone(fetched)
+        self.assertEqual(self.read_file(fetched), self.read_file(self.artifact))
+        self.assertIsNone(self.host_store("host-c", remote).fetch(cache_key("other")))
+
+    def test_local_round_trip(self):
+        self.assert_round_trip(
+            LocalArtifactStore(os.path.join(self.tmp_dir.name, "remote"))
+        )
+
+    def test_http_round_trip(self):
+        self.assert_round_trip(HttpArtifactStore(self.start_server(TOKEN), TOKEN))
+
+    def test_http_rejects_unauthorized_uploads(self):
+        url = self.start_server(TOKEN)
+        for token in [None, "wrong-token"]:
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                HttpArtifactStore(url, token).put(self.key + ".bin", self.artifact)
+            self.assertEqual(e.exception.code, 401)
+        self.assertFalse(HttpArtifactStore(url).get(self.key + ".bin", self.artifact))
+
+    def test_http_read_only_without_token(self):
+        url = self.start_server(None)
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            HttpArtifactStore(url, TOKEN).put(self.key + ".bin", self.artifact)
+        self.assertEqual(e.exception.code, 403)
+
+    def test_http_never_overwrites(self):
+        url = self.start_server(TOKEN)
+        remote = HttpArtifactStore(url, TOKEN)
+        remote.put(self.key + ".bin", self.artifact)
+        # Reported as success, as the artifact is present:
+        remote.put(self.key + ".bin", self.write_file("evil.bin", b"evil"))
+
+        dest = os.path.join(self.tmp_dir.name, "fetched.bin")
+        self.assertTrue(remote.get(self.key + ".bin", dest))
+        self.assertEqual(self.read_file(dest), self.read_file(self.artifact))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    unittest.main()
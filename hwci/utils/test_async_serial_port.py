@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Tests of `AsyncSerialPort`, attached to a `MockSerialPort`. These run on the
+# host only, without any board attached:
+#
+#     python3 -m unittest utils/test_async_serial_port.py
+
+import asyncio
+import logging
+import sys
+import unittest
+from pathlib import Path
+
+# Ensure that imported modules can find the top-level hwci modules
+# (appends the hwci root to the PYTHONPATH):
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.async_serial_port import AsyncSerialPort
+from utils.serial_port import MockSerialPort
+
+
+class AsyncSerialPortTest(unittest.TestCase):
+    def run_with_port(self, test):
+        async def run():
+            port = AsyncSerialPort(MockSerialPort()).attach()
+            try:
+                await test(port)
+            finally:
+                port.detach()
+
+        asyncio.run(run())
+
+    def test_expect_returns_matched_bytes(self):
+        async def test(port):
+            await port.write(b"Hello World!\r\n")
+            self.assertEqual(await port.expect("Hello World!"), b"Hello World!")
+            self.assertEqual(port.match.group(0), b"Hello World!")
+            self.assertEqual(bytes(port.buffer), b"\r\n")
+
+        self.run_with_port(test)
+
+    def test_expect_consumes_up_to_match(self):
+        async def test(port):
+            await port.write(b"boot\r\ntock$ list\r\ntock$ ")
+            self.assertEqual(await port.expect(r"tock\$ "), b"tock$ ")
+            self.assertEqual(bytes(port.buffer), b"list\r\ntock$ ")
+            self.assertEqual(await port.expect(r"tock\$ "), b"tock$ ")
+            self.assertEqual(bytes(port.buffer), b"")
+
+        self.run_with_port(test)
+
+    def test_expect_timeout(self):
+        async def test(port):
+            await port.write(b"partial")
+            self.assertIsNone(
+                await port.expect("complete", timeout=0.1, timeout_error=False)
+            )
+            self.assertEqual(bytes(port.buffer), b"partial")
+
+        self.run_with_port(test)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    unittest.main()
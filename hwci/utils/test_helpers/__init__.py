@@ -1,3 +1,4 @@
 from .oneshot import OneshotTest
 from .analyze_console import AnalyzeConsoleTest
 from .wait_for_console_message import WaitForConsoleMessageTest
+from .async_oneshot import AsyncOneshotTest
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from core.async_board_harness import AsyncBoardHarness
+from core.test_harness import (
+    PrepareError,
+    PREPARE_FLASH,
+    PREPARE_REINSTALL_APPS,
+    PREPARE_RESET,
+)
+from utils.test_helpers import OneshotTest
+from utils.tracing import span
+
+
+# Like `OneshotTest`, but the board is prepared and the test is run through an
+# `AsyncBoardHarness`. Subclasses implement `async_oneshot_test`, and may
+# construct additional harnesses for other boards to drive from the same
+# event loop.
+class AsyncOneshotTest(OneshotTest):
+    def test(self, board, prepare=PREPARE_FLASH):
+        logging.info("Starting AsyncOneshotTest")
+        asyncio.run(self.run_async(board, prepare))
+        logging.info("Finished AsyncOneshotTest")
+
+    async def run_async(self, board, prepare):
+        async with AsyncBoardHarness(board) as harness:
+            try:
+                await self.prepare_async(harness, prepare)
+            except Exception as e:
+                raise PrepareError(
+                    f"Failed to prepare the board ({prepare}): {e}", prepare
+                ) from e
+            with span("oneshot_test"):
+                await self.async_oneshot_test(harness)
+
+    async def prepare_async(self, harness, prepare):
+        if prepare == PREPARE_RESET:
+            logging.info("Reusing flashed image, resetting the board")
+            harness.serial.flush_buffer()
+            await harness.reset()
+        elif prepare == PREPARE_REINSTALL_APPS:
+            logging.info("Reusing flashed kernel, reinstalling apps")
+            await harness.erase_apps()
+            harness.serial.flush_buffer()
+            for app in self.apps:
+                await harness.flash_app(app)
+        else:
+            await harness.erase_board()
+            harness.serial.flush_buffer()
+            await harness.flash_kernel()
+            for app in self.apps:
+                await harness.flash_app(app)
+
+    async def async_oneshot_test(self, harness):
+        pass  # To be implemented by subclasses
@@ -1,20 +1,63 @@
+import hashlib
+import json
 import logging
-from core.test_harness import TestHarness
+from core.test_harness import (
+    TestHarness,
+    PrepareError,
+    PREPARE_FLASH,
+    PREPARE_REINSTALL_APPS,
+    PREPARE_RESET,
+)
+from utils.tracing import span
 
 
 class OneshotTest(TestHarness):
-    def __init__(self, apps=[]):
+    def __init__(self, apps=[], pristine_flash=False):
         self.apps = apps
+        self.pristine_flash = pristine_flash
 
-    def test(self, board):
+    def flash_fingerprint(self, board):
+        # The flashed image is determined by the kernel board and the list of
+        # apps. App order is significant, as it determines the flash layout.
+        image = {
+            "kernel": board.kernel_board_path,
+            "apps": self.apps,
+        }
+        return hashlib.sha256(
+            json.dumps(image, sort_keys=True).encode()
+        ).hexdigest()
+
+    def test(self, board, prepare=PREPARE_FLASH):
         logging.info("Starting OneshotTest")
-        board.erase_board()
-        board.serial.flush_buffer()
-        board.flash_kernel()
-        for app in self.apps:
-            board.flash_app(app)
-        self.oneshot_test(board)
+        try:
+            self.prepare(board, prepare)
+        except Exception as e:
+            raise PrepareError(
+                f"Failed to prepare the board ({prepare}): {e}", prepare
+            ) from e
+        with span("oneshot_test"):
+            self.oneshot_test(board)
         logging.info("Finished OneshotTest")
 
+    def prepare(self, board, prepare):
+        if prepare == PREPARE_RESET:
+            # The board already holds this test's kernel and apps, a reset is
+            # sufficient to start from a clean state:
+            logging.info("Reusing flashed image, resetting the board")
+            board.serial.flush_buffer()
+            board.reset()
+        elif prepare == PREPARE_REINSTALL_APPS:
+            logging.info("Reusing flashed kernel, reinstalling apps")
+            board.erase_apps()
+            board.serial.flush_buffer()
+            for app in self.apps:
+                board.flash_app(app)
+        else:
+            board.erase_board()
+            board.serial.flush_buffer()
+            board.flash_kernel()
+            for app in self.apps:
+                board.flash_app(app)
+
     def oneshot_test(self, board):
         pass  # To be implemented by subclasses
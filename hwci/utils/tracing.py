@@ -0,0 +1,150 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Span:
+    __slots__ = ("name", "cat", "start_ns", "end_ns", "tid", "args")
+
+    def __init__(self, name, cat, start_ns, end_ns, tid, args):
+        self.name = name
+        self.cat = cat
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.tid = tid
+        self.args = args
+
+    @property
+    def duration(self):
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+# Records timed spans of the various phases of a test run (flashing, building,
+# serial expects, GPIO captures, ...). Recording a span only takes two clock
+# reads and a list append, all formatting is deferred to the export functions.
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = []
+        self.origin_ns = time.perf_counter_ns()
+
+    def record(self, name, cat, start_ns, end_ns, args=None):
+        span = Span(name, cat, start_ns, end_ns, threading.get_native_id(), args)
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, cat="phase", **args):
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, cat, start_ns, time.perf_counter_ns(), args)
+
+    def spans_since(self, index):
+        # Returns all spans recorded after the first `index` spans, used to
+        # attribute spans to an individual test:
+        with self.lock:
+            return self.spans[index:]
+
+    def mark(self):
+        with self.lock:
+            return len(self.spans)
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for span in self.spans_since(0):
+            event = {
+                "name": span.name,
+                "cat": span.cat,
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1e3,
+                "dur": (span.end_ns - span.start_ns) / 1e3,
+                "pid": pid,
+                "tid": span.tid,
+            }
+            if span.args:
+                event["args"] = {k: str(v) for k, v in span.args.items()}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def format_summary(self, spans=None):
+        return format_summary(self.spans_since(0) if spans is None else spans)
+
+
+def summarize(spans):
+    # Aggregate spans by category and name. Returns a list of
+    # (cat, name, count, total_s, max_s) tuples, sorted by total time.
+    totals = {}
+    for span in spans:
+        key = (span.cat, span.name)
+        count, total, maximum = totals.get(key, (0, 0.0, 0.0))
+        duration = span.duration
+        totals[key] = (count + 1, total + duration, max(maximum, duration))
+
+    rows = [(cat, name, *values) for (cat, name), values in totals.items()]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+
+def format_summary(spans):
+    if not spans:
+        return "(no spans recorded)"
+
+    wall = (
+        max(span.end_ns for span in spans) - min(span.start_ns for span in spans)
+    ) / 1e9
+    rows = summarize(spans)
+    name_width = max(len(f"{cat}:{name}") for cat, name, *_ in rows)
+
+    lines = [
+        f"{'Phase':<{name_width}}  {'Count':>6}  {'Total (s)':>10}  "
+        + f"{'Mean (ms)':>10}  {'Max (ms)':>10}  {'Wall %':>7}"
+    ]
+    for cat, name, count, total, maximum in rows:
+        share = 100 * total / wall if wall > 0 else 0.0
+        lines.append(
+            f"{cat + ':' + name:<{name_width}}  {count:>6}  {total:>10.3f}  "
+            + f"{1000 * total / count:>10.1f}  {1000 * maximum:>10.1f}  "
+            + f"{share:>6.1f}%"
+        )
+    lines.append(f"Wall time: {wall:.3f}s (nested spans overlap)")
+    return "\n".join(lines)
+
+
+# Global tracer for the current run:
+tracer = Tracer()
+
+
+def span(name, cat="phase", **args):
+    return tracer.span(name, cat, **args)
+
+
+def traced(name=None, cat="phase"):
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(span_name, cat, start_ns, time.perf_counter_ns())
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,251 @@
+# Licensed under the Apache License, Version 2.0 or the MIT License.
+# SPDX-License-Identifier: Apache-2.0 OR MIT
+# Copyright Tock Contributors 2024.
+
+# Compressed, indexed transcripts of the serial console.
+#
+# A transcript is a sequence of independently compressed gzip members (a
+# valid gzip file, such that `zcat` works), each holding a block of complete
+# console lines. A side index (`<transcript>.idx`) holds one JSON line per
+# block, with the block's location in the transcript, the number of its first
+# line and the offset and receive timestamp of each of its lines. Looking up
+# lines by number or time only decompresses the blocks holding them.
+#
+# Usage:
+#
+#     python3 utils/transcript.py show results/transcripts/tests_c_hello.serial.gz
+#     python3 utils/transcript.py show --lines 100:120 <transcript>
+#     python3 utils/transcript.py show --time 5:7.5 <transcript>
+#     python3 utils/transcript.py search "panicked at" results/transcripts/*.gz
+
+import argparse
+import bisect
+import gzip
+import json
+import re
+import sys
+import threading
+import time
+
+INDEX_SUFFIX = ".idx"
+
+# Uncompressed size at which a block is completed (at the next line break):
+BLOCK_SIZE = 64 * 1024
+
+# Blocks are also completed after this many seconds, such that a run that is
+# killed still leaves (almost) its entire transcript on disk:
+BLOCK_INTERVAL = 10
+
+# Lines are split after this many bytes, such that a console that never emits
+# a line break can't grow a block without bounds:
+MAX_LINE_LENGTH = 4 * BLOCK_SIZE
+
+LINE = re.compile(rb"[^\n]*\n|[^\n]+")
+
+
+# File-like sink for serial data (see `SerialReadMonitor`), writing it to a
+# transcript. Data may be written from several threads.
+class TranscriptWriter:
+    def __init__(self, path, block_size=BLOCK_SIZE, block_interval=BLOCK_INTERVAL):
+        self.path = path
+        self.block_size = block_size
+        self.block_interval = block_interval
+        self.file = open(path, "wb")
+        self.index = open(path + INDEX_SUFFIX, "w")
+        self.lock = threading.Lock()
+
+        # Number of lines started so far:
+        self.line_count = 0
+        self.line_length = 0
+        self.at_line_start = True
+
+        # Block being accumulated, and the (offset, timestamp) of its lines:
+        self.block = bytearray()
+        self.block_lines = []
+        self.block_started = None
+
+    def write(self, data):
+        timestamp = round(time.time(), 6)
+        with self.lock:
+            for piece in LINE.findall(data):
+                if self.at_line_start or self.line_length >= MAX_LINE_LENGTH:
+                    if self.block and len(self.block) >= self.block_size:
+                        self.write_block()
+                    if self.block_started is None:
+                        self.block_started = timestamp
+                    self.block_lines.append((len(self.block), timestamp))
+                    self.line_count += 1
+                    self.line_length = 0
+                self.block += piece
+                self.line_length += len(piece)
+                self.at_line_start = piece.endswith(b"\n")
+
+            if (
+                self.at_line_start
+                and self.block
+                and timestamp - self.block_started >= self.block_interval
+            ):
+                self.write_block()
+
+    def flush(self):
+        pass
+
+    def write_block(self):
+        offset = self.file.tell()
+        self.file.write(gzip.compress(bytes(self.block), mtime=0))
+        self.file.flush()
+        entry = {
+            "offset": offset,
+            "size": self.file.tell() - offset,
+            "first_line": self.line_count - len(self.block_lines),
+            "lines": self.block_lines,
+        }
+        self.index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.index.flush()
+        self.block = bytearray()
+        self.block_lines = []
+        self.block_started = None
+
+    def close(self):
+        with self.lock:
+            if self.block:
+                self.write_block()
+            self.file.close()
+            self.index.close()
+
+
+# Random access to a transcript through its index.
+class TranscriptReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path + INDEX_SUFFIX) as f:
+            self.blocks = [json.loads(line) for line in f if line.strip()]
+        self.first_lines = [block["first_line"] for block in self.blocks]
+        self.start_times = [block["lines"][0][1] for block in self.blocks]
+        self.line_count = sum(len(block["lines"]) for block in self.blocks)
+
+    def start_time(self):
+        return self.start_times[0] if self.blocks else None
+
+    def block_lines(self, block):
+        # Yields the (line number, timestamp, data) of each line of a block,
+        # decompressing only that block
+        with open(self.path, "rb") as f:
+            f.seek(block["offset"])
+            data = gzip.decompress(f.read(block["size"]))
+        lines = block["lines"]
+        for i, (offset, timestamp) in enumerate(lines):
+            end = lines[i + 1][0] if i + 1 < len(lines) else len(data)
+            yield block["first_line"] + i, timestamp, data[offset:end]
+
+    def lines(self, start=0, end=None):
+        # Lines with numbers in [start, end)
+        end = self.line_count if end is None else min(end, self.line_count)
+        index = max(bisect.bisect_right(self.first_lines, start) - 1, 0)
+        for block in self.blocks[index:]:
+            if block["first_line"] >= end:
+                break
+            for line in self.block_lines(block):
+                if start <= line[0] < end:
+                    yield line
+
+    def lines_between(self, start_time=None, end_time=None):
+        # Lines received in [start_time, end_time), as absolute timestamps
+        index = 0
+        if start_time is not None:
+            index = max(bisect.bisect_right(self.start_times, start_time) - 1, 0)
+        for block in self.blocks[index:]:
+            if end_time is not None and block["lines"][0][1] >= end_time:
+                break
+            for line in self.block_lines(block):
+                if start_time is not None and line[1] < start_time:
+                    continue
+                if end_time is not None and line[1] >= end_time:
+                    break
+                yield line
+
+    def search(self, pattern, start_time=None, end_time=None):
+        # Lines matching a compiled bytes regex
+        for line in self.lines_between(start_time, end_time):
+            if pattern.search(line[2]):
+                yield line
+
+
+def format_line(reader, line):
+    number, timestamp, data = line
+    text = data.decode("utf-8", errors="replace").rstrip("\r\n")
+    return f"{number:>7} {timestamp - reader.start_time():>10.3f}s  {text}"
+
+
+def parse_range(value, convert):
+    # "a:b", "a:" or ":b"
+    start, _, end = value.partition(":")
+    return (convert(start) if start else None, convert(end) if end else None)
+
+
+def show_command(args):
+    reader = TranscriptReader(args.transcript)
+    if args.lines:
+        start, end = parse_range(args.lines, int)
+        lines = reader.lines(start or 0, end)
+    elif args.time and reader.blocks:
+        # Relative to the start of the transcript:
+        start, end = parse_range(args.time, float)
+        lines = reader.lines_between(
+            None if start is None else reader.start_time() + start,
+            None if end is None else reader.start_time() + end,
+        )
+    else:
+        lines = reader.lines()
+    for line in lines:
+        print(format_line(reader, line))
+
+
+def search_command(args):
+    pattern = re.compile(
+        args.pattern.encode(), re.IGNORECASE if args.ignore_case else 0
+    )
+    found = False
+    for path in args.transcripts:
+        reader = TranscriptReader(path)
+        for line in reader.search(pattern):
+            found = True
+            prefix = f"{path}:" if len(args.transcripts) > 1 else ""
+            print(prefix + format_line(reader, line))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Read and search compressed serial transcripts"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show_parser = subparsers.add_parser("show", help="Print lines of a transcript")
+    show_parser.add_argument("transcript")
+    show_parser.add_argument(
+        "--lines", metavar="START:END", help="Only print these line numbers"
+    )
+    show_parser.add_argument(
+        "--time",
+        metavar="START:END",
+        help="Only print lines received in this interval, in seconds since the "
+        + "start of the transcript",
+    )
+
+    search_parser = subparsers.add_parser(
+        "search", help="Print the lines matching a regular expression"
+    )
+    search_parser.add_argument("pattern")
+    search_parser.add_argument("transcripts", nargs="+")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "show":
+        show_command(args)
+    elif not search_command(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import coloredlogs, logging
+import hashlib
+import json
+import os
+import threading
+import sh
+
+# Source hashes of the artifacts built by previous runs, such that an unchanged
+# kernel or app isn't rebuilt at all.
+CACHE_FILE = "artifact-cache.json"
+
+# Directories containing build outputs, which are excluded when hashing a
+# source tree that isn't a git repository.
+BUILD_DIRS = {"build", "target", ".git"}
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger, fmt='%(message)s')
+
+
+def git_toplevel(path):
+    try:
+        return str(sh.git("-C", path, "rev-parse", "--show-toplevel")).strip()
+    except (sh.ErrorReturnCode, sh.CommandNotFound):
+        return None
+
+
+def source_hash(path):
+    # Hash the sources an artifact is built from. For git checkouts (the
+    # common case), this is the checked out commit plus any uncommitted
+    # changes to the repository, which is much cheaper than hashing all
+    # files. Otherwise, fall back to hashing file metadata.
+    h = hashlib.sha256()
+    toplevel = git_toplevel(path)
+    if toplevel is not None:
+        h.update(str(sh.git("-C", toplevel, "rev-parse", "HEAD")).encode())
+        h.update(str(sh.git("-C", toplevel, "status", "--porcelain")).encode())
+        h.update(str(sh.git("-C", toplevel, "diff", "HEAD")).encode())
+        return h.hexdigest()
+
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in BUILD_DIRS)
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            h.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+# Builds each distinct kernel `(kernel_path, binary_path)` and app
+# `(libtock_path, app_name)` at most once per run, and skips builds entirely
+# when their sources are unchanged since a previous run. Boards then only
+# flash the resulting binaries.
+class ArtifactStage:
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        # Builds of the same source tree can't safely run concurrently:
+        self.lock = threading.Lock()
+        # Artifacts built (or validated) during this run:
+        self.built = {}
+        try:
+            with open(cache_file) as f:
+                self.cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.cache = {}
+
+    def kernel(self, kernel_path, binary_path):
+        self.build(f"kernel:{kernel_path}:{binary_path}", kernel_path, binary_path)
+        return binary_path
+
+    def app(self, libtock_path, app_name):
+        tab_path = f"{libtock_path}/build/{app_name}.tab"
+        self.build(f"app:{libtock_path}:{app_name}", libtock_path, tab_path)
+        return tab_path
+
+    def build(self, key, make_path, output_path):
+        with self.lock:
+            if key in self.built:
+                return
+
+            digest = source_hash(make_path)
+            if self.cache.get(key) == digest and os.path.exists(output_path):
+                logger.info(f"[BUILDING -- CACHED] {make_path} is up to date.")
+            else:
+                logger.info(f"[BUILDING] {make_path}...")
+                logger.info(sh.make("-C", make_path, _err_to_out=True))
+                logger.info(f"[BUILDING -- COMPLETE] {make_path}.")
+                self.cache[key] = digest
+                self.save()
+
+            self.built[key] = digest
+
+    def save(self):
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.cache, f, indent=2)
+        os.replace(tmp_file, self.cache_file)
+
+
+# Artifact stage shared by all boards of this run:
+artifacts = ArtifactStage()
@@ -0,0 +1,159 @@
+import coloredlogs, logging
+import json
+import sh
+import time
+from board import Board, prep_boards
+from capture import capture_boards
+from ieee802154_tests import receive_stats, tx_timestamps
+
+# Results of every benchmark run are appended to this file (one JSON object per
+# line), such that they can be compared over time.
+RESULTS_FILE = "radio-benchmark.jsonl"
+
+# Packet interval and payload size of the standard `radio_tx` app. The app
+# hard-codes both, so the benchmark only sweeps the test duration:
+RADIO_TX_INTERVAL_MS = 250
+RADIO_TX_PAYLOAD_SIZE = 60
+
+# A run fails if the transmitter's median packet interval deviates from the
+# expected one by more than this fraction, as its PDR would be meaningless:
+INTERVAL_TOLERANCE = 0.2
+
+LATENCY_PERCENTILES = [50, 90, 99]
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger, fmt='%(message)s')
+
+
+def percentile(values, p):
+    # Percentile with linear interpolation between the closest ranks.
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def git_revision(path):
+    try:
+        return str(sh.git("-C", path, "rev-parse", "HEAD")).strip()
+    except (sh.ErrorReturnCode, sh.CommandNotFound):
+        return None
+
+
+def radio_boards(boards):
+    board_tx = Board(boards[0],
+                  "tock/boards/nordic/nrf52840dk",
+                  "libtock-c/examples/tests/ieee802154/radio_tx",
+                  "radio_tx",
+                  "tock/target/thumbv7em-none-eabi/release/nrf52840dk.bin")
+    board_rx = Board(boards[1],
+                  "tock/boards/nordic/nrf52840dk",
+                  "libtock-c/examples/tests/ieee802154/radio_rx",
+                  "radio_rx",
+                  "tock/target/thumbv7em-none-eabi/release/nrf52840dk.bin")
+    return board_tx, board_rx
+
+
+# Fail the run unless the transmitter actually sent packets at the interval
+# the PDR is computed against.
+def check_tx_interval(timeline, board_tx, interval_ms):
+    timestamps = tx_timestamps(timeline, board_tx)
+    if len(timestamps) < 2:
+        raise Exception(f"FAILED: radio benchmark -- transmitter {board_tx.board_serial_no} "
+                        f"reported {len(timestamps)} transmissions.")
+    intervals = [t2 - t1 for t1, t2 in zip(timestamps, timestamps[1:])]
+    tx_interval_ms = percentile(intervals, 50) * 1000
+    if abs(tx_interval_ms - interval_ms) > interval_ms * INTERVAL_TOLERANCE:
+        raise Exception(f"FAILED: radio benchmark -- transmitter sent a packet every "
+                        f"{tx_interval_ms:.0f}ms, expected {interval_ms}ms.")
+
+
+# Run a single point of the sweep `repeats` times, and aggregate the results
+# of all runs.
+def benchmark_point(boards, duration, repeats):
+    interval_ms = RADIO_TX_INTERVAL_MS
+    payload_size = RADIO_TX_PAYLOAD_SIZE
+    board_tx, board_rx = radio_boards(boards)
+    prep_boards([board_tx, board_rx])
+
+    expected = {
+        "payload_offset": 12,
+        "payload": bytes(range(payload_size)),
+        "dst_pan": "0xabcd",
+        "dst_addr": "0x0802",
+        "src_pan": "0xabcd",
+        "src_addr": "0x1540",
+    }
+    total_packets = int(duration * 1000 / interval_ms)
+
+    runs = []
+    latencies = []
+    for repeat in range(repeats):
+        # Each capture resets both boards, so the apps restart for every run:
+        timeline = capture_boards([board_tx, board_rx], duration)
+        check_tx_interval(timeline, board_tx, interval_ms)
+        stats = receive_stats(timeline, board_tx, board_rx, interval_ms / 1000, expected)
+        summary = stats.summary(total_packets)
+        summary["throughput_bps"] = stats.valid * payload_size * 8 / duration
+        runs.append(summary)
+        latencies += stats.latencies
+        logger.info(f"[BENCHMARK] duration={duration}s run {repeat + 1}/{repeats}: "
+                    f"pdr={summary['pdr']:.3f} throughput={summary['throughput_bps']:.0f}bps")
+
+    pdrs = [run["pdr"] for run in runs]
+    throughputs = [run["throughput_bps"] for run in runs]
+    jitters = [run["jitter_s"] for run in runs if run["jitter_s"] is not None]
+    result = {
+        "duration_s": duration,
+        "interval_ms": interval_ms,
+        "payload_size": payload_size,
+        "repeats": repeats,
+        "sent_per_run": total_packets,
+        "pdr_mean": sum(pdrs) / len(pdrs),
+        "pdr_min": min(pdrs),
+        "pdr_max": max(pdrs),
+        "throughput_bps_mean": sum(throughputs) / len(throughputs),
+        "duplicates": sum(run["duplicates"] for run in runs),
+        "corrupted": sum(run["corrupted"] for run in runs),
+        "jitter_s_mean": sum(jitters) / len(jitters) if jitters else None,
+        "latency_samples": len(latencies),
+        "runs": runs,
+    }
+    for p in LATENCY_PERCENTILES:
+        result[f"latency_s_p{p}"] = percentile(latencies, p)
+    return result
+
+
+# Sweep the test durations, appending the aggregated results to
+# `results_file`.
+def radio_benchmark(boards, durations, repeats=3, results_file=RESULTS_FILE):
+    if len(boards) < 2:
+        raise Exception("Error: [Inadequate resources] - radio benchmark requires at least two available boards.")
+
+    run_info = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "tock": git_revision("tock"),
+        "libtock-c": git_revision("libtock-c"),
+    }
+
+    results = []
+    for duration in durations:
+        result = dict(run_info)
+        result.update(benchmark_point(boards, duration, repeats))
+        results.append(result)
+
+        # Write results as they become available, a sweep can take hours:
+        with open(results_file, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+    logger.info(f"[BENCHMARK -- COMPLETE] Results appended to {results_file}:")
+    for result in results:
+        latency = result["latency_s_p50"]
+        logger.info(f"  duration={result['duration_s']}s interval={result['interval_ms']}ms "
+                    f"payload={result['payload_size']}B: pdr={result['pdr_mean']:.3f} "
+                    f"throughput={result['throughput_bps_mean']:.0f}bps "
+                    f"latency_p50={'n/a' if latency is None else f'{latency * 1000:.1f}ms'}")
+    return results
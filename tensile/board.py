@@ -1,7 +1,9 @@
-from pynrfjprog import LowLevel
 import coloredlogs, logging
-import sh
 import serial, time
+from concurrent.futures import ThreadPoolExecutor
+from artifacts import artifacts
+from capture import capture_boards
+from nrfjprog_sessions import sessions
 
 BAUD_RATE = 115200
 
@@ -9,7 +11,7 @@ class Board:
     def __init__(self, board_serial_no, kernel_path, libtock_path, app_name, binary_path):
         self.board_serial_no = board_serial_no
         self.board_com_port = None
-        self.nrfjprog_api = None
+        self.session = None
         self.kernel_path = kernel_path
         self.libtock_path = libtock_path
         self.app_name = app_name
@@ -24,61 +26,47 @@ class Board:
 
 
     def init_nrfjprog(self):
-        # Init/open API.
-        nrfjprog_api = LowLevel.API()
-        nrfjprog_api.open()
-        
-        # Connect to board with serial number.
-        nrfjprog_api.connect_to_emu_with_snr(self.board_serial_no)
-
-        self.nrfjprog_api = nrfjprog_api
-        # Get COM port for this board. NOTE: Newer nordic devices
-        # occasionally have 2 COM ports. We select the lower port.
-        board_com_port = nrfjprog_api.enum_emu_com_ports(self.board_serial_no)
-        if len(board_com_port) > 1:
-            self.board_com_port = board_com_port[0].path
+        # Get the persistent session for this board's J-Link, connecting to it
+        # on first use.
+        self.session = sessions.get(self.board_serial_no)
+        self.board_com_port = self.session.com_port()
 
     def flash_board(self):
+        self.build()
+        self.program()
+
+    def build(self):
+        # Build the Tock kernel and libtock-c app. Builds are shared across
+        # all boards of this run, each distinct kernel and app is only built
+        # once.
+        artifacts.kernel(self.kernel_path, self.binary_path)
+        artifacts.app(self.libtock_path, self.app_name)
+
+    def program(self):
         # Reset board to factory settings and erase all flash.
         self.log_info(f"[FACTORY_RESET] Beginning factory reset for board {self.board_serial_no}...")
-        self.nrfjprog_api.recover()
+        self.session.recover()
 
         self.log_info(f"[FACTORY_RESET -- COMPLETE] {self.board_serial_no}.")
-        
-        # Build Tock kernel.
-        self.log_info(f"[BUILDING] Tock Kernel {self.kernel_path}...")
-        self.log_info(sh.make("-C", self.kernel_path, _err_to_out=True))
-        self.log_info(f"[BUILDING -- COMPLETE] Tock Kernel {self.kernel_path}.")
-        
+
         # Flash Tock kernel to board.
         self.log_info(f"[FLASHING] Tock Kernel to: {self.board_serial_no}...")
-        self.log_info(sh.tockloader(
+        self.log_info(self.session.program(
                         "flash", 
                         "--address", 
                         "0x00000", 
                         "--board", 
                         "nrf52dk", 
-                        "--jlink-serial-number", 
-                        self.board_serial_no,
                         "--jlink",
-                        self.binary_path, 
-                        _err_to_out=True))
+                        artifacts.kernel(self.kernel_path, self.binary_path)))
 
         self.log_info(f"[FLASHING -- COMPLETE] {self.board_serial_no}.") 
 
-        # Build libtock-c app.
-        self.log_info(f"[BUILDING] libtock-c app {self.app_name}...")
-        self.log_info(sh.make("-C", self.libtock_path, _err_to_out=True))
-        self.log_info(f"[BUILDING -- COMPLETE] {self.app_name}.")
-
         # Flash libtock-c app to board.
         self.log_info(f"[FLASHING] libtock-c app {self.app_name} to: {self.board_serial_no}...")
-        self.log_info(sh.tockloader(
+        self.log_info(self.session.program(
                         "install", 
-                        f"{self.libtock_path}/build/{self.app_name}.tab",
-                        "--jlink-serial-number", 
-                        self.board_serial_no, 
-                        _err_to_out=True))
+                        artifacts.app(self.libtock_path, self.app_name)))
         self.log_info(f"[FLASHING -- COMPLETE] {self.app_name}.")
 
 
@@ -88,37 +76,50 @@ class Board:
         ser.close()
     
     def prep_test(self):
+        prep_boards([self])
+
+    # Program an already built kernel and app, and halt the board until the
+    # test is run.
+    def program_and_halt(self):
         self.init_nrfjprog()
-        self.flash_board()
+        self.program()
 
         self.panic_board()
         self.log_info(f"[READY] {self.board_serial_no} initialized and halted.")
-        self.nrfjprog_api.close()
 
-    # Function to run test. Output_queue is used to place output (instead of return)
-    def run_test(self, duration):
-        self.init_nrfjprog()
-        # We reset board and save output to log
-        ser = serial.Serial(self.board_com_port, BAUD_RATE, timeout = 1)
-
-        input = []
-
-        self.log_info(f"[RUNNING] {self.app_name} test on {self.board_serial_no} for {duration} seconds...")
-        self.nrfjprog_api.debug_reset()
-        self.nrfjprog_api.close()
-        
-        start_time = time.time()
-        while time.time() - start_time < duration:
-            try:
-                input.append(ser.readline().decode('ascii').strip())
-            except: 
-                continue
-
-        ser.close()
-        self.nrfjprog_api.close()
+    def open_console(self, timeout=1):
+        return serial.Serial(self.board_com_port, BAUD_RATE, timeout=timeout)
 
-        self.log_info(f"[COMPLETE] {self.app_name} test on {self.board_serial_no}.")
-        return input 
+    # Reset the board and return its console output (one string per line) over
+    # the given duration. To capture several boards at the same time, use
+    # `capture.capture_boards`.
+    def run_test(self, duration):
+        return capture_boards([self], duration).lines(self)
+
+# Prepare a set of boards for a test. Each distinct kernel and app is built
+# once, up front: builds of the same source tree can't safely run in parallel.
+# Programming a board only involves its own J-Link, so boards are then
+# programmed concurrently, using one thread per J-Link serial number.
+def prep_boards(boards):
+    for board in boards:
+        board.build()
+
+    boards_by_snr = {}
+    for board in boards:
+        boards_by_snr.setdefault(board.board_serial_no, []).append(board)
+
+    def program_boards(snr_boards):
+        for board in snr_boards:
+            board.program_and_halt()
+
+    with ThreadPoolExecutor(max_workers=len(boards_by_snr)) as executor:
+        futures = [
+            executor.submit(program_boards, snr_boards)
+            for snr_boards in boards_by_snr.values()
+        ]
+        # Propagate any exception raised while programming a board:
+        for future in futures:
+            future.result()
 
 def encode_and_send(input_str, ser):
     input_str += "\r\n"
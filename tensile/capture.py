@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import namedtuple
+
+# A single line of console output captured from a board. `timestamp` is the
+# time (in seconds, relative to the start of the capture) at which the line was
+# received. `line` is the decoded and stripped line, or None if it couldn't be
+# decoded, in which case only `raw` holds its contents.
+CaptureLine = namedtuple("CaptureLine", ["board", "timestamp", "line", "raw"])
+
+# Timeout of individual reads. This bounds how far a capture may overrun its
+# duration, it doesn't drop any data.
+READ_TIMEOUT = 0.1
+
+
+# Shared, time-ordered record of the output of all boards of a capture.
+class Timeline:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+
+    def append(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+
+    def sorted(self):
+        with self.lock:
+            return sorted(self.entries, key=lambda entry: entry.timestamp)
+
+    def for_board(self, board):
+        return [entry for entry in self.sorted() if entry.board is board]
+
+    def lines(self, board):
+        # Decoded lines of a single board, as returned by `Board.run_test`:
+        return [
+            entry.line for entry in self.for_board(board) if entry.line is not None
+        ]
+
+    def undecodable(self, board):
+        return [entry for entry in self.for_board(board) if entry.line is None]
+
+
+# Captures the console output of several boards at once. Each board is read by
+# its own thread. All boards are reset at the same moment, and every received
+# line is recorded with its arrival time, allowing to correlate events across
+# boards (e.g., TX to RX latency).
+class Capture:
+    def __init__(self, boards):
+        self.boards = boards
+        self.timeline = Timeline()
+        self.errors = []
+
+    def run(self, duration):
+        # All threads connect to their debugger and open their console first,
+        # then start the capture in lockstep:
+        barrier = threading.Barrier(len(self.boards))
+        self.start_time = None
+        threads = [
+            threading.Thread(target=self.capture_board, args=(board, duration, barrier))
+            for board in self.boards
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            raise self.errors[0]
+        return self.timeline
+
+    def capture_board(self, board, duration, barrier):
+        ser = None
+        try:
+            board.init_nrfjprog()
+            ser = board.open_console(READ_TIMEOUT)
+
+            if barrier.wait() == 0:
+                self.start_time = time.monotonic()
+            barrier.wait()
+
+            board.log_info(f"[RUNNING] {board.app_name} test on {board.board_serial_no} for {duration} seconds...")
+            board.session.debug_reset()
+
+            end_time = self.start_time + duration
+            pending = b""
+            while time.monotonic() < end_time:
+                # readline returns a partial line when the read times out,
+                # keep it until the rest of the line arrives:
+                pending += ser.readline()
+                if pending.endswith(b"\n"):
+                    self.record(board, pending)
+                    pending = b""
+            if pending:
+                self.record(board, pending)
+
+            board.log_info(f"[COMPLETE] {board.app_name} test on {board.board_serial_no}.")
+        except threading.BrokenBarrierError:
+            # Another board failed to start its capture:
+            pass
+        except Exception as e:
+            self.errors.append(e)
+            barrier.abort()
+        finally:
+            if ser is not None:
+                ser.close()
+
+    def record(self, board, raw):
+        timestamp = time.monotonic() - self.start_time
+        try:
+            line = raw.decode("ascii").strip()
+        except UnicodeDecodeError:
+            line = None
+        self.timeline.append(CaptureLine(board, timestamp, line, raw))
+
+
+def capture_boards(boards, duration):
+    return Capture(boards).run(duration)
@@ -1,4 +1,33 @@
-from board import Board
+from board import Board, prep_boards
+from capture import capture_boards
+from packet_parser import PacketStats, parse_lines
+
+def receive_stats(timeline, board_tx, board_rx, tx_interval, expected):
+    # Parse the packets received by `board_rx`, as they arrived:
+    stats = parse_lines(((entry.line, entry.timestamp) for entry in timeline.for_board(board_rx)),
+                        PacketStats(expected, tx_interval))
+
+    # Latency from each successful transmission to its reception:
+    stats.add_latencies(tx_timestamps(timeline, board_tx))
+    return stats
+
+def tx_timestamps(timeline, board_tx):
+    # Times at which `board_tx` reported a successful transmission:
+    return [entry.timestamp for entry in timeline.for_board(board_tx)
+            if entry.line is not None and "Transmitted successfully." in entry.line]
+
+def check_pdr(test_name, board_rx, stats, total_packets, test_rx_results):
+    summary = stats.summary(total_packets)
+    board_rx.log_info(f"{test_name} statistics: " + ", ".join(
+        f"{key}={value:.4f}" if isinstance(value, float) else f"{key}={value}"
+        for key, value in summary.items()))
+
+    # Check if 50% of packets were transmitted successfully.
+    if stats.pdr(total_packets) >= 0.50:
+        board_rx.log_info(f"PASSED: {test_name} test")
+    else:
+        raise Exception("FAILED: {} test -- {} out of {} packets transmitted successfully. \
+                        Dump of received packets:\n {}".format(test_name, stats.valid, total_packets, test_rx_results))
 
 def radio_rx_test(boards, test_duration_sec=10):
     # We require 2 boards for this test.
@@ -21,42 +50,22 @@ def radio_rx_test(boards, test_duration_sec=10):
                   "tock/target/thumbv7em-none-eabi/release/nrf52840dk.bin")
 
     # Setup boards for test.
-    board_tx.prep_test()
-    board_rx.prep_test()
+    prep_boards([board_tx, board_rx])
 
-    # Run tests.
-    board_tx.run_test(1)
-    test_rx_results = board_rx.run_test(test_duration_sec)
+    # Run tests, capturing the output of both boards at the same time.
+    timeline = capture_boards([board_tx, board_rx], test_duration_sec)
+    test_rx_results = timeline.lines(board_rx)
 
     # The standard TX test transmits a packet every 250ms. 
-    success_passed = 0
     TOTAL_PACKETS = test_duration_sec * 4
-
-    index = 0
-    while index < len(test_rx_results):
-        if index + 8 < len(test_rx_results) \
-                and "Received packet with payload of 60 bytes from offset 12" in test_rx_results[index] \
-                and "00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f" in test_rx_results[index+1] \
-                and "10 11 12 13 14 15 16 17 18 19 1a 1b 1c 1d 1e 1f" in test_rx_results[index+2] \
-                and "20 21 22 23 24 25 26 27 28 29 2a 2b 2c 2d 2e 2f" in test_rx_results[index+3] \
-                and "30 31 32 33 34 35 36 37 38 39 3a 3b" in test_rx_results[index+4] \
-                and "Packet destination PAN ID: 0xabcd" in test_rx_results[index+5] \
-                and "Packet destination address: 0x0802" in test_rx_results[index+6] \
-                and "Packet source PAN ID: 0xabcd" in test_rx_results[index+7] \
-                and "Packet source address: 0x1540" in test_rx_results[index+8]:
-                    success_passed += 1
-                    index += 9
-        else:
-            index += 1
-
-            
-
-    # Check if 50% of packets were transmitted successfully.
-    if success_passed / TOTAL_PACKETS >= 0.50:
-        board_rx.log_info("PASSED: radio_rx test")
-    else:
-        raise Exception("FAILED: radio_rx test -- {} out of {} packets transmitted successfully. \
-                        Dump of received packets:\n {}".format(success_passed, TOTAL_PACKETS, test_rx_results))
+    stats = receive_stats(timeline, board_tx, board_rx, 0.25, {
+        "payload_offset": 12,
+        "dst_pan": "0xabcd",
+        "dst_addr": "0x0802",
+        "src_pan": "0xabcd",
+        "src_addr": "0x1540",
+    })
+    check_pdr("radio_rx", board_rx, stats, TOTAL_PACKETS, test_rx_results)
 
 def radio_tx_raw_test(boards, test_duration_sec=10):
     # We require 2 boards for this test.
@@ -79,41 +88,22 @@ def radio_tx_raw_test(boards, test_duration_sec=10):
                   "tock/target/thumbv7em-none-eabi/release/nrf52840dk.bin")
 
     # Setup boards for test.
-    board_tx.prep_test()
-    board_rx.prep_test()
+    prep_boards([board_tx, board_rx])
 
-    # Run test.
-    board_tx.run_test(1)
-    test_rx_results = board_rx.run_test(test_duration_sec)
+    # Run test, capturing the output of both boards at the same time.
+    timeline = capture_boards([board_tx, board_rx], test_duration_sec)
+    test_rx_results = timeline.lines(board_rx)
 
     # The TX_RAW test transmits a packet every 500ms.
-    success_passed = 0
     TOTAL_PACKETS = 2 * test_duration_sec 
-
-    index = 0
-
-    while index < len(test_rx_results):
-        if index + 8 < len(test_rx_results) \
-                and "Received packet with payload of 60 bytes from offset 18" in test_rx_results[index] \
-                and "00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f" in test_rx_results[index+1] \
-                and "10 11 12 13 14 15 16 17 18 19 1a 1b 1c 1d 1e 1f" in test_rx_results[index+2] \
-                and "20 21 22 23 24 25 26 27 28 29 2a 2b 2c 2d 2e 2f" in test_rx_results[index+3] \
-                and "30 31 32 33 34 35 36 37 38 39 3a 3b" in test_rx_results[index+4] \
-                and "Packet destination PAN ID: 0xabcd" in test_rx_results[index+5] \
-                and "Packet destination address: 0xffff" in test_rx_results[index+6] \
-                and "Packet source PAN ID: 0xabcd" in test_rx_results[index+7] \
-                and "Packet source address: 00 00 00 00 00 00 00 00" in test_rx_results[index+8]:
-                    success_passed += 1
-                    index += 9
-        else:
-            index += 1
-
-    # Check if 50% of packets were transmitted successfully.
-    if success_passed / TOTAL_PACKETS >= 0.50:
-        board_rx.log_info("PASSED: radio_tx_raw test")
-    else:
-        raise Exception("FAILED: radio_tx_raw test -- {} out of {} packets transmitted successfully. Dump of \
-                received packets: \n {}".format(success_passed, TOTAL_PACKETS, test_rx_results))
+    stats = receive_stats(timeline, board_tx, board_rx, 0.5, {
+        "payload_offset": 18,
+        "dst_pan": "0xabcd",
+        "dst_addr": "0xffff",
+        "src_pan": "0xabcd",
+        "src_addr": "00 00 00 00 00 00 00 00",
+    })
+    check_pdr("radio_tx_raw", board_rx, stats, TOTAL_PACKETS, test_rx_results)
 
 def radio_tx_test(boards, test_duration_sec=10):
     # Create board objects for each device.
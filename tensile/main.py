@@ -1,17 +1,39 @@
-from pynrfjprog import LowLevel 
+import argparse
+from nrfjprog_sessions import sessions
 from ieee802154_tests import radio_tx_test, radio_rx_test, radio_tx_raw_test
 from openthread_tests import openthread_hello_test
+from benchmark import radio_benchmark, RESULTS_FILE
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the tensile radio tests")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Run the radio throughput and loss benchmark instead of the tests")
+    parser.add_argument("--durations", type=int, nargs="+", default=[10],
+                        help="Benchmark: test durations to sweep, in seconds")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Benchmark: runs per sweep point")
+    parser.add_argument("--results-file", default=RESULTS_FILE,
+                        help="Benchmark: file the results are appended to")
+    args = parser.parse_args()
+
     # Scan for available devices.
-    nrfjprog_api = LowLevel.API()
-    nrfjprog_api.open()
-    available_devices = nrfjprog_api.enum_emu_snr()
+    available_devices = sessions.enum_emu_snr()
     print(available_devices)
-    nrfjprog_api.close()
-    radio_tx_test(available_devices)
-    radio_rx_test(available_devices, 60)
-    radio_tx_raw_test(available_devices, 60)
-    openthread_hello_test(available_devices)
 
-    print("===SUCCESSFULLY PASSED ALL TESTS===")
+    # J-Link connections are kept open across all tests of this run.
+    try:
+        if args.benchmark:
+            radio_benchmark(available_devices, args.durations, args.repeats,
+                            args.results_file)
+        else:
+            radio_tx_test(available_devices)
+            radio_rx_test(available_devices, 60)
+            radio_tx_raw_test(available_devices, 60)
+            openthread_hello_test(available_devices)
+    finally:
+        sessions.close_all()
+
+    if args.benchmark:
+        print("===BENCHMARK COMPLETE===")
+    else:
+        print("===SUCCESSFULLY PASSED ALL TESTS===")
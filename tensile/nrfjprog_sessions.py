@@ -0,0 +1,147 @@
+import coloredlogs, logging
+import sh
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger, fmt='%(message)s')
+
+
+def default_api():
+    from pynrfjprog import LowLevel
+    return LowLevel.API()
+
+
+# A connected pynrfjprog API for a single J-Link. All operations on a J-Link
+# (including tockloader, which connects to it on its own) are serialized by the
+# session's lock, as neither the API nor the probe support concurrent use.
+class NrfjprogSession:
+    def __init__(self, board_serial_no, api):
+        self.board_serial_no = board_serial_no
+        self.api = api
+        self.lock = threading.RLock()
+
+    def com_port(self):
+        # NOTE: Newer nordic devices occasionally have 2 COM ports. We select
+        # the lower port.
+        with self.lock:
+            com_ports = self.api.enum_emu_com_ports(self.board_serial_no)
+        return com_ports[0].path if com_ports else None
+
+    def recover(self):
+        with self.lock:
+            self.api.recover()
+
+    def debug_reset(self):
+        with self.lock:
+            self.api.debug_reset()
+
+    def program(self, *tockloader_args):
+        # Run a tockloader command against this J-Link.
+        with self.lock:
+            return sh.tockloader(
+                *tockloader_args,
+                "--jlink-serial-number",
+                self.board_serial_no,
+                _err_to_out=True)
+
+    def close(self):
+        with self.lock:
+            self.api.close()
+
+
+# Keeps one connected API per J-Link serial number for the life of the tensile
+# run, instead of opening and connecting a new one for every phase of every
+# test. `api_factory` creates unconnected API objects, e.g. `FakeAPI` for
+# testing without any boards attached (see test_nrfjprog_sessions.py).
+class NrfjprogSessions:
+    def __init__(self, api_factory=default_api):
+        self.api_factory = api_factory
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def enum_emu_snr(self):
+        api = self.api_factory()
+        api.open()
+        try:
+            return api.enum_emu_snr()
+        finally:
+            api.close()
+
+    def get(self, board_serial_no):
+        with self.lock:
+            session = self.sessions.get(board_serial_no)
+            if session is None:
+                logger.info(f"[CONNECTING] J-Link {board_serial_no}...")
+                api = self.api_factory()
+                api.open()
+                try:
+                    api.connect_to_emu_with_snr(board_serial_no)
+                except Exception:
+                    api.close()
+                    raise
+                session = NrfjprogSession(board_serial_no, api)
+                self.sessions[board_serial_no] = session
+            return session
+
+    def close_all(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+FakeComPort = namedtuple("FakeComPort", ["path", "vcom"])
+
+
+# Stand-in for `pynrfjprog.LowLevel.API`, implementing the calls used by
+# tensile. Every call is appended to `calls`, for inspection by tests.
+class FakeAPI:
+    def __init__(self, serial_numbers=(1050000001, 1050000002, 1050000003)):
+        self.serial_numbers = list(serial_numbers)
+        self.calls = []
+        self.is_open = False
+        self.connected_snr = None
+
+    def open(self):
+        self.calls.append(("open",))
+        self.is_open = True
+
+    def close(self):
+        self.calls.append(("close",))
+        self.is_open = False
+        self.connected_snr = None
+
+    def enum_emu_snr(self):
+        self.calls.append(("enum_emu_snr",))
+        return list(self.serial_numbers)
+
+    def connect_to_emu_with_snr(self, snr):
+        self.calls.append(("connect_to_emu_with_snr", snr))
+        if not self.is_open:
+            raise RuntimeError("API is not open")
+        if snr not in self.serial_numbers:
+            raise RuntimeError(f"No emulator with serial number {snr}")
+        self.connected_snr = snr
+
+    def enum_emu_com_ports(self, snr):
+        self.calls.append(("enum_emu_com_ports", snr))
+        index = self.serial_numbers.index(snr)
+        return [FakeComPort(f"/dev/ttyACM{2 * index}", 0),
+                FakeComPort(f"/dev/ttyACM{2 * index + 1}", 1)]
+
+    def recover(self):
+        self.require_connection()
+        self.calls.append(("recover",))
+
+    def debug_reset(self):
+        self.require_connection()
+        self.calls.append(("debug_reset",))
+
+    def require_connection(self):
+        if self.connected_snr is None:
+            raise RuntimeError("Not connected to an emulator")
+
+
+# Sessions shared by all boards of this run:
+sessions = NrfjprogSessions()
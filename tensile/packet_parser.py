@@ -0,0 +1,266 @@
+import math
+import re
+
+# Parser for the console output of the libtock-c `radio_rx` app, which prints
+# every received packet as:
+#
+#   Received packet with payload of 60 bytes from offset 12
+#   00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f
+#   ...
+#   30 31 32 33 34 35 36 37 38 39 3a 3b
+#   Packet destination PAN ID: 0xabcd
+#   Packet destination address: 0x0802
+#   Packet source PAN ID: 0xabcd
+#   Packet source address: 0x1540
+
+HEADER_RE = re.compile(r"Received packet with payload of (\d+) bytes from offset (\d+)")
+FIELD_RES = {
+    "dst_pan": re.compile(r"Packet destination PAN ID: (.*)"),
+    "dst_addr": re.compile(r"Packet destination address: (.*)"),
+    "src_pan": re.compile(r"Packet source PAN ID: (.*)"),
+    "src_addr": re.compile(r"Packet source address: (.*)"),
+}
+
+# The standard test payload sent by the `radio_tx` and `radio_tx_raw` apps:
+TEST_PAYLOAD = bytes(range(60))
+
+
+class Packet:
+    def __init__(self, timestamp, payload_length, payload_offset):
+        # Time at which the packet's first line was received:
+        self.timestamp = timestamp
+        self.payload_length = payload_length
+        self.payload_offset = payload_offset
+        self.payload = bytearray()
+        self.dst_pan = None
+        self.dst_addr = None
+        self.src_pan = None
+        self.src_addr = None
+        # Set if any of the packet's lines was garbled or missing:
+        self.corrupted = False
+
+    def complete(self):
+        return (
+            not self.corrupted
+            and len(self.payload) == self.payload_length
+            and None not in (self.dst_pan, self.dst_addr, self.src_pan, self.src_addr)
+        )
+
+    def key(self):
+        return (
+            self.payload_offset,
+            bytes(self.payload),
+            self.dst_pan,
+            self.dst_addr,
+            self.src_pan,
+            self.src_addr,
+        )
+
+    def __repr__(self):
+        return (
+            f"Packet(t={self.timestamp:.3f}, len={self.payload_length}, "
+            f"offset={self.payload_offset}, dst={self.dst_pan}/{self.dst_addr}, "
+            f"src={self.src_pan}/{self.src_addr}, corrupted={self.corrupted})"
+        )
+
+
+# Streaming state machine turning console lines into `Packet`s. Lines are fed
+# one at a time, so arbitrarily long captures can be parsed incrementally.
+class PacketParser:
+    IDLE = "idle"
+    PAYLOAD = "payload"
+    FIELDS = "fields"
+
+    def __init__(self):
+        self.state = self.IDLE
+        self.packet = None
+
+    def feed(self, line, timestamp=None):
+        # Feed a single line (None for a line that couldn't be decoded).
+        # Returns a list of packets completed by this line.
+        completed = []
+
+        header = HEADER_RE.search(line) if line is not None else None
+        if header:
+            # A new packet starts, the previous one is truncated if it isn't
+            # complete yet:
+            if self.packet is not None:
+                self.packet.corrupted = True
+                completed.append(self.packet)
+            self.packet = Packet(timestamp, int(header.group(1)), int(header.group(2)))
+            self.state = self.PAYLOAD if self.packet.payload_length > 0 else self.FIELDS
+            return completed
+
+        if self.state == self.IDLE:
+            return completed
+
+        if line is None:
+            self.packet.corrupted = True
+            return completed
+
+        if self.state == self.PAYLOAD:
+            try:
+                self.packet.payload += bytes.fromhex(line)
+            except ValueError:
+                # Not a line of hex bytes, the payload was cut short:
+                self.packet.corrupted = True
+                self.state = self.FIELDS
+            else:
+                if len(self.packet.payload) >= self.packet.payload_length:
+                    if len(self.packet.payload) > self.packet.payload_length:
+                        self.packet.corrupted = True
+                    self.state = self.FIELDS
+                return completed
+
+        for field, field_re in FIELD_RES.items():
+            match = field_re.search(line)
+            if match:
+                setattr(self.packet, field, match.group(1).strip())
+                break
+        else:
+            self.packet.corrupted = True
+
+        if self.packet.src_addr is not None:
+            # The source address is the last field printed:
+            completed.append(self.packet)
+            self.packet = None
+            self.state = self.IDLE
+
+        return completed
+
+    def finish(self):
+        # Flush a trailing incomplete packet at the end of a capture:
+        if self.packet is None:
+            return []
+        self.packet.corrupted = True
+        packet, self.packet = self.packet, None
+        self.state = self.IDLE
+        return [packet]
+
+
+# Incrementally aggregated statistics over the packets of a capture.
+class PacketStats:
+    def __init__(self, expected=None, tx_interval=None):
+        # `expected` is a dict of the expected packet attributes (e.g.,
+        # payload_offset, dst_addr). The payload is expected to be
+        # TEST_PAYLOAD, unless given. `tx_interval` is the transmitter's packet
+        # interval in seconds. An identical packet received less than half an
+        # interval after the previous one is counted as a duplicate, as the
+        # test payloads carry no sequence number.
+        self.expected = dict(expected or {})
+        self.expected.setdefault("payload", TEST_PAYLOAD)
+        self.tx_interval = tx_interval
+
+        self.received = 0
+        self.valid = 0
+        self.corrupted = 0
+        self.unexpected = 0
+        self.duplicates = 0
+
+        self.last_key = None
+        self.last_timestamp = None
+        self.valid_timestamps = []
+
+        # Running mean and variance of inter-arrival times (Welford):
+        self.intervals = 0
+        self.interval_mean = 0.0
+        self.interval_m2 = 0.0
+
+        # Transmission to reception latencies, see `add_latencies`:
+        self.latencies = []
+
+    def add(self, packet):
+        self.received += 1
+        if not packet.complete():
+            self.corrupted += 1
+            return
+
+        for attr, value in self.expected.items():
+            actual = bytes(packet.payload) if attr == "payload" else getattr(packet, attr)
+            if actual != value:
+                self.unexpected += 1
+                return
+
+        key = packet.key()
+        if (
+            self.tx_interval is not None
+            and key == self.last_key
+            and packet.timestamp is not None
+            and self.last_timestamp is not None
+            and packet.timestamp - self.last_timestamp < self.tx_interval / 2
+        ):
+            self.duplicates += 1
+            return
+
+        if packet.timestamp is not None:
+            if self.last_timestamp is not None:
+                self.add_interval(packet.timestamp - self.last_timestamp)
+            self.last_timestamp = packet.timestamp
+            self.valid_timestamps.append(packet.timestamp)
+        self.last_key = key
+        self.valid += 1
+
+    def add_interval(self, interval):
+        self.intervals += 1
+        delta = interval - self.interval_mean
+        self.interval_mean += delta / self.intervals
+        self.interval_m2 += delta * (interval - self.interval_mean)
+
+    def add_latencies(self, tx_timestamps):
+        # Correlate the valid packets with the transmitter's timestamps, taken
+        # from the same capture:
+        self.latencies = latencies(sorted(tx_timestamps), self.valid_timestamps)
+
+    def pdr(self, total_sent):
+        return self.valid / total_sent if total_sent else 0.0
+
+    def jitter(self):
+        # Standard deviation of the inter-arrival times of valid packets:
+        if self.intervals < 2:
+            return None
+        return math.sqrt(self.interval_m2 / (self.intervals - 1))
+
+    def summary(self, total_sent=None):
+        summary = {
+            "received": self.received,
+            "valid": self.valid,
+            "corrupted": self.corrupted,
+            "unexpected": self.unexpected,
+            "duplicates": self.duplicates,
+            "mean_interval_s": self.interval_mean if self.intervals else None,
+            "jitter_s": self.jitter(),
+        }
+        if self.latencies:
+            summary["mean_latency_s"] = sum(self.latencies) / len(self.latencies)
+            summary["max_latency_s"] = max(self.latencies)
+        if total_sent is not None:
+            summary["sent"] = total_sent
+            summary["pdr"] = self.pdr(total_sent)
+        return summary
+
+
+def parse_lines(entries, stats):
+    # Parse an iterable of (line, timestamp) tuples into `stats`.
+    parser = PacketParser()
+    for line, timestamp in entries:
+        for packet in parser.feed(line, timestamp):
+            stats.add(packet)
+    for packet in parser.finish():
+        stats.add(packet)
+    return stats
+
+
+def latencies(tx_timestamps, rx_timestamps):
+    # For every received packet, the time since the most recent transmission
+    # preceding it. Both lists must be sorted.
+    result = []
+    tx_index = -1
+    for rx_timestamp in rx_timestamps:
+        while (
+            tx_index + 1 < len(tx_timestamps)
+            and tx_timestamps[tx_index + 1] <= rx_timestamp
+        ):
+            tx_index += 1
+        if tx_index >= 0:
+            result.append(rx_timestamp - tx_timestamps[tx_index])
+    return result
@@ -0,0 +1,109 @@
+# Tests of the J-Link session manager, with `FakeAPI` standing in for
+# pynrfjprog. These run on the host only, without any boards attached:
+#
+#     python3 -m unittest test_nrfjprog_sessions.py
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Tensile modules are imported from the tensile directory:
+sys.path.append(str(Path(__file__).parent))
+
+import nrfjprog_sessions
+from nrfjprog_sessions import FakeAPI, NrfjprogSessions
+
+SERIAL_NUMBERS = [1050000001, 1050000002, 1050000003]
+
+
+class NrfjprogSessionsTest(unittest.TestCase):
+    def setUp(self):
+        self.sessions = NrfjprogSessions(api_factory=FakeAPI)
+        tockloader = mock.patch.object(nrfjprog_sessions.sh, "tockloader",
+                                       create=True)
+        self.tockloader = tockloader.start()
+        self.addCleanup(tockloader.stop)
+
+    def prep_phase(self, snr):
+        # As `Board.program_and_halt`:
+        session = self.sessions.get(snr)
+        session.com_port()
+        session.recover()
+        session.program("flash", "--address", "0x00000", "kernel.bin")
+        session.program("install", "app.tab")
+        return session
+
+    def run_phase(self, snr):
+        # As `Capture.capture_board`:
+        session = self.sessions.get(snr)
+        session.com_port()
+        session.debug_reset()
+        return session
+
+    def test_enum_emu_snr(self):
+        self.assertEqual(self.sessions.enum_emu_snr(), SERIAL_NUMBERS)
+        self.assertEqual(self.sessions.sessions, {})
+
+    def test_one_connection_per_jlink(self):
+        boards = [SERIAL_NUMBERS[0], SERIAL_NUMBERS[1], SERIAL_NUMBERS[0]]
+        for _test in range(2):
+            prepped = [self.prep_phase(snr) for snr in boards]
+            ran = [self.run_phase(snr) for snr in boards]
+            for snr, prep_session, run_session in zip(boards, prepped, ran):
+                self.assertIs(prep_session, run_session)
+                self.assertIs(run_session, self.sessions.get(snr))
+
+        apis = {snr: session.api for snr, session in self.sessions.sessions.items()}
+        self.assertEqual(sorted(apis), sorted(set(boards)))
+        self.sessions.close_all()
+        self.assertEqual(self.sessions.sessions, {})
+
+        for snr, api in apis.items():
+            connects = [call for call in api.calls
+                        if call[0] == "connect_to_emu_with_snr"]
+            self.assertEqual(connects, [("connect_to_emu_with_snr", snr)])
+            self.assertEqual(api.calls.count(("open",)), 1)
+            self.assertEqual(api.calls.count(("close",)), 1)
+            self.assertEqual(api.calls[-1], ("close",))
+            # Two prep and two run phases of each board using this J-Link:
+            uses = 2 * boards.count(snr)
+            self.assertEqual(api.calls.count(("recover",)), uses)
+            self.assertEqual(api.calls.count(("debug_reset",)), uses)
+            self.assertEqual(
+                api.calls.count(("enum_emu_com_ports", snr)), 2 * uses)
+
+    def test_com_port(self):
+        session = self.sessions.get(SERIAL_NUMBERS[1])
+        self.assertEqual(session.com_port(), "/dev/ttyACM2")
+
+    def test_program_routes_to_jlink(self):
+        session = self.prep_phase(SERIAL_NUMBERS[1])
+        self.assertEqual(self.tockloader.call_args_list, [
+            mock.call("flash", "--address", "0x00000", "kernel.bin",
+                      "--jlink-serial-number", SERIAL_NUMBERS[1],
+                      _err_to_out=True),
+            mock.call("install", "app.tab",
+                      "--jlink-serial-number", SERIAL_NUMBERS[1],
+                      _err_to_out=True),
+        ])
+        self.assertEqual(session.api.connected_snr, SERIAL_NUMBERS[1])
+
+    def test_unknown_jlink(self):
+        apis = []
+
+        def api_factory():
+            apis.append(FakeAPI())
+            return apis[-1]
+
+        sessions = NrfjprogSessions(api_factory=api_factory)
+        with self.assertRaises(RuntimeError):
+            sessions.get(1059999999)
+        self.assertEqual(sessions.sessions, {})
+        # The API opened for the failed connection is closed again:
+        self.assertEqual(len(apis), 1)
+        self.assertFalse(apis[0].is_open)
+
+
+if __name__ == "__main__":
+    unittest.main()